@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark del arranque del valorador.
+
+Mide el tiempo desde que se crea la aplicación hasta que se pinta por primera
+vez la ventana principal, con la interfaz construida de forma diferida y de
+forma completa. Cada medición se hace en un proceso nuevo (arranque en frío)
+y con un directorio personal temporal (para que no aparezca el diálogo de
+recuperación de la sesión).
+
+Qt 4 necesita un servidor X: se usa el de la variable DISPLAY o, si no está
+definida, cada medición se lanza con xvfb-run (el arranque de Xvfb no entra en
+el tiempo medido, que empieza dentro del proceso).
+
+Uso:
+    python benchmarks/benchmark_arranque.py [-n REPETICIONES]
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+from __future__ import print_function
+import sys
+import os
+import time
+import shutil
+import tempfile
+import argparse
+import subprocess
+
+
+# Directorio con el código del valorador.
+_SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         os.pardir, "src")
+
+
+def medir_arranque(lazy):
+    """
+    Arranca el valorador en este proceso y devuelve los segundos hasta el
+    primer pintado de la ventana principal.
+
+    Argumentos:
+        lazy: True para construir la interfaz de forma diferida.
+    """
+    inicio = time.time()
+
+    sys.path.insert(0, _SRC_PATH)
+    from PyQt4 import QtCore
+    from PyQt4 import QtGui
+    from valorador import Valorador
+
+    class FiltroPintado(QtCore.QObject):
+        """
+        Apunta el momento del primer pintado de la ventana principal.
+        """
+
+        def __init__(self):
+            super(FiltroPintado, self).__init__()
+            self.primer_pintado = None
+
+        def eventFilter(self, objeto, evento):
+            if (evento.type() == QtCore.QEvent.Paint and
+                    self.primer_pintado is None and
+                    isinstance(objeto, QtGui.QMainWindow)):
+                self.primer_pintado = time.time()
+                QtCore.QTimer.singleShot(0, QtGui.qApp.quit)
+            return False
+
+    app = QtGui.QApplication([sys.argv[0]])
+    filtro = FiltroPintado()
+    app.installEventFilter(filtro)
+
+    controller = Valorador.montar(app, lazy)
+
+    if (filtro.primer_pintado is None):
+        app.exec_()
+
+    return filtro.primer_pintado - inicio
+
+
+def _buscar_ejecutable(nombre):
+    """
+    Devuelve la ruta de un ejecutable del PATH o None si no se encuentra.
+
+    Argumentos:
+        nombre: Nombre del ejecutable.
+    """
+    for directorio in os.environ.get("PATH", "").split(os.pathsep):
+        ruta = os.path.join(directorio, nombre)
+        if (os.path.isfile(ruta) and os.access(ruta, os.X_OK)):
+            return ruta
+
+    return None
+
+
+def main(argv=None):
+    """
+    Lanza las mediciones en procesos nuevos y muestra la mediana de cada modo.
+
+    Argumentos:
+        argv: (opcional) Lista con los argumentos (por defecto, los del
+              programa).
+    """
+    parser = argparse.ArgumentParser(
+        description=u"Mide el tiempo hasta el primer pintado del valorador.")
+    parser.add_argument("-n", "--repeticiones", type=int, default=5,
+                        help=u"número de arranques de cada modo")
+    parser.add_argument("--medir", choices=("lazy", "completo"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if (args.medir is not None):
+        print(medir_arranque(args.medir == "lazy"))
+        return
+
+    orden = [sys.executable, os.path.abspath(__file__)]
+    if (not os.environ.get("DISPLAY")):
+        xvfb_run = _buscar_ejecutable("xvfb-run")
+        if (xvfb_run is None):
+            parser.error(u"hace falta un servidor X (variable DISPLAY) o "
+                         u"xvfb-run")
+        orden = [xvfb_run, "-a"] + orden
+
+    home = tempfile.mkdtemp()
+    entorno = dict(os.environ, HOME=home)
+
+    try:
+        for modo in ("completo", "lazy"):
+            tiempos = sorted(
+                float(subprocess.check_output(
+                    orden + ["--medir", modo],
+                    env=entorno).decode().strip())
+                for _ in range(args.repeticiones))
+
+            print(u"%-10s mediana %.1f ms (min. %.1f ms, max. %.1f ms)" % (
+                modo, 1000 * tiempos[len(tiempos) // 2],
+                1000 * tiempos[0], 1000 * tiempos[-1]))
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    """
+    Benchmark desde la línea de comandos.
+    """
+    main()
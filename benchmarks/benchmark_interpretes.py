@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de la valoración por lotes con distintos intérpretes de Python.
+
+Valora el mismo lote de solicitantes con cada uno de los intérpretes
+indicados o, si no se indica ninguno, con los que se encuentren en el PATH
+(python2, python3, pypy y pypy3). El lote se genera de forma aleatoria una sola
+vez, en este proceso, y se pasa a cada intérprete en un fichero JSON temporal,
+ya que el generador aleatorio no da los mismos valores en Python 2 y en
+Python 3 aunque se use la misma semilla. Cada medición se hace en un proceso
+nuevo y, antes de medir, se valora el lote una vez sin tomar tiempos para que
+el JIT de PyPy haya compilado el bucle de valoración.
+
+Uso:
+    python benchmarks/benchmark_interpretes.py [-c CASO] [-n SOLICITANTES]
+        [-r REPETICIONES] [INTERPRETE ...]
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+from __future__ import print_function
+import sys
+import os
+import time
+import json
+import random
+import tempfile
+import datetime
+import argparse
+import subprocess
+
+
+# Directorio con el código del valorador.
+_SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         os.pardir, "src")
+
+# Caso que se valora por defecto.
+_CASO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          os.pardir, "casos-de-prueba",
+                          "becas-colaboracion-grado-MECD.json")
+
+# Intérpretes que se buscan en el PATH si no se indica ninguno.
+_INTERPRETES = ("python2", "python3", "pypy", "pypy3")
+
+# Modos de valoración que se miden.
+_MODOS = ("completo", "rapido", "columnas")
+
+
+def generar_solicitantes(caso, n, semilla=0):
+    """
+    Devuelve una lista con los valores (preparados para caso.asignar_valores)
+    de n solicitantes aleatorios. Los valores numéricos se generan en un rango
+    algo más amplio que el aceptado para que haya aprobados y rechazados.
+
+    Argumentos:
+        caso: Caso (objeto de la clase Caso) con el que se valora.
+        n: Número de solicitantes.
+        semilla: (opcional) Semilla del generador aleatorio.
+    """
+    generador = random.Random(semilla)
+    solicitantes = []
+
+    for _ in range(n):
+        valores = []
+        for requisito in caso.requisitos:
+            if (requisito.tipo == "Booleano"):
+                valores.append(generador.random() < 0.9)
+            elif (requisito.tipo in ("Porcentaje", "Numero", "Intervalos")):
+                minimo = requisito.valor_minimo
+                rango = requisito.valor_maximo - minimo
+                valores.append(round(generador.uniform(minimo - rango / 4,
+                                                       minimo + rango), 2))
+            elif (requisito.tipo == "Entero"):
+                minimo = requisito.valor_minimo
+                rango = requisito.valor_maximo - minimo
+                valores.append(generador.randint(minimo - rango // 4,
+                                                 minimo + rango))
+            elif (requisito.tipo == "Enumerado"):
+                valores.append(generador.choice(
+                    sorted(requisito.valores_permitidos) + [u"otro"]))
+            elif (requisito.tipo == "Fecha"):
+                minimo = datetime.date(
+                    *map(int, requisito.valor_minimo.split(u"-"))).toordinal()
+                maximo = datetime.date(
+                    *map(int, requisito.valor_maximo.split(u"-"))).toordinal()
+                rango = maximo - minimo
+                valores.append(datetime.date.fromordinal(generador.randint(
+                    minimo - rango // 4, maximo)).isoformat())
+            else:
+                valores.append(None)
+        solicitantes.append(valores)
+
+    return solicitantes
+
+
+def guardar_solicitantes(caso_path, n, semilla=0):
+    """
+    Genera n solicitantes aleatorios (ver generar_solicitantes) y los guarda en
+    un fichero JSON temporal. Devuelve la ruta del fichero, que debe borrar
+    quien lo use.
+
+    Argumentos:
+        caso_path: Ruta hacia el fichero JSON del caso.
+        n: Número de solicitantes.
+        semilla: (opcional) Semilla del generador aleatorio.
+    """
+    if (_SRC_PATH not in sys.path):
+        sys.path.insert(0, _SRC_PATH)
+    from valorador_model import Caso
+
+    caso = Caso()
+    caso.load_from_JSON_file(caso_path)
+    solicitantes = generar_solicitantes(caso, n, semilla)
+
+    descriptor, datos_path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(descriptor, "w") as f:
+        json.dump(solicitantes, f)
+
+    return datos_path
+
+
+def medir_valoracion(caso_path, datos_path, repeticiones, modo):
+    """
+    Valora un lote de solicitantes en este proceso y devuelve una lista con
+    los segundos que ha tardado cada repetición.
+
+    Argumentos:
+        caso_path: Ruta hacia el fichero JSON del caso.
+        datos_path: Ruta hacia el fichero JSON con los valores de los
+                    solicitantes (ver guardar_solicitantes).
+        repeticiones: Número de veces que se valora el lote.
+        modo: "completo" (con explicación), "rapido" (solo el resultado) o
+              "columnas" (todo el lote de una vez con
+              DefinicionCaso.valorar_columnas).
+    """
+    if (_SRC_PATH not in sys.path):
+        sys.path.insert(0, _SRC_PATH)
+    from valorador_model import Caso
+
+    caso = Caso()
+    caso.load_from_JSON_file(caso_path)
+    with open(datos_path) as f:
+        solicitantes = json.load(f)
+    rapido = (modo == "rapido")
+    definicion = caso.definicion
+    columnas = [list(columna) for columna in zip(*solicitantes)]
+
+    def valorar_lote():
+        if (modo == "columnas"):
+            return definicion.valorar_columnas(columnas)[0].count(True)
+
+        n_aprobados = 0
+        for valores in solicitantes:
+            caso.asignar_valores(valores)
+            if (caso.valorar(rapido=rapido, explicar=not rapido)):
+                n_aprobados += 1
+        return n_aprobados
+
+    # Calentamiento (para el JIT de PyPy)
+    valorar_lote()
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.time()
+        valorar_lote()
+        tiempos.append(time.time() - inicio)
+
+    return tiempos
+
+
+def _buscar_interprete(nombre):
+    """
+    Devuelve la ruta de un ejecutable del PATH o None si no se encuentra.
+
+    Argumentos:
+        nombre: Nombre del ejecutable.
+    """
+    for directorio in os.environ.get("PATH", "").split(os.pathsep):
+        ruta = os.path.join(directorio, nombre)
+        if (os.path.isfile(ruta) and os.access(ruta, os.X_OK)):
+            return ruta
+
+    return None
+
+
+def main(argv=None):
+    """
+    Lanza las mediciones con cada intérprete y muestra la mediana de cada
+    modo.
+
+    Argumentos:
+        argv: (opcional) Lista con los argumentos (por defecto, los del
+              programa).
+    """
+    parser = argparse.ArgumentParser(
+        description=u"Compara la valoración por lotes con distintos "
+        u"intérpretes de Python.")
+    parser.add_argument("interpretes", nargs="*",
+                        help=u"intérpretes a comparar (por defecto, los de "
+                        u"la lista " + u", ".join(_INTERPRETES) +
+                        u" que estén en el PATH)")
+    parser.add_argument("-c", "--caso", default=_CASO_PATH,
+                        help=u"fichero JSON del caso")
+    parser.add_argument("-n", "--solicitantes", type=int, default=20000,
+                        help=u"número de solicitantes del lote")
+    parser.add_argument("-r", "--repeticiones", type=int, default=5,
+                        help=u"número de valoraciones del lote en cada modo")
+    parser.add_argument("--medir", choices=_MODOS, help=argparse.SUPPRESS)
+    parser.add_argument("--datos", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if (args.medir is not None):
+        print(json.dumps({
+            "version": sys.version.split()[0],
+            "implementacion": ("PyPy" if "__pypy__" in sys.builtin_module_names
+                               else "CPython"),
+            "tiempos": medir_valoracion(args.caso, args.datos,
+                                        args.repeticiones, args.medir),
+        }))
+        return
+
+    interpretes = args.interpretes
+    if (len(interpretes) == 0):
+        interpretes = [ruta for ruta in (_buscar_interprete(nombre)
+                                         for nombre in _INTERPRETES)
+                       if ruta is not None]
+    if (len(interpretes) == 0):
+        interpretes = [sys.executable]
+
+    # El mismo intérprete puede estar en el PATH con varios nombres
+    vistos = set()
+    interpretes = [x for x in interpretes
+                   if not (os.path.realpath(x) in vistos or
+                           vistos.add(os.path.realpath(x)))]
+
+    datos_path = guardar_solicitantes(args.caso, args.solicitantes)
+    try:
+        for interprete in interpretes:
+            for modo in _MODOS:
+                try:
+                    medicion = json.loads(subprocess.check_output(
+                        [interprete, os.path.abspath(__file__),
+                         "--medir", modo, "-c", args.caso,
+                         "--datos", datos_path,
+                         "-r", str(args.repeticiones)]).decode().strip())
+                except (OSError, subprocess.CalledProcessError):
+                    print(u"%-24s no se ha podido ejecutar" % interprete,
+                          file=sys.stderr)
+                    break
+
+                tiempos = sorted(medicion["tiempos"])
+                mediana = tiempos[len(tiempos) // 2]
+
+                print(u"%-24s %-8s %-8s %-9s mediana %8.1f ms "
+                      u"(%.0f solicitantes/s)" % (
+                          os.path.basename(interprete),
+                          medicion["implementacion"], medicion["version"],
+                          modo, 1000 * mediana,
+                          args.solicitantes / mediana if mediana > 0 else 0))
+    finally:
+        os.remove(datos_path)
+
+
+if __name__ == "__main__":
+    """
+    Benchmark desde la línea de comandos.
+    """
+    main()
@@ -49,18 +49,40 @@ from PyQt4 import QtGui
 class Valorador():
     """
     Monta todas las piezas del MVC e inicia el programa.
+
+    Argumentos constructor:
+        lazy: (opcional) True para mostrar la ventana principal antes de
+              construir el resto de la interfaz (ver ValoradorView).
     """
 
-    def __init__(self):
+    def __init__(self, lazy=True):
         app = QtGui.QApplication(sys.argv)
 
-        controller = ValoradorController(ValoradorModel(), ValoradorView())
+        controller = Valorador.montar(app, lazy)
 
         sys.exit(app.exec_())
 
+    @staticmethod
+    def montar(app, lazy=True):
+        """
+        Monta el modelo, la vista y el controlador y devuelve el controlador.
+
+        Argumentos:
+            app: QApplication del programa.
+            lazy: (opcional) True para mostrar la ventana principal (y dejar
+                  que se pinte) antes de construir el resto de la interfaz.
+        """
+        view = ValoradorView(lazy)
+
+        if(lazy):
+            view.show()
+            app.processEvents()
+
+        return ValoradorController(ValoradorModel(), view)
+
 
 if __name__ == "__main__":
     """
     Función principal: Inicia el programa.
     """
-    valorador_program = Valorador()
+    valorador_program = Valorador("--no-lazy" not in sys.argv)
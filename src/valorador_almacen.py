@@ -0,0 +1,387 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo con el almacén de valoraciones (base de datos SQLite local).
+
+Guarda los casos (con sus versiones), los valores de cada solicitante y el
+veredicto de cada requisito del primer nivel, con índices por caso, veredicto
+y requisito para poder consultar rápidamente lotes de millones de
+solicitantes.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+from __future__ import print_function
+import sys
+import io
+import json
+import hashlib
+import sqlite3
+import datetime
+import contextlib
+
+# Compatibilidad con Python 3 (donde todos los strings son unicode).
+try:
+    unicode
+except NameError:
+    unicode = str
+
+
+# Esquema de la base de datos.
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS casos (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    definicion TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    UNIQUE (nombre, version)
+);
+
+CREATE TABLE IF NOT EXISTS requisitos (
+    caso_id INTEGER NOT NULL REFERENCES casos (id),
+    indice INTEGER NOT NULL,
+    nombre TEXT NOT NULL,
+    PRIMARY KEY (caso_id, indice)
+);
+
+CREATE TABLE IF NOT EXISTS solicitantes (
+    id INTEGER PRIMARY KEY,
+    caso_id INTEGER NOT NULL REFERENCES casos (id),
+    identificador TEXT NOT NULL,
+    valores TEXT NOT NULL,
+    aprobado INTEGER NOT NULL,
+    n_rechazos INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS veredictos (
+    solicitante_id INTEGER NOT NULL REFERENCES solicitantes (id),
+    caso_id INTEGER NOT NULL,
+    requisito INTEGER NOT NULL,
+    aprobado INTEGER,
+    PRIMARY KEY (solicitante_id, requisito)
+);
+
+CREATE INDEX IF NOT EXISTS solicitantes_caso_veredicto
+    ON solicitantes (caso_id, aprobado, n_rechazos);
+
+CREATE INDEX IF NOT EXISTS solicitantes_caso_identificador
+    ON solicitantes (caso_id, identificador);
+
+CREATE INDEX IF NOT EXISTS veredictos_caso_requisito
+    ON veredictos (caso_id, requisito, aprobado);
+"""
+
+
+class AlmacenValoraciones(object):
+    """
+    Almacén de casos, solicitantes y veredictos en una base de datos SQLite.
+
+    Argumentos constructor:
+        db_path: Ruta hacia el fichero de la base de datos (se crea si no
+                 existe). Con ":memory:" se usa una base de datos en memoria.
+
+    Atributos/Propiedades:
+        db_path: Ruta hacia el fichero de la base de datos.
+    """
+
+    # Número de solicitantes que se insertan en cada transacción.
+    TAM_LOTE = 10000
+
+    def __init__(self, db_path):
+        self._db_path = db_path
+        # Las transacciones se abren a mano (ver _transaccion)
+        self._conexion = sqlite3.connect(db_path, isolation_level=None)
+
+        # Ajustes para acelerar las inserciones masivas sin perder la
+        # consistencia de la base de datos
+        self._conexion.execute("PRAGMA journal_mode = WAL")
+        self._conexion.execute("PRAGMA synchronous = NORMAL")
+        self._conexion.execute("PRAGMA foreign_keys = ON")
+
+        self._conexion.executescript(_ESQUEMA)
+
+    @property
+    def db_path(self):
+        """
+        Getter de la propiedad db_path.
+        """
+        return self._db_path
+
+    def cerrar(self):
+        """
+        Cierra la conexión con la base de datos.
+        """
+        self._conexion.close()
+
+    @contextlib.contextmanager
+    def _transaccion(self):
+        """
+        Contexto que ejecuta sus sentencias en una transacción de escritura:
+        la confirma al salir y la deshace si se produce una excepción.
+
+        Se abre con BEGIN IMMEDIATE para bloquear la base de datos desde el
+        principio, así los valores calculados dentro (identificadores,
+        versiones) no se repiten aunque otra conexión esté guardando a la vez.
+        """
+        self._conexion.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except:
+            self._conexion.execute("ROLLBACK")
+            raise
+        self._conexion.execute("COMMIT")
+
+    def registrar_caso(self, caso, file_path):
+        """
+        Guarda un caso en el almacén y devuelve su identificador.
+
+        Si ya existe una versión del caso (mismo nombre) con la misma
+        definición se reutiliza; si la definición ha cambiado se guarda como
+        una nueva versión.
+
+        Argumentos:
+            caso: Caso (objeto de la clase Caso) ya cargado desde file_path.
+            file_path: Ruta hacia el fichero JSON del caso.
+
+        Excepciones:
+            IOError: Error al abrir el fichero JSON.
+        """
+        try:
+            with io.open(file_path, 'r', encoding='utf-8') as f:
+                definicion = f.read()
+        except:
+            raise IOError(u"Error al abrir el fichero JSON!")
+
+        hash_definicion = hashlib.sha1(definicion.encode('utf-8')).hexdigest()
+
+        with self._transaccion():
+            fila = self._conexion.execute(
+                "SELECT id FROM casos WHERE nombre = ? AND hash = ?",
+                (caso.nombre, hash_definicion)).fetchone()
+
+            if (fila is not None):
+                return fila[0]
+
+            version = self._conexion.execute(
+                "SELECT COALESCE(MAX(version), 0) + 1 FROM casos "
+                "WHERE nombre = ?", (caso.nombre,)).fetchone()[0]
+
+            cursor = self._conexion.execute(
+                "INSERT INTO casos (nombre, version, hash, definicion, fecha) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (caso.nombre, version, hash_definicion, definicion,
+                 datetime.datetime.now().isoformat()))
+            caso_id = cursor.lastrowid
+
+            self._conexion.executemany(
+                "INSERT INTO requisitos (caso_id, indice, nombre) "
+                "VALUES (?, ?, ?)",
+                [(caso_id, i, requisito.nombre)
+                 for i, requisito in enumerate(caso.requisitos_raiz)])
+
+        return caso_id
+
+    def versiones_caso(self, nombre):
+        """
+        Devuelve una lista de tuplas (id, version, fecha) con las versiones
+        guardadas de un caso, de la más antigua a la más reciente.
+
+        Argumentos:
+            nombre: String con el nombre del caso.
+        """
+        return self._conexion.execute(
+            "SELECT id, version, fecha FROM casos WHERE nombre = ? "
+            "ORDER BY version", (nombre,)).fetchall()
+
+    def guardar_valoraciones(self, caso_id, caso, solicitantes,
+                             errores=None):
+        """
+        Valora un lote de solicitantes y guarda sus valores y los veredictos de
+        cada requisito del primer nivel.
+
+        Las inserciones se agrupan en transacciones de TAM_LOTE solicitantes.
+        Los solicitantes con algún valor incorrecto o sin un valor necesario
+        no se guardan (ni interrumpen la carga): se anotan en la lista
+        errores.
+
+        Argumentos:
+            caso_id: Identificador del caso en el almacén (ver registrar_caso).
+            caso: Caso (objeto de la clase Caso) con el que se valora.
+            solicitantes: Iterable de tuplas (identificador, valores), como las
+                          que devuelve valorador_lotes.leer_solicitantes_CSV.
+            errores: Lista (opcional) a la que se añade una tupla
+                     (identificador, motivo) por cada solicitante descartado.
+
+        Devuelve:
+            Número de solicitantes guardados.
+        """
+        filas = []
+        n_guardados = 0
+
+        for identificador, valores in solicitantes:
+            try:
+                caso.asignar_valores(valores)
+                aprobado = caso.valorar(explicar=False)
+                texto_valores = json.dumps(valores)
+            except (TypeError, ValueError, RuntimeError) as e:
+                if (errores is not None):
+                    errores.append((identificador, e.args[0]))
+                continue
+
+            filas.append((unicode(identificador), texto_valores,
+                          int(aprobado), list(caso.resultados)))
+            n_guardados += 1
+
+            if (len(filas) >= self.TAM_LOTE):
+                self._insertar(caso_id, filas)
+                filas = []
+
+        if (filas):
+            self._insertar(caso_id, filas)
+
+        return n_guardados
+
+    def _insertar(self, caso_id, filas):
+        """
+        Inserta un lote de solicitantes y sus veredictos en una sola
+        transacción (los identificadores se reservan dentro de ella).
+
+        Argumentos:
+            caso_id: Identificador del caso en el almacén.
+            filas: Lista de tuplas (identificador, valores, aprobado,
+                   resultados) con cada solicitante ya valorado.
+        """
+        with self._transaccion():
+            siguiente_id = self._conexion.execute(
+                "SELECT COALESCE(MAX(id), 0) + 1 FROM solicitantes"
+            ).fetchone()[0]
+
+            filas_solicitantes = []
+            filas_veredictos = []
+
+            for i, (identificador, valores, aprobado, resultados) in (
+                    enumerate(filas, siguiente_id)):
+                filas_solicitantes.append(
+                    (i, caso_id, identificador, valores, aprobado,
+                     resultados.count(False)))
+                filas_veredictos.extend(
+                    (i, caso_id, j, None if r is None else int(r))
+                    for j, r in enumerate(resultados))
+
+            self._conexion.executemany(
+                "INSERT INTO solicitantes (id, caso_id, identificador, "
+                "valores, aprobado, n_rechazos) VALUES (?, ?, ?, ?, ?, ?)",
+                filas_solicitantes)
+            self._conexion.executemany(
+                "INSERT INTO veredictos (solicitante_id, caso_id, requisito, "
+                "aprobado) VALUES (?, ?, ?, ?)",
+                filas_veredictos)
+
+    def optimizar(self):
+        """
+        Actualiza las estadísticas que usa SQLite para elegir los índices de
+        cada consulta (conviene hacerlo después de cargar lotes grandes).
+        """
+        self._conexion.execute("ANALYZE")
+
+    def indice_requisito(self, caso_id, nombre):
+        """
+        Devuelve la posición de un requisito del primer nivel del caso.
+
+        Argumentos:
+            caso_id: Identificador del caso en el almacén.
+            nombre: String con el nombre del requisito.
+
+        Excepciones:
+            ValueError: El requisito no existe en el caso.
+        """
+        fila = self._conexion.execute(
+            "SELECT indice FROM requisitos WHERE caso_id = ? AND nombre = ?",
+            (caso_id, nombre)).fetchone()
+
+        if (fila is None):
+            raise ValueError(u"El requisito \"" + nombre + u"\" no existe!")
+
+        return fila[0]
+
+    def contar_veredictos(self, caso_id):
+        """
+        Devuelve una tupla (n_solicitantes, n_aprobados) con el número de
+        solicitantes guardados del caso y cuántos de ellos fueron aprobados.
+
+        Argumentos:
+            caso_id: Identificador del caso en el almacén.
+        """
+        return self._conexion.execute(
+            "SELECT COUNT(*), COALESCE(SUM(aprobado), 0) FROM solicitantes "
+            "WHERE caso_id = ?", (caso_id,)).fetchone()
+
+    def contar_rechazos(self, caso_id):
+        """
+        Devuelve una lista con el número de solicitantes del caso rechazados
+        por cada requisito del primer nivel.
+
+        Argumentos:
+            caso_id: Identificador del caso en el almacén.
+        """
+        n_requisitos = self._conexion.execute(
+            "SELECT COUNT(*) FROM requisitos WHERE caso_id = ?",
+            (caso_id,)).fetchone()[0]
+
+        return [self._conexion.execute(
+            "SELECT COUNT(*) FROM veredictos "
+            "WHERE caso_id = ? AND requisito = ? AND aprobado = 0",
+            (caso_id, i)).fetchone()[0] for i in range(n_requisitos)]
+
+    def rechazados_solo_por(self, caso_id, nombre):
+        """
+        Devuelve (generador) el identificador de los solicitantes del caso que
+        han sido rechazados únicamente por el requisito indicado.
+
+        Argumentos:
+            caso_id: Identificador del caso en el almacén.
+            nombre: String con el nombre del requisito del primer nivel.
+
+        Excepciones:
+            ValueError: El requisito no existe en el caso.
+        """
+        indice = self.indice_requisito(caso_id, nombre)
+
+        cursor = self._conexion.execute(
+            "SELECT s.identificador FROM veredictos v "
+            "JOIN solicitantes s ON s.id = v.solicitante_id "
+            "WHERE v.caso_id = ? AND v.requisito = ? AND v.aprobado = 0 "
+            "AND s.n_rechazos = 1", (caso_id, indice))
+
+        for fila in cursor:
+            yield fila[0]
+
+    def valores_solicitante(self, caso_id, identificador):
+        """
+        Devuelve la lista de valores guardados de un solicitante (en el orden
+        de caso.requisitos, preparada para caso.asignar_valores) o None si no
+        existe.
+
+        Argumentos:
+            caso_id: Identificador del caso en el almacén.
+            identificador: Identificador del solicitante.
+        """
+        fila = self._conexion.execute(
+            "SELECT valores FROM solicitantes "
+            "WHERE caso_id = ? AND identificador = ?",
+            (caso_id, unicode(identificador))).fetchone()
+
+        if (fila is None):
+            return None
+
+        return json.loads(fila[0])
+
+
+if __name__ == "__main__":
+    """
+    En caso de que intentemos ejecutar este módulo.
+    """
+    print(u"Este módulo no debería ser ejecutado", file=sys.stderr)
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo con el catálogo de casos.
+
+El catálogo recorre un directorio con ficheros JSON de casos y guarda en un
+índice los datos básicos de cada uno (nombre, descripción, número de
+requisitos y tipos de requisito), de modo que se pueden listar cientos de
+casos sin tener que cargarlos. El índice se guarda junto a los casos y solo se
+vuelven a leer los ficheros que han cambiado desde la última vez.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+from __future__ import print_function
+import sys
+import os
+import io
+import json
+from multiprocessing.pool import ThreadPool
+
+# Compatibilidad con Python 3 (donde todos los strings son unicode).
+try:
+    unicode
+except NameError:
+    unicode = str
+
+
+# Nombre del fichero del índice dentro del directorio de casos.
+NOMBRE_INDICE = u".catalogo.json"
+
+# Versión del formato del índice (si cambia, el índice se regenera entero).
+_VERSION_INDICE = 1
+
+
+def leer_metadatos_caso(file_path):
+    """
+    Lee un fichero JSON de caso y devuelve un diccionario con sus datos
+    básicos: nombre, descripcion, n_requisitos (sin contar los grupos) y tipos
+    (diccionario con el número de requisitos de cada tipo).
+
+    Argumentos:
+        file_path: Ruta hacia el fichero.
+
+    Excepciones:
+        IOError: Error al abrir el fichero o el fichero no tiene el formato
+                 correcto.
+    """
+    try:
+        with io.open(file_path, 'r', encoding='utf-8') as f:
+            parsed_json = json.load(f)
+    except:
+        raise IOError(u"Error al abrir el fichero JSON!")
+
+    tipos = {}
+
+    def contar(requisitos):
+        for requisito in requisitos:
+            tipos[requisito['tipo']] = tipos.get(requisito['tipo'], 0) + 1
+            if (requisito['tipo'] == "Grupo"):
+                contar(requisito['requisitos'])
+
+    try:
+        contar(parsed_json['caso']['requisitos'])
+
+        return {
+            "nombre": parsed_json['caso']['nombre'],
+            "descripcion": parsed_json['caso']['descripcion'],
+            "n_requisitos": sum(n for tipo, n in tipos.items()
+                                if tipo != "Grupo"),
+            "tipos": tipos,
+        }
+    except:
+        raise IOError(u"El fichero JSON no tiene el formato correcto!")
+
+
+class CatalogoCasos(object):
+    """
+    Catálogo de los casos de un directorio.
+
+    Argumentos constructor:
+        directorio: Ruta hacia el directorio con los ficheros JSON de casos.
+        index_path: (opcional) Ruta hacia el fichero del índice. Por defecto
+                    se guarda en el propio directorio.
+
+    Atributos/Propiedades:
+        directorio: Ruta hacia el directorio de casos.
+        index_path: Ruta hacia el fichero del índice.
+        entradas: Lista de diccionarios (uno por fichero, ordenados por nombre
+                  del caso) con las claves fichero, file_path, mtime, tamano,
+                  nombre, descripcion, n_requisitos, tipos y error (mensaje de
+                  error si el fichero no se pudo leer; None en caso
+                  contrario).
+        error_indice: Mensaje de error si no se pudo guardar el índice en la
+                      última actualización (las entradas siguen disponibles
+                      en memoria); None en caso contrario.
+    """
+
+    # Número de hilos que leen los ficheros modificados.
+    N_HILOS = 8
+
+    def __init__(self, directorio, index_path=None):
+        self._directorio = directorio
+
+        if (index_path is None):
+            index_path = os.path.join(directorio, NOMBRE_INDICE)
+
+        self._index_path = index_path
+        self._entradas = self._cargar_indice()
+        self._error_indice = None
+
+    @property
+    def directorio(self):
+        """
+        Getter de la propiedad directorio.
+        """
+        return self._directorio
+
+    @property
+    def index_path(self):
+        """
+        Getter de la propiedad index_path.
+        """
+        return self._index_path
+
+    @property
+    def entradas(self):
+        """
+        Getter de la propiedad entradas.
+        """
+        entradas = []
+
+        for fichero, entrada in self._entradas.items():
+            entrada = dict(entrada)
+            entrada["fichero"] = fichero
+            entrada["file_path"] = os.path.join(self._directorio, fichero)
+            entradas.append(entrada)
+
+        entradas.sort(key=lambda x: (x["nombre"] or u"", x["fichero"]))
+
+        return entradas
+
+    @property
+    def error_indice(self):
+        """
+        Getter de la propiedad error_indice.
+        """
+        return self._error_indice
+
+    def _cargar_indice(self):
+        """
+        Carga el índice guardado (si existe y es válido) y devuelve el
+        diccionario de entradas por nombre de fichero.
+        """
+        try:
+            with io.open(self._index_path, 'r', encoding='utf-8') as f:
+                indice = json.load(f)
+            if (indice.get("version") == _VERSION_INDICE):
+                return indice["entradas"]
+        except:
+            pass
+
+        return {}
+
+    def _guardar_indice(self):
+        """
+        Guarda el índice (primero en un fichero temporal, para no dejar nunca
+        un índice a medio escribir).
+
+        Excepciones:
+            IOError: Error al escribir el índice.
+        """
+        temp_path = self._index_path + u".tmp"
+
+        try:
+            with io.open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(unicode(json.dumps(
+                    {"version": _VERSION_INDICE, "entradas": self._entradas},
+                    ensure_ascii=False, indent=1, sort_keys=True)))
+
+            if (os.name == "nt" and os.path.exists(self._index_path)):
+                os.remove(self._index_path)
+            os.rename(temp_path, self._index_path)
+        except (IOError, OSError):
+            if (os.path.exists(temp_path)):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            raise IOError(u"Error al guardar el índice del catálogo!")
+
+    def actualizar(self):
+        """
+        Recorre el directorio y actualiza el índice: lee (en paralelo) solo los
+        ficheros nuevos o cuya fecha de modificación o tamaño han cambiado y
+        elimina los que ya no existen.
+
+        Si el índice no se puede guardar (por ejemplo, porque el directorio es
+        de solo lectura) las entradas se actualizan igualmente en memoria y el
+        error queda en la propiedad error_indice.
+
+        Devuelve:
+            Número de ficheros que se han tenido que leer.
+
+        Excepciones:
+            OSError: Error al leer el directorio.
+        """
+        ficheros = {}
+
+        for fichero in os.listdir(self._directorio):
+            file_path = os.path.join(self._directorio, fichero)
+            if (fichero.lower().endswith(u".json") and
+                    fichero != NOMBRE_INDICE and os.path.isfile(file_path)):
+                estado = os.stat(file_path)
+                ficheros[fichero] = (estado.st_mtime, estado.st_size)
+
+        modificados = [fichero for fichero, (mtime, tamano) in ficheros.items()
+                       if fichero not in self._entradas or
+                       self._entradas[fichero]["mtime"] != mtime or
+                       self._entradas[fichero]["tamano"] != tamano]
+
+        eliminados = [fichero for fichero in self._entradas
+                      if fichero not in ficheros]
+
+        for fichero in eliminados:
+            del self._entradas[fichero]
+
+        if (modificados):
+            pool = ThreadPool(min(self.N_HILOS, len(modificados)))
+            try:
+                leidos = pool.map(self._leer_entrada, modificados)
+            finally:
+                pool.close()
+                pool.join()
+
+            for fichero, entrada in zip(modificados, leidos):
+                entrada["mtime"], entrada["tamano"] = ficheros[fichero]
+                self._entradas[fichero] = entrada
+
+        # Si el último guardado falló se reintenta aunque no haya cambios
+        if (modificados or eliminados or self._error_indice is not None):
+            try:
+                self._guardar_indice()
+                self._error_indice = None
+            except IOError as e:
+                self._error_indice = e.args[0]
+
+        return len(modificados)
+
+    def _leer_entrada(self, fichero):
+        """
+        Lee los datos básicos de un fichero del directorio y devuelve su
+        entrada del índice (sin fecha de modificación ni tamaño).
+
+        Argumentos:
+            fichero: Nombre del fichero.
+        """
+        try:
+            entrada = leer_metadatos_caso(
+                os.path.join(self._directorio, fichero))
+            entrada["error"] = None
+        except IOError as e:
+            entrada = {"nombre": None, "descripcion": None, "n_requisitos": 0,
+                       "tipos": {},
+                       "error": e.args[0] if e.args else u""}
+
+        return entrada
+
+
+if __name__ == "__main__":
+    """
+    En caso de que intentemos ejecutar este módulo.
+    """
+    print(u"Este módulo no debería ser ejecutado", file=sys.stderr)
@@ -9,9 +9,34 @@ Autor: Andrés Salinas Lima <i52salia@uco.es>.
 
 from __future__ import print_function
 from valorador_view import ValoradorMessageBoxes
+from valorador_view import SolicitantesTableModel
+from valorador_view import ValoradorSolicitantesDialog
+from valorador_catalogo import CatalogoCasos
+from valorador_diario import DiarioSesion
+from valorador_lotes import LoteIndexado
 import sys
+import os
+import time
+from PyQt4 import QtCore
 from PyQt4 import QtGui
 
+# Compatibilidad con Python 3 (donde todos los strings son unicode).
+try:
+    unicode
+except NameError:
+    unicode = str
+
+
+def _error_message(e):
+    """
+    Devuelve el mensaje de una excepción (e.message solo existe en Python 2 y
+    unicode(e) falla en Python 2 si el mensaje tiene caracteres no ASCII).
+
+    Argumentos:
+        e: La excepción.
+    """
+    return e.args[0] if e.args else u""
+
 
 class ValoradorController():
     """
@@ -22,6 +47,15 @@ class ValoradorController():
         view: Objeto de la clase ValoradorView.
     """
 
+    # Milisegundos que se espera tras una modificación del fichero de caso
+    # antes de recargarlo (los editores suelen guardar en varios pasos).
+    _RELOAD_DELAY = 300
+
+    # Ruta del diario de la sesión (para recuperar los valores introducidos si
+    # el programa se cierra de forma inesperada).
+    _JOURNAL_PATH = os.path.join(os.path.expanduser("~"),
+                                 ".valorador_sesion.jsonl")
+
     def __init__(self, model, view):
         self._model = model
         self._view = view
@@ -38,7 +72,25 @@ class ValoradorController():
         """
         Inicializa el modelo.
         """
-        pass
+        # Vigilancia del fichero de caso abierto para recargarlo al modificarse
+        self._file_watcher = QtCore.QFileSystemWatcher()
+
+        self._reload_Timer = QtCore.QTimer()
+        self._reload_Timer.setSingleShot(True)
+        self._reload_Timer.setInterval(self._RELOAD_DELAY)
+
+        # Diario de los valores introducidos en la sesión
+        self._diario = DiarioSesion(self._JOURNAL_PATH)
+
+        # Hilo de la valoración en curso (None si no hay ninguna)
+        self._valoracion_Thread = None
+
+        # Hilos de valoración que siguen en marcha (también los cancelados,
+        # que terminan por su cuenta y no deben destruirse mientras tanto)
+        self._valoracion_Threads = set()
+
+        # Ventana con el lote de solicitantes abierto (None si no hay ninguno)
+        self._solicitantes_Dialog = None
 
     def _init_view(self):
         """
@@ -46,6 +98,7 @@ class ValoradorController():
         """
         self._update_entire_UI()
         self._view.show()
+        self._restore_session()
 
     def _init_controller(self):
         """
@@ -59,15 +112,33 @@ class ValoradorController():
         self._main_widget.valorar_Button.clicked.connect(
             self._valorar_caso)
 
+        self._main_widget.cancelar_Button.clicked.connect(
+            self._cancel_valoracion)
+
         self._main_widget.reset_Button.clicked.connect(
             self._reset_caso)
 
         self._main_window.exit_Action.triggered.connect(
             QtGui.qApp.closeAllWindows)
 
+        QtGui.qApp.aboutToQuit.connect(self._close_session)
+
         self._main_window.open_file_Action.triggered.connect(
             self._load_caso)
 
+        self._main_window.open_catalogo_Action.triggered.connect(
+            self._load_caso_from_catalogo)
+
+        self._main_window.open_solicitantes_Action.triggered.connect(
+            self._open_solicitantes)
+
+        self._main_window.watch_file_Action.toggled.connect(
+            self._watch_caso_file)
+
+        self._file_watcher.fileChanged.connect(self._schedule_reload_caso)
+
+        self._reload_Timer.timeout.connect(self._reload_caso)
+
         self._main_widget.requisitos_List.itemClicked.connect(
             self._update_requisito_fields)
         self._main_widget.requisitos_List.currentItemChanged.connect(
@@ -88,32 +159,355 @@ class ValoradorController():
         file_path = ValoradorMessageBoxes.open_file_dialog(
             self._view.main_window)
 
+        self._load_caso_file(file_path)
+
+    def _load_caso_from_catalogo(self):
+        """
+        Muestra la ventana de diálogo para seleccionar un directorio de casos,
+        actualiza su catálogo y muestra la lista de casos para elegir el caso a
+        abrir.
+        """
+        directory_path = ValoradorMessageBoxes.open_directory_dialog(
+            self._view.main_window)
+
+        if(not directory_path):
+            return
+
+        try:
+            catalogo = CatalogoCasos(directory_path)
+            catalogo.actualizar()
+        except Exception as e:
+            ValoradorMessageBoxes.show_error_message(
+                u"Error al leer el directorio de casos!\n" +
+                (getattr(e, "strerror", None) or _error_message(e)))
+            return
+
+        file_path = ValoradorMessageBoxes.open_catalogo_dialog(
+            self._view.main_window, catalogo.entradas)
+
+        self._load_caso_file(file_path)
+
+    def _load_caso_file(self, file_path):
+        """
+        Abre el fichero de caso indicado (si file_path no está vacío).
+
+        Argumentos:
+            file_path: String con la ruta del fichero.
+        """
         self._model.opened_file_path = ""
 
         if(file_path):
             try:
                 self._caso.load_from_JSON_file(file_path)
                 self._model.opened_file_path = file_path
+                self._diario.iniciar(file_path)
+                self._watch_caso_file()
                 self._update_entire_UI()
                 ValoradorMessageBoxes.show_info_message(
                     u"Archivo cargado con éxito!")
             except Exception as e:
                 self._update_entire_UI()
-                ValoradorMessageBoxes.show_error_message(e.message)
+                ValoradorMessageBoxes.show_error_message(_error_message(e))
                 return
 
-    def _valorar_caso(self):
+    def _open_solicitantes(self):
         """
-        Ejecuta la valoración de los requisitos del caso.
+        Muestra la ventana de diálogo para seleccionar un fichero CSV de
+        solicitantes y abre una ventana con la tabla de solicitantes y su
+        valoración con (una copia de) el caso abierto.
         """
+        if(len(self._caso.requisitos_raiz) == 0):
+            ValoradorMessageBoxes.show_error_message(
+                u"Debe abrir un caso antes de abrir un lote de solicitantes!")
+            return
+
+        file_path = ValoradorMessageBoxes.open_file_dialog(
+            self._view.main_window, u"CSV (*.csv)")
+
+        if(not file_path):
+            return
+
         try:
-            valoracion_result = self._caso.valorar()
-            self._update_valoracion_fields(valoracion_result)
+            lote = LoteIndexado(file_path, self._caso)
         except Exception as e:
-            self._clean_valoracion_fields()
-            ValoradorMessageBoxes.show_error_message(e.message)
+            ValoradorMessageBoxes.show_error_message(
+                u"Error al abrir el fichero de solicitantes!")
             return
 
+        self._close_solicitantes()
+
+        dialog = ValoradorSolicitantesDialog(
+            SolicitantesTableModel(lote), self._main_window)
+        dialog.setWindowTitle(u"Solicitantes - " + file_path)
+
+        dialog.filtro_ComboBox.currentIndexChanged.connect(
+            self._filter_solicitantes)
+        dialog.solicitantes_Table.clicked.connect(
+            self._show_explicacion_solicitante)
+        dialog.finished.connect(self._close_solicitantes)
+
+        self._solicitantes_Dialog = dialog
+        dialog.show()
+
+    def _close_solicitantes(self, result=None):
+        """
+        Cierra la ventana del lote de solicitantes abierto (si la hay) y su
+        fichero.
+
+        Argumentos:
+            result: (opcional) Código de salida del diálogo (no se usa).
+        """
+        dialog = self._solicitantes_Dialog
+        self._solicitantes_Dialog = None
+
+        if(dialog is not None):
+            dialog.table_Model.lote.cerrar()
+            dialog.close()
+
+    def _filter_solicitantes(self, index):
+        """
+        Muestra en la tabla de solicitantes todos los solicitantes o solo los
+        aprobados o rechazados.
+
+        Argumentos:
+            index: Posición del filtro seleccionado.
+        """
+        dialog = self._solicitantes_Dialog
+        dialog.proxy_Model.setFilterRegExp(dialog.FILTROS[index][1])
+
+    def _show_explicacion_solicitante(self, index):
+        """
+        Muestra la explicación de la valoración del solicitante seleccionado
+        en la tabla de solicitantes.
+
+        Argumentos:
+            index: QModelIndex de la celda seleccionada.
+        """
+        dialog = self._solicitantes_Dialog
+        row = dialog.proxy_Model.mapToSource(index).row()
+
+        dialog.explicacion_TextEdit.setPlainText(
+            dialog.table_Model.lote.explicar(row))
+
+    def _watch_caso_file(self):
+        """
+        Vigila el fichero del caso abierto (si la recarga automática está
+        activada) y deja de vigilar cualquier otro fichero.
+        """
+        watched_files = self._file_watcher.files()
+        if(len(watched_files) > 0):
+            self._file_watcher.removePaths(watched_files)
+
+        if(self._model.opened_file_path and
+                self._main_window.watch_file_Action.isChecked() and
+                os.path.exists(self._model.opened_file_path)):
+            self._file_watcher.addPath(self._model.opened_file_path)
+
+    def _restore_session(self):
+        """
+        Si el diario contiene una sesión anterior (el programa no se cerró de
+        forma normal), pregunta al usuario si desea recuperarla y, en ese caso,
+        abre su caso y restaura los valores introducidos.
+        """
+        session = DiarioSesion.recuperar(self._JOURNAL_PATH)
+
+        if(session is None or len(session[1]) == 0):
+            return
+
+        file_path, valores = session
+
+        confirmation = ValoradorMessageBoxes.confirm_operation_message(
+            u"El programa no se cerró correctamente en la última sesión." +
+            u"\n¿Desea recuperar los valores introducidos en el caso " +
+            file_path + u"?")
+
+        if(not confirmation):
+            return
+
+        try:
+            self._caso.load_from_JSON_file(file_path)
+        except Exception as e:
+            self._update_entire_UI()
+            ValoradorMessageBoxes.show_error_message(_error_message(e))
+            return
+
+        for index, (nombre, valor) in valores.items():
+            if(index < len(self._caso.requisitos) and
+                    self._caso.requisitos[index].nombre == nombre):
+                try:
+                    self._caso.requisitos[index].valor = valor
+                except Exception as e:
+                    pass
+
+        self._model.opened_file_path = file_path
+        self._diario.iniciar(file_path, self._get_valores_requisitos())
+        self._watch_caso_file()
+        self._update_entire_UI()
+
+    def _close_session(self):
+        """
+        Termina de escribir el diario de la sesión y lo borra (el programa se
+        cierra de forma normal).
+        """
+        self._cancel_valoracion()
+        for thread in list(self._valoracion_Threads):
+            self._release_valoracion_thread(thread)
+        self._close_solicitantes()
+        self._diario.cerrar(borrar=True)
+
+    def _get_valores_requisitos(self):
+        """
+        Devuelve un diccionario {indice: (nombre, valor)} con los requisitos
+        del caso que tienen valor asignado (sin contar los calculados).
+        """
+        return dict((index, (requisito.nombre, requisito.valor))
+                    for index, requisito in enumerate(self._caso.requisitos)
+                    if requisito.tipo != "Expresion" and
+                    requisito.valor is not None)
+
+    def _schedule_reload_caso(self, file_path):
+        """
+        Programa la recarga del caso abierto (o la retrasa si ya estaba
+        programada) tras modificarse su fichero.
+
+        Argumentos:
+            file_path: Ruta del fichero modificado.
+        """
+        self._reload_Timer.start()
+
+    def _reload_caso(self):
+        """
+        Recarga el caso abierto tras modificarse su fichero, conservando el
+        valor de los requisitos que no han cambiado y actualizando solo las
+        filas afectadas de la lista de requisitos.
+        """
+        # Algunos editores guardan reemplazando el fichero, por lo que hay
+        # que volver a vigilarlo
+        self._watch_caso_file()
+
+        if(not self._main_window.watch_file_Action.isChecked() or
+                not self._model.opened_file_path or
+                not os.path.exists(self._model.opened_file_path)):
+            return
+
+        try:
+            modified_rows = self._caso.reload_from_JSON_file(
+                self._model.opened_file_path)
+        except Exception as e:
+            self._main_window.statusBar().showMessage(
+                u"No se ha podido recargar el caso: " + _error_message(e))
+            return
+
+        self._diario.iniciar(self._model.opened_file_path,
+                             self._get_valores_requisitos())
+
+        self._update_requisitos_list_rows(modified_rows)
+        self._update_caso_fields()
+        self._update_requisito_fields()
+        self._clean_valoracion_fields()
+
+        self._main_window.statusBar().showMessage(u"Caso recargado")
+
+    def _valorar_caso(self):
+        """
+        Ejecuta la valoración de los requisitos del caso en un hilo aparte (el
+        resultado se muestra en cuanto se conoce y la explicación a medida que
+        se genera).
+        """
+        self._clean_valoracion_fields()
+
+        thread = ValoracionThread(self._caso)
+        thread.veredicto.connect(self._show_veredicto)
+        thread.explicacion.connect(self._append_explicacion)
+        thread.error.connect(self._show_valoracion_error)
+        thread.terminado.connect(self._end_valoracion)
+        thread.finished.connect(
+            lambda: self._release_valoracion_thread(thread))
+
+        self._valoracion_Threads.add(thread)
+        self._valoracion_Thread = thread
+
+        self._main_widget.valorar_Button.setEnabled(False)
+        self._main_widget.cancelar_Button.setEnabled(True)
+        self._main_window.statusBar().showMessage(u"Valorando...")
+
+        self._valoracion_Thread.start()
+
+    def _cancel_valoracion(self):
+        """
+        Cancela la valoración en curso (si la hay) sin esperar a que su hilo
+        termine: las señales que envíe después se descartan.
+        """
+        if(self._valoracion_Thread is not None):
+            self._valoracion_Thread.cancelar()
+            self._valoracion_Thread = None
+            self._main_window.statusBar().showMessage(
+                u"Valoración cancelada")
+
+        self._main_widget.valorar_Button.setEnabled(True)
+        self._main_widget.cancelar_Button.setEnabled(False)
+
+    def _show_veredicto(self, thread, valoracion_result):
+        """
+        Muestra el resultado de la valoración en curso.
+
+        Argumentos:
+            thread: Hilo que ha enviado el resultado.
+            valoracion_result: Resultado de la valoración.
+        """
+        if(thread is self._valoracion_Thread):
+            self._update_valoracion_fields(valoracion_result)
+
+    def _append_explicacion(self, thread, fragmento):
+        """
+        Añade un fragmento a la explicación de la valoración en curso.
+
+        Argumentos:
+            thread: Hilo que ha enviado el fragmento.
+            fragmento: String con el fragmento de la explicación.
+        """
+        if(thread is self._valoracion_Thread):
+            TextEdit = self._main_widget.explicacion_TextEdit
+            TextEdit.moveCursor(QtGui.QTextCursor.End)
+            TextEdit.insertPlainText(fragmento)
+
+    def _show_valoracion_error(self, thread, message):
+        """
+        Muestra el error que ha interrumpido la valoración en curso.
+
+        Argumentos:
+            thread: Hilo que ha enviado el error.
+            message: String con el mensaje de error.
+        """
+        if(thread is self._valoracion_Thread):
+            self._end_valoracion(thread)
+            self._clean_valoracion_fields()
+            ValoradorMessageBoxes.show_error_message(message)
+
+    def _end_valoracion(self, thread):
+        """
+        Restablece los botones al terminar la valoración en curso.
+
+        Argumentos:
+            thread: Hilo que ha terminado.
+        """
+        if(thread is self._valoracion_Thread):
+            self._valoracion_Thread = None
+            self._main_widget.valorar_Button.setEnabled(True)
+            self._main_widget.cancelar_Button.setEnabled(False)
+            self._main_window.statusBar().clearMessage()
+
+    def _release_valoracion_thread(self, thread):
+        """
+        Espera a que termine un hilo de valoración (ya terminado o cancelado)
+        y lo libera.
+
+        Argumentos:
+            thread: Hilo de valoración.
+        """
+        thread.wait()
+        self._valoracion_Threads.discard(thread)
+
     def _reset_caso(self):
         """
         Reinicializa los valores de los requisitos y el resultado de la
@@ -125,6 +519,7 @@ class ValoradorController():
 
         if (confirmation):
             self._caso.reset()
+            self._diario.registrar_reset()
             self._update_requisito_fields()
             self._clean_valoracion_fields()
 
@@ -137,6 +532,10 @@ class ValoradorController():
         selected_item_index = QList.indexFromItem(selected_items[0]).row()
         selected_requisito = self._caso.requisitos[selected_item_index]
 
+        # El valor de los requisitos del tipo Expresion se calcula solo
+        if(selected_requisito.tipo == "Expresion"):
+            return
+
         if(selected_requisito.tipo == "Booleano"):
             try:
                 valor = self._main_widget.valor_ComboBox.currentText()
@@ -148,24 +547,30 @@ class ValoradorController():
                     valor = None
                 selected_requisito.valor = valor
             except Exception as e:
-                ValoradorMessageBoxes.show_error_message(e.message)
+                ValoradorMessageBoxes.show_error_message(_error_message(e))
                 self._update_requisito_fields()
                 return
         else:
             try:
-                valor = float(self._main_widget.valor_LineEdit.text())
+                valor = selected_requisito.convertir_texto(
+                    unicode(self._main_widget.valor_LineEdit.text()).strip())
             except Exception as e:
                 ValoradorMessageBoxes.show_error_message(
-                    u"Debe introducir un número!")
+                    u"Debe introducir " + selected_requisito.VALOR_ESPERADO +
+                    u"!")
                 self._update_requisito_fields()
                 return
             try:
                 selected_requisito.valor = valor
             except Exception as e:
-                ValoradorMessageBoxes.show_error_message(e.message)
+                ValoradorMessageBoxes.show_error_message(_error_message(e))
                 self._update_requisito_fields()
                 return
 
+        self._diario.registrar_valor(selected_item_index,
+                                     selected_requisito.nombre,
+                                     selected_requisito.valor)
+
         self._update_requisito_fields()
         self._clean_valoracion_fields()
 
@@ -196,6 +601,27 @@ class ValoradorController():
         for requisito in self._caso.requisitos:
             self._main_widget.requisitos_List.addItem(requisito.nombre)
 
+    def _update_requisitos_list_rows(self, rows):
+        """
+        Actualiza solo las filas indicadas de la lista de requisitos de la
+        interfaz (añadiendo o quitando filas al final si el número de
+        requisitos ha cambiado).
+
+        Argumentos:
+            rows: Lista con la posición de las filas a actualizar.
+        """
+        QList = self._main_widget.requisitos_List
+        n_requisitos = len(self._caso.requisitos)
+
+        while(QList.count() > n_requisitos):
+            QList.takeItem(QList.count() - 1)
+
+        while(QList.count() < n_requisitos):
+            QList.addItem(self._caso.requisitos[QList.count()].nombre)
+
+        for row in rows:
+            QList.item(row).setText(self._caso.requisitos[row].nombre)
+
     def _update_requisito_fields(self):
         """
         Actualiza la vista con la descripción y el valor del requisito
@@ -226,8 +652,11 @@ class ValoradorController():
                 self._main_widget.valor_LineEdit.setVisible(True)
                 self._main_widget.valor_ComboBox.setVisible(False)
 
+                self._main_widget.valor_LineEdit.setReadOnly(
+                    selected_requisito.tipo == "Expresion")
+
                 self._main_widget.valor_LineEdit.setText(
-                    str(selected_requisito.valor)
+                    unicode(selected_requisito.valor)
                 )
         else:
             self._main_widget.desc_requisito_TextEdit.setText("")
@@ -235,29 +664,118 @@ class ValoradorController():
             self._main_widget.valor_LineEdit.setVisible(True)
             self._main_widget.valor_ComboBox.setVisible(False)
 
+            self._main_widget.valor_LineEdit.setReadOnly(False)
             self._main_widget.valor_LineEdit.setText("")
 
     def _update_valoracion_fields(self, valoracion_result):
         """
-        Actualiza los campos de la interfaz con el resultado y la explicación
-        de la valoración del caso.
+        Actualiza el campo de la interfaz con el resultado de la valoración
+        del caso (la explicación se va añadiendo a medida que se genera).
         """
         if(valoracion_result == True):
             self._main_widget.valoracion_LineEdit.setText("APROBADO")
         else:
             self._main_widget.valoracion_LineEdit.setText("RECHAZADO")
 
-        self._main_widget.explicacion_TextEdit.setText(self._caso.explicacion)
-
     def _clean_valoracion_fields(self):
         """
-        Limpia los campos valoración y explicación de la vista.
+        Limpia los campos valoración y explicación de la vista (cancelando la
+        valoración en curso, que ya no sería válida).
         """
+        self._cancel_valoracion()
+
         self._main_widget.valoracion_LineEdit.setText("")
 
         self._main_widget.explicacion_TextEdit.setText("")
 
 
+class ValoracionThread(QtCore.QThread):
+    """
+    Hilo que valora el caso y genera su explicación sin bloquear la interfaz.
+
+    El resultado se envía en cuanto se conoce y la explicación se envía
+    después en fragmentos, a medida que se genera. Todas las señales incluyen
+    el propio hilo como primer argumento, para poder descartar las de un hilo
+    cancelado.
+
+    Argumentos constructor:
+        caso: Caso (objeto de la clase Caso) a valorar. Se valora su
+              definición con un registro de los valores actuales (ver
+              Caso.solicitante_actual), así que el caso se puede seguir
+              modificando mientras tanto.
+
+    Señales:
+        veredicto: (hilo, resultado) Resultado de la valoración.
+        explicacion: (hilo, texto) Siguiente fragmento de la explicación.
+        error: (hilo, mensaje) Error durante la valoración.
+        terminado: (hilo,) La valoración ha terminado sin ser cancelada.
+    """
+
+    veredicto = QtCore.pyqtSignal(object, object)
+    explicacion = QtCore.pyqtSignal(object, object)
+    error = QtCore.pyqtSignal(object, object)
+    terminado = QtCore.pyqtSignal(object)
+
+    # Segundos entre dos envíos de fragmentos de la explicación (enviar cada
+    # fragmento por separado saturaría el bucle de eventos).
+    _INTERVALO_ENVIO = 0.05
+
+    def __init__(self, caso):
+        super(ValoracionThread, self).__init__()
+
+        self._solicitante = caso.solicitante_actual()
+        self._cancelado = False
+
+    def cancelar(self):
+        """
+        Pide al hilo que termine lo antes posible (sin enviar más señales),
+        sin esperar a que lo haga: la valoración se interrumpe antes de
+        evaluar el siguiente requisito.
+        """
+        self._cancelado = True
+        self._solicitante.cancelar()
+
+    def run(self):
+        """
+        Valora el caso y genera su explicación (se ejecuta en el hilo).
+        """
+        try:
+            valoracion_result = self._solicitante.definicion.valorar(
+                self._solicitante, explicar=False)
+        except Exception as e:
+            if(not self._cancelado):
+                self.error.emit(self, _error_message(e))
+            return
+
+        if(self._cancelado):
+            return
+
+        self.veredicto.emit(self, valoracion_result)
+
+        pendientes = []
+        ultimo_envio = time.time()
+
+        for fragmento in self._solicitante.definicion.generar_explicacion(
+                self._solicitante):
+            if(self._cancelado):
+                return
+
+            pendientes.append(fragmento)
+
+            if(time.time() - ultimo_envio >= self._INTERVALO_ENVIO):
+                self.explicacion.emit(self, u"".join(pendientes))
+                pendientes = []
+                ultimo_envio = time.time()
+
+        if(self._cancelado):
+            return
+
+        if(pendientes):
+            self.explicacion.emit(self, u"".join(pendientes))
+
+        self.terminado.emit(self)
+
+
 if __name__ == "__main__":
     """
     En caso de que intentemos ejecutar este módulo.
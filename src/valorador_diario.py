@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo con el diario de la sesión.
+
+El diario es un fichero de solo añadir (una línea JSON por registro) en el que
+se apunta cada valor introducido en los requisitos del caso abierto, de modo
+que si el programa se cierra de forma inesperada se puede recuperar la sesión.
+
+Las escrituras se hacen en un hilo aparte (agrupando los registros pendientes y
+forzando su escritura en disco) para no bloquear la interfaz, y el diario se
+compacta periódicamente para que recuperarlo sea siempre rápido.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+from __future__ import print_function
+import sys
+import os
+import io
+import json
+import threading
+
+# Compatibilidad con Python 3 (donde todos los strings son unicode).
+try:
+    unicode
+except NameError:
+    unicode = str
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+# Marca que indica al hilo escritor que debe terminar.
+_FIN = object()
+
+
+class DiarioSesion(object):
+    """
+    Diario de los valores introducidos en la sesión.
+
+    Argumentos constructor:
+        journal_path: Ruta hacia el fichero del diario.
+
+    Atributos/Propiedades:
+        journal_path: Ruta hacia el fichero del diario.
+    """
+
+    # Número de registros a partir del cual se compacta el diario.
+    MAX_REGISTROS = 1000
+
+    def __init__(self, journal_path):
+        self._journal_path = journal_path
+        self._cola = queue.Queue()
+        self._hilo = None
+
+    @property
+    def journal_path(self):
+        """
+        Getter de la propiedad journal_path.
+        """
+        return self._journal_path
+
+    def iniciar(self, caso_file_path, valores=None):
+        """
+        Empieza un diario nuevo para el caso indicado (descarta el anterior).
+
+        Argumentos:
+            caso_file_path: Ruta hacia el fichero del caso abierto.
+            valores: (opcional) Diccionario {indice: (nombre, valor)} con los
+                     valores que ya tienen los requisitos.
+        """
+        self._arrancar()
+        self._cola.put(("iniciar", caso_file_path, dict(valores or {})))
+
+    def registrar_valor(self, indice, nombre, valor):
+        """
+        Apunta el valor introducido en un requisito (sin esperar a que se
+        escriba en disco).
+
+        Argumentos:
+            indice: Posición del requisito en la lista requisitos del caso.
+            nombre: String con el nombre del requisito.
+            valor: Valor del requisito.
+        """
+        self._cola.put(("valor", indice, nombre, valor))
+
+    def registrar_reset(self):
+        """
+        Apunta que se han reinicializado todos los valores del caso.
+        """
+        self._cola.put(("reset",))
+
+    def cerrar(self, borrar=False):
+        """
+        Escribe los registros pendientes y detiene el hilo escritor.
+
+        Argumentos:
+            borrar: (opcional) True para borrar además el diario (por ejemplo,
+                    al salir del programa de forma normal).
+        """
+        if (self._hilo is not None):
+            self._cola.put(_FIN)
+            self._hilo.join()
+            self._hilo = None
+
+        if (borrar and os.path.exists(self._journal_path)):
+            os.remove(self._journal_path)
+
+    def _arrancar(self):
+        """
+        Arranca el hilo escritor si no está ya en marcha.
+        """
+        if (self._hilo is None):
+            self._hilo = threading.Thread(target=self._escribir)
+            self._hilo.daemon = True
+            self._hilo.start()
+
+    def _escribir(self):
+        """
+        Bucle del hilo escritor: espera registros, escribe de una vez todos los
+        que haya pendientes y fuerza su escritura en disco.
+        """
+        f = None
+        caso_file_path = None
+        estado = {}
+        n_registros = 0
+
+        try:
+            while True:
+                pendientes = [self._cola.get()]
+                while True:
+                    try:
+                        pendientes.append(self._cola.get_nowait())
+                    except queue.Empty:
+                        break
+
+                lineas = []
+                terminar = False
+
+                for registro in pendientes:
+                    if (registro is _FIN):
+                        terminar = True
+                        break
+
+                    if (registro[0] == "iniciar"):
+                        # Las líneas pendientes eran del diario anterior
+                        lineas = []
+                        caso_file_path, estado = registro[1], registro[2]
+                        if (f is not None):
+                            f.close()
+                        f = self._reescribir(caso_file_path, estado)
+                        n_registros = len(estado)
+                    elif (f is None):
+                        continue
+                    elif (registro[0] == "valor"):
+                        _, indice, nombre, valor = registro
+                        estado[indice] = (nombre, valor)
+                        lineas.append({"i": indice, "n": nombre, "v": valor})
+                    elif (registro[0] == "reset"):
+                        estado = {}
+                        lineas.append({"reset": True})
+
+                if (f is not None and lineas):
+                    n_registros += len(lineas)
+
+                    if (n_registros > self.MAX_REGISTROS):
+                        f.close()
+                        f = self._reescribir(caso_file_path, estado)
+                        n_registros = len(estado)
+                    else:
+                        for linea in lineas:
+                            f.write(unicode(json.dumps(linea)) + u"\n")
+                        self._sincronizar(f)
+
+                if (terminar):
+                    break
+        finally:
+            if (f is not None):
+                f.close()
+
+    def _reescribir(self, caso_file_path, estado):
+        """
+        Escribe un diario compacto (la cabecera y el último valor de cada
+        requisito) sustituyendo de forma atómica al anterior y lo devuelve
+        abierto para seguir añadiendo registros.
+
+        Argumentos:
+            caso_file_path: Ruta hacia el fichero del caso.
+            estado: Diccionario {indice: (nombre, valor)}.
+        """
+        temp_path = self._journal_path + u".tmp"
+
+        with io.open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(unicode(json.dumps({"caso": caso_file_path})) + u"\n")
+            for indice, (nombre, valor) in sorted(estado.items()):
+                f.write(unicode(json.dumps(
+                    {"i": indice, "n": nombre, "v": valor})) + u"\n")
+            self._sincronizar(f)
+
+        if (os.name == "nt" and os.path.exists(self._journal_path)):
+            os.remove(self._journal_path)
+        os.rename(temp_path, self._journal_path)
+
+        return io.open(self._journal_path, 'a', encoding='utf-8')
+
+    @staticmethod
+    def _sincronizar(f):
+        """
+        Fuerza la escritura en disco de un fichero abierto.
+
+        Argumentos:
+            f: Fichero abierto para escritura.
+        """
+        f.flush()
+        os.fsync(f.fileno())
+
+    @staticmethod
+    def recuperar(journal_path):
+        """
+        Lee un diario y devuelve el estado de la sesión que contiene.
+
+        Los registros incompletos (por ejemplo, la última línea si el programa
+        se cerró mientras se escribía) se ignoran.
+
+        Argumentos:
+            journal_path: Ruta hacia el fichero del diario.
+
+        Devuelve:
+            Tupla (caso_file_path, valores), donde valores es un diccionario
+            {indice: (nombre, valor)}, o None si no hay ninguna sesión que
+            recuperar.
+        """
+        try:
+            with io.open(journal_path, 'r', encoding='utf-8') as f:
+                lineas = f.readlines()
+        except (IOError, OSError):
+            return None
+
+        caso_file_path = None
+        valores = {}
+
+        for linea in lineas:
+            try:
+                registro = json.loads(linea)
+            except ValueError:
+                continue
+
+            if ("caso" in registro):
+                caso_file_path = registro["caso"]
+                valores = {}
+            elif ("reset" in registro):
+                valores = {}
+            elif ("i" in registro):
+                valores[registro["i"]] = (registro["n"], registro["v"])
+
+        if (caso_file_path is None):
+            return None
+
+        return (caso_file_path, valores)
+
+
+if __name__ == "__main__":
+    """
+    En caso de que intentemos ejecutar este módulo.
+    """
+    print(u"Este módulo no debería ser ejecutado", file=sys.stderr)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo con el compilador de expresiones de los requisitos del tipo Expresion.
+
+Las expresiones se analizan una única vez (al cargar el caso) y se traducen a
+un árbol de funciones (closures) que se puede evaluar tantas veces como se
+quiera sin volver a interpretar el texto. Solo se admite un subconjunto seguro
+de Python: números, variables, operaciones aritméticas, comparaciones,
+operadores lógicos y las funciones min, max, abs y round.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+from __future__ import print_function
+import sys
+import ast
+import operator
+
+
+# Operadores binarios permitidos.
+_OPERADORES_BINARIOS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Mod: operator.mod,
+}
+
+# Operadores unarios permitidos.
+_OPERADORES_UNARIOS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+    ast.Not: operator.not_,
+}
+
+# Operadores de comparación permitidos.
+_COMPARADORES = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+# Funciones que se pueden llamar desde una expresión.
+_FUNCIONES = {
+    "min": min,
+    "max": max,
+    "abs": abs,
+    "round": round,
+}
+
+# Constantes con nombre (en Python 2 True y False son nodos Name).
+_CONSTANTES = {
+    "True": True,
+    "False": False,
+}
+
+
+class Expresion(object):
+    """
+    Expresión compilada a partir de su texto.
+
+    Argumentos constructor:
+        texto: String con la expresión (por ejemplo "nota / 10 + carga").
+        variables: Lista con los nombres de las variables que puede usar la
+                   expresión. Al evaluarla, los valores se pasan en este mismo
+                   orden.
+
+    Excepciones constructor:
+        ValueError: La expresión no es válida o usa construcciones no
+                    permitidas.
+
+    Atributos/Propiedades:
+        texto: String con la expresión.
+        variables: Tupla con los nombres de las variables.
+        coste: Número de nodos de la expresión (estimación del coste de
+               evaluarla).
+        evaluar: Función que recibe la secuencia de valores de las variables y
+                 devuelve el resultado de la expresión.
+    """
+
+    def __init__(self, texto, variables):
+        self._texto = texto
+        self._variables = tuple(variables)
+        self._coste = 0
+
+        try:
+            arbol = ast.parse(texto.strip(), mode="eval")
+        except SyntaxError:
+            raise ValueError(u"La expresión \"" + texto + u"\" no es válida!")
+
+        indices = dict((nombre, i) for i, nombre in enumerate(self._variables))
+        self.evaluar = self._compilar(arbol.body, indices)
+
+    @property
+    def texto(self):
+        """
+        Getter de la propiedad texto.
+        """
+        return self._texto
+
+    @property
+    def variables(self):
+        """
+        Getter de la propiedad variables.
+        """
+        return self._variables
+
+    @property
+    def coste(self):
+        """
+        Getter de la propiedad coste.
+        """
+        return self._coste
+
+    def _compilar(self, nodo, indices):
+        """
+        Traduce recursivamente un nodo del árbol sintáctico a una función que
+        recibe la secuencia de valores de las variables.
+
+        Argumentos:
+            nodo: Nodo del árbol sintáctico (módulo ast).
+            indices: Diccionario que asocia cada variable con su posición.
+
+        Excepciones:
+            ValueError: El nodo no está permitido.
+        """
+        self._coste += 1
+
+        constante = self._valor_constante(nodo)
+        if (constante is not None):
+            return lambda valores: constante
+
+        if (isinstance(nodo, ast.Name)):
+            if (nodo.id in _CONSTANTES):
+                valor = _CONSTANTES[nodo.id]
+                return lambda valores: valor
+            if (nodo.id not in indices):
+                raise ValueError(u"La variable \"" + nodo.id +
+                                 u"\" no está definida en la expresión \"" +
+                                 self._texto + u"\"!")
+            i = indices[nodo.id]
+            return lambda valores: valores[i]
+
+        if (isinstance(nodo, ast.BinOp) and
+                type(nodo.op) in _OPERADORES_BINARIOS):
+            op = _OPERADORES_BINARIOS[type(nodo.op)]
+            izq = self._compilar(nodo.left, indices)
+            der = self._compilar(nodo.right, indices)
+            return lambda valores: op(izq(valores), der(valores))
+
+        if (isinstance(nodo, ast.UnaryOp) and
+                type(nodo.op) in _OPERADORES_UNARIOS):
+            op = _OPERADORES_UNARIOS[type(nodo.op)]
+            operando = self._compilar(nodo.operand, indices)
+            return lambda valores: op(operando(valores))
+
+        if (isinstance(nodo, ast.BoolOp)):
+            operandos = [self._compilar(x, indices) for x in nodo.values]
+            if (isinstance(nodo.op, ast.And)):
+                return lambda valores: all(f(valores) for f in operandos)
+            return lambda valores: any(f(valores) for f in operandos)
+
+        if (isinstance(nodo, ast.Compare)):
+            izq = self._compilar(nodo.left, indices)
+            pasos = []
+            for op, comparado in zip(nodo.ops, nodo.comparators):
+                if (type(op) not in _COMPARADORES):
+                    break
+                pasos.append((_COMPARADORES[type(op)],
+                              self._compilar(comparado, indices)))
+            else:
+                return lambda valores: self._comparar(izq, pasos, valores)
+
+        if (isinstance(nodo, ast.Call) and isinstance(nodo.func, ast.Name) and
+                nodo.func.id in _FUNCIONES and not nodo.keywords and
+                not getattr(nodo, "starargs", None) and
+                not getattr(nodo, "kwargs", None)):
+            funcion = _FUNCIONES[nodo.func.id]
+            argumentos = [self._compilar(x, indices) for x in nodo.args]
+            return lambda valores: funcion(*[f(valores) for f in argumentos])
+
+        raise ValueError(u"La expresión \"" + self._texto +
+                         u"\" contiene elementos no permitidos!")
+
+    @staticmethod
+    def _valor_constante(nodo):
+        """
+        Devuelve el valor del nodo si es una constante numérica o booleana y
+        None en caso contrario.
+
+        Argumentos:
+            nodo: Nodo del árbol sintáctico (módulo ast).
+        """
+        if (isinstance(nodo, getattr(ast, "Constant", ()))):
+            valor = nodo.value
+        elif (isinstance(nodo, getattr(ast, "Num", ()))):
+            valor = nodo.n
+        elif (isinstance(nodo, getattr(ast, "NameConstant", ()))):
+            valor = nodo.value
+        else:
+            return None
+
+        if (isinstance(valor, (bool, int, float)) or
+                type(valor).__name__ == "long"):
+            return valor
+
+        return None
+
+    @staticmethod
+    def _comparar(izq, pasos, valores):
+        """
+        Evalúa una cadena de comparaciones (por ejemplo "a < b <= c").
+
+        Argumentos:
+            izq: Función del operando izquierdo.
+            pasos: Lista de tuplas (operador, función del operando derecho).
+            valores: Secuencia de valores de las variables.
+        """
+        actual = izq(valores)
+
+        for op, der in pasos:
+            siguiente = der(valores)
+            if (not op(actual, siguiente)):
+                return False
+            actual = siguiente
+
+        return True
+
+
+if __name__ == "__main__":
+    """
+    En caso de que intentemos ejecutar este módulo.
+    """
+    print(u"Este módulo no debería ser ejecutado", file=sys.stderr)
@@ -0,0 +1,1671 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo con las utilidades para valorar lotes de solicitantes.
+
+Los solicitantes se leen de un fichero CSV cuya cabecera contiene el nombre de
+los requisitos del caso (en cualquier orden) y, opcionalmente, una columna "id"
+con el identificador de cada solicitante.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+from __future__ import print_function
+from valorador_model import Caso
+import sys
+import os
+import io
+import csv
+import gzip
+import bz2
+import codecs
+import heapq
+import collections
+import argparse
+import hashlib
+import json
+from array import array
+
+# Compatibilidad con Python 3 (donde todos los strings son unicode).
+try:
+    unicode
+except NameError:
+    unicode = str
+
+
+# Nombre de la columna opcional con el identificador del solicitante.
+COLUMNA_ID = u"id"
+
+
+def leer_filas_CSV(file_path):
+    """
+    Lee un fichero CSV codificado en UTF-8 y devuelve (generador) sus filas
+    como listas de strings unicode.
+
+    Argumentos:
+        file_path: Ruta hacia el fichero.
+    """
+    if (sys.version_info[0] < 3):
+        with open(file_path, 'rb') as f:
+            for fila in csv.reader(f):
+                yield [celda.decode('utf-8') for celda in fila]
+    else:
+        with io.open(file_path, 'r', encoding='utf-8', newline='') as f:
+            for fila in csv.reader(f):
+                yield fila
+
+
+def convertir_valor(requisito, texto):
+    """
+    Convierte el texto de una celda al tipo de valor del requisito (con su
+    método convertir_texto).
+
+    Argumentos:
+        requisito: Requisito al que corresponde el valor.
+        texto: String con el valor.
+
+    Devuelve:
+        El valor convertido o None si la celda está vacía o el requisito es
+        del tipo Expresion (su valor se calcula).
+
+    Excepciones:
+        ValueError: El texto no se puede convertir al tipo del requisito.
+    """
+    texto = texto.strip()
+
+    if (texto == u"" or requisito.CALCULADO):
+        return None
+
+    try:
+        return requisito.convertir_texto(texto)
+    except ValueError:
+        raise ValueError(u"El valor \"" + texto + u"\" del requisito \"" +
+                         requisito.nombre + u"\" debe ser " +
+                         requisito.VALOR_ESPERADO + u"!")
+
+
+def leer_solicitantes_CSV(file_path, caso):
+    """
+    Lee los solicitantes de un fichero CSV y devuelve (generador) tuplas
+    (identificador, valores), donde valores es la lista de valores de los
+    requisitos en el mismo orden que caso.requisitos (preparada para
+    caso.asignar_valores).
+
+    Si el fichero no tiene columna "id", el identificador de cada solicitante
+    es su número de fila (empezando en 1).
+
+    Argumentos:
+        file_path: Ruta hacia el fichero.
+        caso: Caso (objeto de la clase Caso) con los requisitos.
+
+    Excepciones:
+        IOError: El fichero no tiene el formato correcto.
+        ValueError: Algún valor no se puede convertir al tipo de su requisito.
+    """
+    filas = leer_filas_CSV(file_path)
+
+    try:
+        cabecera = [columna.strip() for columna in next(filas)]
+    except StopIteration:
+        raise IOError(u"El fichero CSV está vacío!")
+
+    columnas = _columnas_CSV(cabecera, caso)
+
+    for n_fila, fila in enumerate(filas, 1):
+        if (len(fila) == 0):
+            continue
+
+        yield _convertir_fila(caso, columnas, fila, n_fila)
+
+
+def _columnas_CSV(cabecera, caso):
+    """
+    Devuelve una tupla (n_columnas, indices, columna_id) con el número de
+    columnas de la cabecera de un fichero CSV de solicitantes, la posición de
+    la columna de cada requisito del caso (None si no está) y la posición de la
+    columna "id" (None si no está).
+
+    Argumentos:
+        cabecera: Lista con el nombre de cada columna.
+        caso: Caso (objeto de la clase Caso o DefinicionCaso) con los
+              requisitos.
+    """
+    columnas = dict((nombre, i) for i, nombre in enumerate(cabecera))
+    indices = [columnas.get(requisito.nombre) for requisito in caso.requisitos]
+
+    return (len(cabecera), indices, columnas.get(COLUMNA_ID))
+
+
+def _convertir_fila(caso, columnas, fila, n_fila):
+    """
+    Convierte una fila de un fichero CSV de solicitantes en una tupla
+    (identificador, valores) (ver leer_solicitantes_CSV).
+
+    Argumentos:
+        caso: Caso (objeto de la clase Caso o DefinicionCaso) con los
+              requisitos.
+        columnas: Tupla devuelta por _columnas_CSV.
+        fila: Lista de strings con las celdas de la fila.
+        n_fila: Número de la fila (sin contar la cabecera).
+
+    Excepciones:
+        IOError: La fila no tiene el número de columnas correcto.
+        ValueError: Algún valor no se puede convertir al tipo de su requisito.
+    """
+    n_columnas, indices, columna_id = columnas
+
+    if (len(fila) != n_columnas):
+        raise IOError(u"La fila " + str(n_fila) + u" del fichero CSV no " +
+                      u"tiene el número de columnas correcto!")
+
+    valores = [None if i is None else convertir_valor(requisito, fila[i])
+               for requisito, i in zip(caso.requisitos, indices)]
+
+    if (columna_id is None):
+        return (n_fila, valores)
+    else:
+        return (fila[columna_id], valores)
+
+
+def _parsear_linea_CSV(linea):
+    """
+    Devuelve la lista de celdas (strings unicode) de una línea de un fichero
+    CSV codificado en UTF-8.
+
+    Argumentos:
+        linea: Bytes con la línea.
+    """
+    if (sys.version_info[0] < 3):
+        for fila in csv.reader([linea]):
+            return [celda.decode('utf-8') for celda in fila]
+    else:
+        for fila in csv.reader([linea.decode('utf-8')]):
+            return fila
+
+    return []
+
+
+def leer_solicitantes_CSV_desde(file_path, caso, posicion=0, n_filas=0):
+    """
+    Lee los solicitantes de un fichero CSV a partir de una posición y devuelve
+    (generador) tuplas (identificador, valores, posicion, n_filas), donde
+    posicion es la posición (en bytes) justo después de la fila leída y
+    n_filas el número de filas leídas hasta ella (contando las anteriores a la
+    posición de inicio).
+
+    Solo se leen las líneas completas (la última línea del fichero, si no
+    acaba en un salto de línea, puede estar todavía escribiéndose). Cada
+    solicitante debe ocupar una única línea.
+
+    Argumentos:
+        file_path: Ruta hacia el fichero.
+        caso: Caso (objeto de la clase Caso) con los requisitos.
+        posicion: (opcional) Posición (en bytes) desde la que se lee; 0 para
+                  leer desde el principio.
+        n_filas: (opcional) Número de filas anteriores a la posición.
+
+    Excepciones:
+        IOError: El fichero no tiene el formato correcto.
+        ValueError: Algún valor no se puede convertir al tipo de su requisito.
+    """
+    with io.open(file_path, 'rb') as f:
+        linea = f.readline()
+        if (not linea.endswith(b"\n")):
+            raise IOError(u"El fichero CSV está vacío!")
+
+        cabecera = [columna.strip() for columna in _parsear_linea_CSV(linea)]
+        columnas = _columnas_CSV(cabecera, caso)
+
+        if (posicion == 0):
+            posicion = f.tell()
+        else:
+            f.seek(posicion)
+
+        while True:
+            linea = f.readline()
+            if (not linea.endswith(b"\n")):
+                break
+
+            posicion += len(linea)
+            n_filas += 1
+            fila = _parsear_linea_CSV(linea)
+            if (len(fila) == 0):
+                continue
+
+            identificador, valores = _convertir_fila(caso, columnas, fila,
+                                                     n_filas)
+
+            yield (identificador, valores, posicion, n_filas)
+
+
+class LoteIndexado(object):
+    """
+    Acceso directo a cualquier solicitante de un fichero CSV sin cargar el
+    fichero en memoria.
+
+    Al abrirlo solo se recorre el fichero para guardar la posición (en bytes)
+    de cada fila; las filas se leen y se valoran cuando se piden, y de cada
+    solicitante valorado solo se guarda su veredicto y el de cada requisito
+    del primer nivel (un byte por veredicto).
+
+    Argumentos constructor:
+        file_path: Ruta hacia el fichero CSV de solicitantes.
+        caso: Caso (objeto de la clase Caso) con el que se valora. Se valora
+              con su definición (ver Caso.definicion), así que el caso no se
+              modifica y se puede seguir usando (o volver a cargar) mientras
+              tanto.
+
+    Excepciones constructor:
+        IOError: El fichero está vacío o no se puede abrir.
+
+    Atributos/Propiedades:
+        caso: Caso con el que se valora.
+        definicion: Definición del caso con la que se valora.
+        n_solicitantes: Número de solicitantes del fichero.
+        n_valorados: Número de solicitantes valorados hasta el momento.
+    """
+
+    # Estado de la valoración de cada solicitante.
+    PENDIENTE, APROBADO, RECHAZADO, ERROR = range(4)
+
+    # Número de filas leídas que se guardan para no volver a leerlas.
+    TAM_CACHE_FILAS = 1024
+
+    def __init__(self, file_path, caso):
+        self._caso = caso
+        self._definicion = caso.definicion
+        self._fichero = io.open(file_path, 'rb')
+
+        linea = self._fichero.readline()
+        if (not linea.strip()):
+            self._fichero.close()
+            raise IOError(u"El fichero CSV está vacío!")
+
+        cabecera = [columna.strip() for columna in _parsear_linea_CSV(linea)]
+        self._columnas = _columnas_CSV(cabecera, self._definicion)
+
+        # Posición de cada fila y, si no hay columna "id", su número de fila
+        # (las filas vacías no son solicitantes pero sí cuentan)
+        self._posiciones = array('L')
+        self._n_filas = array('L') if self._columnas[2] is None else None
+
+        posicion = self._fichero.tell()
+        for n_fila, linea in enumerate(self._fichero, 1):
+            if (linea.strip()):
+                self._posiciones.append(posicion)
+                if (self._n_filas is not None):
+                    self._n_filas.append(n_fila)
+            posicion += len(linea)
+
+        n_requisitos = len(self._definicion.requisitos_raiz)
+        self._estados = bytearray(len(self._posiciones))
+        self._veredictos = bytearray(len(self._posiciones) * n_requisitos)
+        self._n_valorados = 0
+        self._filas = collections.OrderedDict()
+
+    @property
+    def caso(self):
+        """
+        Getter de la propiedad caso.
+        """
+        return self._caso
+
+    @property
+    def definicion(self):
+        """
+        Getter de la propiedad definicion.
+        """
+        return self._definicion
+
+    @property
+    def n_solicitantes(self):
+        """
+        Getter de la propiedad n_solicitantes.
+        """
+        return len(self._posiciones)
+
+    @property
+    def n_valorados(self):
+        """
+        Getter de la propiedad n_valorados.
+        """
+        return self._n_valorados
+
+    def cerrar(self):
+        """
+        Cierra el fichero.
+        """
+        self._fichero.close()
+
+    def _fila(self, indice):
+        """
+        Devuelve la lista de celdas de un solicitante (leyéndola del fichero
+        si no está guardada).
+
+        Argumentos:
+            indice: Posición del solicitante.
+        """
+        fila = self._filas.pop(indice, None)
+
+        if (fila is None):
+            self._fichero.seek(self._posiciones[indice])
+            fila = _parsear_linea_CSV(self._fichero.readline())
+            if (len(self._filas) >= self.TAM_CACHE_FILAS):
+                self._filas.popitem(last=False)
+
+        self._filas[indice] = fila
+
+        return fila
+
+    def identificador(self, indice):
+        """
+        Devuelve el identificador de un solicitante.
+
+        Argumentos:
+            indice: Posición del solicitante.
+        """
+        columna_id = self._columnas[2]
+
+        if (columna_id is None):
+            return self._n_filas[indice]
+
+        fila = self._fila(indice)
+        if (columna_id < len(fila)):
+            return fila[columna_id]
+
+        return u""
+
+    def solicitante(self, indice):
+        """
+        Devuelve la tupla (identificador, valores) de un solicitante (ver
+        leer_solicitantes_CSV).
+
+        Argumentos:
+            indice: Posición del solicitante.
+
+        Excepciones:
+            IOError: La fila no tiene el número de columnas correcto.
+            ValueError: Algún valor no se puede convertir al tipo de su
+                        requisito.
+        """
+        n_fila = indice + 1 if self._n_filas is None else self._n_filas[indice]
+
+        return _convertir_fila(self._definicion, self._columnas,
+                               self._fila(indice), n_fila)
+
+    def estado(self, indice):
+        """
+        Devuelve el estado de la valoración de un solicitante (APROBADO,
+        RECHAZADO o ERROR), valorándolo si todavía no se ha hecho.
+
+        Argumentos:
+            indice: Posición del solicitante.
+        """
+        if (self._estados[indice] == self.PENDIENTE):
+            self._valorar(indice)
+
+        return self._estados[indice]
+
+    def resultados(self, indice):
+        """
+        Devuelve la lista con el veredicto de cada requisito del primer nivel
+        de un solicitante (None si no se ha podido valorar), valorándolo si
+        todavía no se ha hecho.
+
+        Argumentos:
+            indice: Posición del solicitante.
+        """
+        n_requisitos = len(self._definicion.requisitos_raiz)
+
+        if (self.estado(indice) == self.ERROR):
+            return [None] * n_requisitos
+
+        base = indice * n_requisitos
+
+        return [bool(veredicto) for veredicto
+                in self._veredictos[base:base + n_requisitos]]
+
+    def _valorar(self, indice):
+        """
+        Valora un solicitante y guarda sus veredictos.
+
+        Argumentos:
+            indice: Posición del solicitante.
+        """
+        try:
+            _, valores = self.solicitante(indice)
+            solicitante = self._definicion.nuevo_solicitante(valores)
+            result = self._definicion.valorar(solicitante, explicar=False)
+        except (IOError, ValueError, TypeError, RuntimeError):
+            self._estados[indice] = self.ERROR
+        else:
+            n_requisitos = len(self._definicion.requisitos_raiz)
+            base = indice * n_requisitos
+            for j, requisito_result in enumerate(solicitante.resultados):
+                self._veredictos[base + j] = 1 if requisito_result else 0
+            self._estados[indice] = (self.APROBADO if result
+                                     else self.RECHAZADO)
+
+        self._n_valorados += 1
+
+    def explicar(self, indice):
+        """
+        Devuelve la explicación de la valoración de un solicitante (o el
+        mensaje de error si no se ha podido valorar).
+
+        Argumentos:
+            indice: Posición del solicitante.
+        """
+        try:
+            _, valores = self.solicitante(indice)
+            solicitante = self._definicion.nuevo_solicitante(valores)
+            self._definicion.valorar(solicitante)
+        except (IOError, ValueError, TypeError, RuntimeError) as e:
+            return e.args[0] if e.args else u""
+
+        return solicitante.explicacion
+
+
+def validar_columna(requisito, textos):
+    """
+    Comprueba de una vez toda la columna de valores de un requisito (el tipo
+    y las condiciones propias del tipo, como que los porcentajes estén entre
+    0 y 1) sin detenerse en el primer valor incorrecto.
+
+    Argumentos:
+        requisito: Requisito al que corresponde la columna.
+        textos: Lista de strings con los valores de la columna.
+
+    Devuelve:
+        Tupla (valores, errores), donde valores es la lista de valores
+        convertidos (None en los incorrectos o vacíos) y errores una lista de
+        tuplas (posicion, texto, motivo) con cada valor incorrecto (los vacíos
+        no son errores: que falten o no depende del resto de valores del
+        solicitante, ver validar_solicitantes_CSV).
+    """
+    if (requisito.CALCULADO):
+        return ([None] * len(textos), [])
+
+    textos = [texto.strip() for texto in textos]
+    motivo = u"no es " + requisito.VALOR_ESPERADO
+
+    valores = requisito.convertir_lote(textos)
+
+    errores = [(i, texto, motivo)
+               for i, (texto, valor) in enumerate(zip(textos, valores))
+               if valor is None and texto != u""]
+
+    rechazados = requisito.comprobar_lote(valores)
+    if (rechazados):
+        for i, motivo_valor in rechazados:
+            valores[i] = None
+            errores.append((i, textos[i], motivo_valor))
+        errores.sort()
+
+    return (valores, errores)
+
+
+class InformeValidacion(object):
+    """
+    Resultado de la validación de un lote de solicitantes (ver
+    validar_solicitantes_CSV).
+
+    Argumentos constructor:
+        identificadores: Lista con el identificador de cada solicitante.
+        columnas: Lista con la columna de valores convertidos de cada
+                  requisito (en el orden de caso.requisitos).
+        errores: Lista de tuplas (posicion, nombre, texto, motivo) con cada
+                 valor incorrecto, ordenada por posición del solicitante.
+
+    Atributos/Propiedades:
+        n_solicitantes: Número de solicitantes del lote.
+        identificadores: Lista con el identificador de cada solicitante.
+        columnas: Lista con la columna de valores convertidos de cada
+                  requisito (None en los valores incorrectos).
+        errores: Lista de tuplas (posicion, nombre, texto, motivo) con cada
+                 valor incorrecto (nombre es None si el error es de la fila
+                 entera).
+        posiciones_invalidas: Conjunto con la posición de los solicitantes con
+                              algún valor incorrecto.
+        n_errores_por_requisito: Diccionario con el número de valores
+                                 incorrectos de cada requisito.
+    """
+
+    def __init__(self, identificadores, columnas, errores):
+        self._identificadores = identificadores
+        self._columnas = columnas
+        self._errores = errores
+        self._posiciones_invalidas = set(error[0] for error in errores)
+
+    @property
+    def n_solicitantes(self):
+        """
+        Getter de la propiedad n_solicitantes.
+        """
+        return len(self._identificadores)
+
+    @property
+    def identificadores(self):
+        """
+        Getter de la propiedad identificadores.
+        """
+        return self._identificadores
+
+    @property
+    def columnas(self):
+        """
+        Getter de la propiedad columnas.
+        """
+        return self._columnas
+
+    @property
+    def errores(self):
+        """
+        Getter de la propiedad errores.
+        """
+        return self._errores
+
+    @property
+    def posiciones_invalidas(self):
+        """
+        Getter de la propiedad posiciones_invalidas.
+        """
+        return self._posiciones_invalidas
+
+    @property
+    def n_errores_por_requisito(self):
+        """
+        Getter de la propiedad n_errores_por_requisito.
+        """
+        n_errores = {}
+
+        for _, nombre, _, _ in self._errores:
+            n_errores[nombre] = n_errores.get(nombre, 0) + 1
+
+        return n_errores
+
+    def validos(self):
+        """
+        Devuelve (generador) tuplas (identificador, valores) con los
+        solicitantes sin ningún valor incorrecto (preparadas para
+        caso.asignar_valores).
+        """
+        for i, valores in enumerate(zip(*self._columnas)):
+            if (i not in self._posiciones_invalidas):
+                yield (self._identificadores[i], list(valores))
+
+    def escribir_cuarentena(self, salida):
+        """
+        Escribe en una salida una línea por cada valor incorrecto con el
+        identificador del solicitante, el nombre del requisito, el texto
+        leído y el motivo del error (separados por tabuladores).
+
+        Argumentos:
+            salida: Objeto con el método write (ver abrir_salida).
+        """
+        for posicion, nombre, texto, motivo in self._errores:
+            salida.write(u"\t".join([unicode(self._identificadores[posicion]),
+                                     nombre or u"", texto, motivo]) + u"\n")
+
+
+def validar_solicitantes_CSV(file_path, caso):
+    """
+    Lee un fichero CSV de solicitantes y comprueba todos sus valores de una
+    vez, columna a columna, en lugar de detenerse en el primer error (como
+    leer_solicitantes_CSV).
+
+    Un valor vacío solo es un error si la valoración del solicitante lo
+    necesita (los de los requisitos de un grupo que se decide antes de
+    llegar a ellos no hacen falta): los solicitantes con valores vacíos se
+    valoran y, si les falta algún valor, se marcan como errores todos sus
+    valores vacíos. Así, los solicitantes válidos son justo los que se pueden
+    valorar sin validar el lote.
+
+    Argumentos:
+        file_path: Ruta hacia el fichero.
+        caso: Caso (objeto de la clase Caso) con los requisitos.
+
+    Devuelve:
+        Un objeto InformeValidacion.
+
+    Excepciones:
+        IOError: El fichero está vacío.
+    """
+    filas = leer_filas_CSV(file_path)
+
+    try:
+        cabecera = [columna.strip() for columna in next(filas)]
+    except StopIteration:
+        raise IOError(u"El fichero CSV está vacío!")
+
+    n_columnas, indices, columna_id = _columnas_CSV(cabecera, caso)
+
+    identificadores = []
+    correctas = []
+    errores = []
+
+    for n_fila, fila in enumerate(filas, 1):
+        if (len(fila) == 0):
+            continue
+
+        posicion = len(identificadores)
+
+        if (columna_id is None or columna_id >= len(fila)):
+            identificadores.append(n_fila)
+        else:
+            identificadores.append(fila[columna_id])
+
+        if (len(fila) != n_columnas):
+            correctas.append([u""] * n_columnas)
+            errores.append((posicion, None, u"",
+                            u"número de columnas incorrecto"))
+        else:
+            correctas.append(fila)
+
+    filas_erroneas = set(error[0] for error in errores)
+    invalidas = set(filas_erroneas)
+    columnas = []
+    vacios = {}
+
+    for requisito, i in zip(caso.requisitos, indices):
+        if (i is None):
+            textos = [u""] * len(correctas)
+        else:
+            textos = [fila[i] for fila in correctas]
+
+        valores, errores_columna = validar_columna(requisito, textos)
+        columnas.append(valores)
+        errores.extend((posicion, requisito.nombre, texto, motivo)
+                       for posicion, texto, motivo in errores_columna
+                       if posicion not in filas_erroneas)
+        invalidas.update(error[0] for error in errores_columna)
+
+        if (not requisito.CALCULADO):
+            for posicion, texto in enumerate(textos):
+                if (texto.strip() == u""):
+                    vacios.setdefault(posicion, []).append(requisito.nombre)
+
+    # Los solicitantes con valores vacíos se valoran (sin tocar las
+    # estadísticas del caso) para saber si les falta alguno
+    definicion = caso.definicion
+
+    for posicion, nombres in vacios.items():
+        if (posicion in invalidas):
+            continue
+
+        solicitante = definicion.nuevo_solicitante(
+            [columna[posicion] for columna in columnas])
+        try:
+            definicion.valorar(solicitante, explicar=False)
+        except RuntimeError:
+            errores.extend((posicion, nombre, u"", u"sin valor")
+                           for nombre in nombres)
+
+    # Orden estable: por solicitante y, dentro de cada uno, por requisito
+    errores.sort(key=lambda error: error[0])
+
+    return InformeValidacion(identificadores, columnas, errores)
+
+
+def escribir_casi_aprobados(caso, informe, salida, tolerancia=0.05):
+    """
+    Escribe los solicitantes de un lote ya validado que han sido rechazados
+    por poco (ver DefinicionCaso.casi_aprobados): una línea por solicitante
+    con su identificador y, separados por tabuladores, los requisitos que no
+    aprueba con el margen que le falta (en porcentaje del rango).
+
+    El lote se valora de una vez por columnas, sin valorar a cada
+    solicitante; los solicitantes con valores incorrectos se descartan.
+
+    Argumentos:
+        caso: Caso (objeto de la clase Caso) con el que se valora.
+        informe: Lote validado (objeto de la clase InformeValidacion, ver
+                 validar_solicitantes_CSV).
+        salida: Objeto con el método write (ver abrir_salida).
+        tolerancia: (opcional) Margen máximo que puede faltar, relativo al
+                    rango de cada requisito (0.05 = 5%).
+
+    Devuelve:
+        Número de solicitantes rechazados por poco.
+    """
+    definicion = caso.definicion
+    columnas = informe.columnas
+    margenes = definicion.margenes_columnas(columnas)
+    n_casi_aprobados = 0
+
+    for posicion in definicion.casi_aprobados(columnas, tolerancia):
+        if (posicion in informe.posiciones_invalidas):
+            continue
+
+        faltas = [requisito.nombre + u": " +
+                  u"%.1f%%" % (-100 * columna[posicion])
+                  for requisito, columna in zip(definicion.requisitos,
+                                                margenes)
+                  if (columna is not None and columna[posicion] is not None
+                      and columna[posicion] < 0)]
+
+        salida.write(u"\t".join([unicode(informe.identificadores[posicion])] +
+                                faltas) + u"\n")
+        n_casi_aprobados += 1
+
+    return n_casi_aprobados
+
+
+class CacheValoraciones(object):
+    """
+    Caché de valoraciones para lotes con solicitantes repetidos.
+
+    Guarda el resultado de valorar cada combinación de valores, de modo que
+    los solicitantes con los mismos valores que otro ya valorado no vuelven a
+    valorar el caso. Cuando se llena se descarta la combinación usada hace más
+    tiempo.
+
+    Argumentos constructor:
+        caso: Caso (objeto de la clase Caso) con el que se valora.
+        capacidad: (opcional) Número máximo de combinaciones guardadas.
+
+    Excepciones constructor:
+        ValueError: La capacidad debe ser mayor que 0.
+
+    Atributos/Propiedades:
+        caso: Caso con el que se valora.
+        capacidad: Número máximo de combinaciones guardadas.
+        n_entradas: Número de combinaciones guardadas.
+        n_aciertos: Número de valoraciones encontradas en la caché.
+        n_fallos: Número de valoraciones que no estaban en la caché.
+        n_descartes: Número de combinaciones descartadas por falta de sitio.
+        tasa_aciertos: Proporción de valoraciones encontradas en la caché.
+    """
+
+    def __init__(self, caso, capacidad=10000):
+        if (capacidad < 1):
+            raise ValueError(u"La capacidad de la caché debe ser mayor que 0!")
+
+        self._caso = caso
+        self._capacidad = capacidad
+        self._entradas = collections.OrderedDict()
+        self._n_aciertos = 0
+        self._n_fallos = 0
+        self._n_descartes = 0
+
+    @property
+    def caso(self):
+        """
+        Getter de la propiedad caso.
+        """
+        return self._caso
+
+    @property
+    def capacidad(self):
+        """
+        Getter de la propiedad capacidad.
+        """
+        return self._capacidad
+
+    @property
+    def n_aciertos(self):
+        """
+        Getter de la propiedad n_aciertos.
+        """
+        return self._n_aciertos
+
+    @property
+    def n_fallos(self):
+        """
+        Getter de la propiedad n_fallos.
+        """
+        return self._n_fallos
+
+    @property
+    def n_descartes(self):
+        """
+        Getter de la propiedad n_descartes.
+        """
+        return self._n_descartes
+
+    @property
+    def tasa_aciertos(self):
+        """
+        Getter de la propiedad tasa_aciertos.
+        """
+        n_consultas = self._n_aciertos + self._n_fallos
+
+        if (n_consultas == 0):
+            return 0.0
+
+        return float(self._n_aciertos) / n_consultas
+
+    @property
+    def n_entradas(self):
+        """
+        Getter de la propiedad n_entradas.
+        """
+        return len(self._entradas)
+
+    def valorar(self, valores, explicar=True):
+        """
+        Devuelve la valoración (completa) del caso con los valores indicados,
+        sacándola de la caché si la combinación de valores ya se ha valorado.
+
+        Argumentos:
+            valores: Lista de valores de los requisitos (en el orden de
+                     caso.requisitos).
+            explicar: (opcional) False si no hace falta la explicación.
+
+        Devuelve:
+            Tupla (result, resultados, explicacion, puntuacion) con el
+            resultado de la valoración, el resultado de cada requisito del
+            primer nivel, la explicación (u"" si explicar es False) y la
+            puntuación (None si el caso no tiene puntuación o el solicitante
+            ha sido rechazado).
+        """
+        clave = (explicar, tuple(valores))
+        entrada = self._entradas.pop(clave, None)
+
+        if (entrada is not None):
+            # Se vuelve a insertar para marcarla como la usada más recientemente
+            self._entradas[clave] = entrada
+            self._n_aciertos += 1
+            return entrada
+
+        self._n_fallos += 1
+
+        caso = self._caso
+        caso.asignar_valores(valores)
+        otra = self._entradas.get((not explicar, clave[1]))
+
+        if (otra is not None):
+            # Ya se ha valorado (con o sin explicación): no se vuelve a
+            # valorar, para no contarla dos veces en las estadísticas de
+            # rechazo del caso
+            result, resultados, _, puntuacion = otra
+            explicacion = u""
+            if (explicar):
+                explicacion = caso.explicar_resultados(list(resultados))
+            entrada = (result, resultados, explicacion, puntuacion)
+        else:
+            result = caso.valorar(explicar=explicar)
+
+            puntuacion = None
+            if (result and len(caso.puntuacion) > 0):
+                puntuacion = caso.puntuar()
+
+            entrada = (result, tuple(caso.resultados), caso.explicacion,
+                       puntuacion)
+
+        if (len(self._entradas) >= self._capacidad):
+            self._entradas.popitem(last=False)
+            self._n_descartes += 1
+
+        self._entradas[clave] = entrada
+
+        return entrada
+
+
+class SelectorMejores(object):
+    """
+    Selecciona en streaming los k elementos con mayor puntuación.
+
+    Mantiene un montículo de mínimos con los k mejores elementos vistos hasta
+    el momento, por lo que procesar n elementos cuesta O(n log k) en tiempo y
+    O(k) en memoria (no hace falta ordenar todos los elementos).
+
+    Argumentos constructor:
+        k: Número de elementos a seleccionar.
+
+    Excepciones constructor:
+        ValueError: El argumento k debe ser mayor que 0.
+
+    Atributos/Propiedades:
+        k: Número de elementos a seleccionar.
+        n_insertados: Número de elementos insertados hasta el momento.
+    """
+
+    def __init__(self, k):
+        if (k < 1):
+            raise ValueError(u"El número de elementos a seleccionar debe ser " +
+                             u"mayor que 0!")
+
+        self._k = k
+        self._monticulo = []
+        self._n_insertados = 0
+
+    @property
+    def k(self):
+        """
+        Getter de la propiedad k.
+        """
+        return self._k
+
+    @property
+    def n_insertados(self):
+        """
+        Getter de la propiedad n_insertados.
+        """
+        return self._n_insertados
+
+    def insertar(self, puntuacion, elemento):
+        """
+        Tiene en cuenta un nuevo elemento.
+
+        A igual puntuación se conservan los elementos insertados primero.
+
+        Argumentos:
+            puntuacion: Puntuación del elemento.
+            elemento: El elemento (por ejemplo, el identificador del
+                      solicitante).
+        """
+        # El contador negado desempata sin comparar los elementos y hace que,
+        # a igual puntuación, el más antiguo se considere mejor
+        entrada = (puntuacion, -self._n_insertados, elemento)
+        self._n_insertados += 1
+
+        if (len(self._monticulo) < self._k):
+            heapq.heappush(self._monticulo, entrada)
+        elif (entrada[:2] > self._monticulo[0][:2]):
+            heapq.heapreplace(self._monticulo, entrada)
+
+    def mejores(self):
+        """
+        Devuelve una lista de tuplas (puntuacion, elemento) con los elementos
+        seleccionados, de mayor a menor puntuación.
+        """
+        return [(puntuacion, elemento) for puntuacion, _, elemento
+                in sorted(self._monticulo, reverse=True)]
+
+
+def mejores_solicitantes(caso, solicitantes, k, cache=None):
+    """
+    Valora un lote de solicitantes y devuelve los k aprobados con mayor
+    puntuación (según la puntuación definida en el caso).
+
+    Argumentos:
+        caso: Caso (objeto de la clase Caso) con la puntuación definida.
+        solicitantes: Iterable de tuplas (identificador, valores), como las que
+                      devuelve leer_solicitantes_CSV.
+        k: Número de solicitantes a seleccionar.
+        cache: (opcional) CacheValoraciones del caso para no repetir la
+               valoración de los solicitantes con los mismos valores.
+
+    Devuelve:
+        Lista de tuplas (puntuacion, identificador) de mayor a menor
+        puntuación.
+
+    Excepciones:
+        RuntimeError: El caso no tiene definida una puntuación.
+    """
+    if (len(caso.puntuacion) == 0):
+        raise RuntimeError(u"El caso no tiene definida una puntuación!")
+
+    selector = SelectorMejores(k)
+
+    for identificador, valores in solicitantes:
+        if (cache is not None):
+            result, _, _, puntuacion = cache.valorar(valores, explicar=False)
+            if (result):
+                selector.insertar(puntuacion, identificador)
+            continue
+
+        caso.asignar_valores(valores)
+
+        if (caso.valorar(rapido=True)):
+            selector.insertar(caso.puntuar(), identificador)
+
+    return selector.mejores()
+
+
+class _SalidaBZ2(object):
+    """
+    Fichero comprimido con bzip2 escrito a través de un fichero normal (el
+    BZ2File de Python 2 no tiene el método flush ni admite el modo 'ab').
+
+    Al añadir a un fichero existente se escribe un nuevo flujo bzip2 a
+    continuación, que bunzip2 (y el módulo bz2 de Python 3) leen como
+    continuación del anterior.
+
+    Argumentos constructor:
+        file_path: Ruta hacia el fichero.
+        modo: Modo de apertura ('wb' o 'ab').
+    """
+
+    def __init__(self, file_path, modo):
+        self._fichero = io.open(file_path, modo)
+        self._compresor = bz2.BZ2Compressor()
+
+    def write(self, datos):
+        """
+        Comprime y escribe un bloque de bytes.
+
+        Argumentos:
+            datos: Bytes a escribir.
+        """
+        self._fichero.write(self._compresor.compress(datos))
+
+    def flush(self):
+        """
+        Vacía el buffer del fichero (lo que sigue en el compresor no se
+        escribe hasta cerrarlo).
+        """
+        self._fichero.flush()
+
+    def close(self):
+        """
+        Termina el flujo bzip2 y cierra el fichero.
+        """
+        if (self._compresor is not None):
+            self._fichero.write(self._compresor.flush())
+            self._compresor = None
+        self._fichero.close()
+
+
+def abrir_salida(file_path, anadir=False):
+    """
+    Abre la salida en la que se escribirán las explicaciones y devuelve un
+    objeto con el método write para escribir strings unicode (se codifican en
+    UTF-8).
+
+    Argumentos:
+        file_path: Ruta hacia el fichero de salida. Si acaba en ".gz" o ".bz2"
+                   se comprime; si es "-" se escribe en la salida estándar
+                   (por ejemplo, para encadenarla con otro programa).
+        anadir: (opcional) True para escribir al final del fichero en lugar de
+                sustituirlo (en los comprimidos se añade un nuevo flujo gzip o
+                bzip2, que gunzip y bunzip2 leen como continuación del
+                anterior).
+    """
+    modo = 'ab' if anadir else 'wb'
+
+    if (file_path == u"-"):
+        salida = getattr(sys.stdout, "buffer", sys.stdout)
+    elif (file_path.endswith(u".gz")):
+        salida = gzip.open(file_path, modo)
+    elif (file_path.endswith(u".bz2")):
+        salida = _SalidaBZ2(file_path, modo)
+    else:
+        salida = io.open(file_path, modo)
+
+    return codecs.getwriter('utf-8')(salida)
+
+
+class EscritorExplicaciones(object):
+    """
+    Escribe la explicación de la valoración de cada solicitante de un lote
+    directamente en una salida, sin guardar las explicaciones en memoria.
+
+    Formatos:
+        "completo": Explicación completa de todos los solicitantes.
+        "rechazados": Explicación completa solo de los solicitantes rechazados
+                      (los aprobados se valoran en el modo rápido).
+        "compacto": Una línea por solicitante con su identificador, el
+                    resultado y los requisitos rechazados (separados por
+                    tabuladores).
+
+    Argumentos constructor:
+        salida: Objeto con el método write (ver abrir_salida).
+        formato: (opcional) String con el formato de la explicación.
+
+    Excepciones constructor:
+        ValueError: El formato no es válido.
+
+    Atributos/Propiedades:
+        formato: String con el formato de la explicación.
+        n_solicitantes: Número de solicitantes valorados.
+        n_aprobados: Número de solicitantes aprobados.
+    """
+
+    # Formatos válidos.
+    FORMATOS = ("completo", "rechazados", "compacto")
+
+    def __init__(self, salida, formato="completo"):
+        if (formato not in self.FORMATOS):
+            raise ValueError(u"El formato \"" + unicode(formato) +
+                             u"\" no es válido!")
+
+        self._salida = salida
+        self._formato = formato
+        self._n_solicitantes = 0
+        self._n_aprobados = 0
+
+    @property
+    def formato(self):
+        """
+        Getter de la propiedad formato.
+        """
+        return self._formato
+
+    @property
+    def n_solicitantes(self):
+        """
+        Getter de la propiedad n_solicitantes.
+        """
+        return self._n_solicitantes
+
+    @property
+    def n_aprobados(self):
+        """
+        Getter de la propiedad n_aprobados.
+        """
+        return self._n_aprobados
+
+    def escribir(self, identificador, caso):
+        """
+        Valora el caso con los valores que tiene asignados y escribe la
+        explicación del solicitante en la salida.
+
+        Argumentos:
+            identificador: Identificador del solicitante.
+            caso: Caso (objeto de la clase Caso) con los valores del
+                  solicitante ya asignados.
+
+        Devuelve:
+            El resultado de la valoración.
+        """
+        if (self._formato == "rechazados"):
+            # Los rechazados se vuelven a valorar en el modo completo (para
+            # la explicación) sin contarlos dos veces en las estadísticas
+            result = caso.valorar(rapido=True, explicar_rechazados=True,
+                                  explicar=False)
+        else:
+            result = caso.valorar(explicar=False)
+
+        return self.escribir_valoracion(identificador, caso, result,
+                                        caso.resultados,
+                                        caso.generar_explicacion())
+
+    def escribir_cache(self, identificador, valores, cache):
+        """
+        Valora un solicitante usando una caché de valoraciones y escribe su
+        explicación en la salida (igual que escribir).
+
+        Argumentos:
+            identificador: Identificador del solicitante.
+            valores: Lista de valores de los requisitos (en el orden de
+                     caso.requisitos).
+            cache: CacheValoraciones del caso.
+
+        Devuelve:
+            El resultado de la valoración.
+        """
+        result, resultados, explicacion, _ = cache.valorar(
+            valores, explicar=(self._formato == "completo"))
+
+        if (self._formato == "rechazados" and not result):
+            result, resultados, explicacion, _ = cache.valorar(valores)
+
+        return self.escribir_valoracion(identificador, cache.caso, result,
+                                        resultados, [explicacion])
+
+    def escribir_valoracion(self, identificador, caso, result, resultados,
+                            explicacion):
+        """
+        Escribe en la salida la explicación de una valoración ya hecha.
+
+        Argumentos:
+            identificador: Identificador del solicitante.
+            caso: Caso (objeto de la clase Caso) valorado.
+            result: Resultado de la valoración.
+            resultados: Resultado de cada requisito del primer nivel.
+            explicacion: Iterable con los fragmentos de la explicación
+                         completa (solo se recorre si el formato la
+                         necesita).
+
+        Devuelve:
+            El resultado de la valoración.
+        """
+        self._n_solicitantes += 1
+        if (result):
+            self._n_aprobados += 1
+
+        if (result):
+            veredicto = u"APROBADO"
+        else:
+            veredicto = u"RECHAZADO"
+
+        if (self._formato == "compacto"):
+            rechazados = [requisito.nombre for requisito, requisito_result
+                          in zip(caso.requisitos_raiz, resultados)
+                          if requisito_result is False]
+            self._salida.write(u"\t".join(
+                [unicode(identificador), veredicto] + rechazados) + u"\n")
+        elif (self._formato == "completo" or not result):
+            self._salida.write(u"##### Solicitante " +
+                               unicode(identificador) + u": " + veredicto +
+                               u" #####\n\n")
+            for fragmento in explicacion:
+                self._salida.write(fragmento)
+
+        return result
+
+
+def escribir_explicaciones(caso, solicitantes, salida, formato="completo",
+                           cache=None):
+    """
+    Valora un lote de solicitantes y escribe sus explicaciones en una salida
+    con memoria constante.
+
+    Argumentos:
+        caso: Caso (objeto de la clase Caso) con el que se valora.
+        solicitantes: Iterable de tuplas (identificador, valores), como las que
+                      devuelve leer_solicitantes_CSV.
+        salida: Objeto con el método write (ver abrir_salida).
+        formato: (opcional) String con el formato de la explicación (ver
+                 EscritorExplicaciones).
+        cache: (opcional) CacheValoraciones del caso para no repetir la
+               valoración de los solicitantes con los mismos valores (la
+               salida es la misma).
+
+    Devuelve:
+        Tupla (n_solicitantes, n_aprobados).
+    """
+    escritor = EscritorExplicaciones(salida, formato)
+
+    for identificador, valores in solicitantes:
+        if (cache is not None):
+            escritor.escribir_cache(identificador, valores, cache)
+        else:
+            caso.asignar_valores(valores)
+            escritor.escribir(identificador, caso)
+
+    return (escritor.n_solicitantes, escritor.n_aprobados)
+
+
+class EjecucionIncremental(object):
+    """
+    Valoración incremental de un fichero CSV de solicitantes al que se van
+    añadiendo filas (por ejemplo, a lo largo del día).
+
+    Tras cada ejecución se guarda un punto de control con la posición hasta la
+    que se ha leído el fichero, el hash de lo leído hasta esa posición, el
+    hash del fichero del caso y el tamaño de la salida, de modo que la
+    siguiente ejecución solo valora las filas añadidas desde entonces y añade
+    sus explicaciones al final de la salida. Si el caso ha cambiado, el
+    fichero de solicitantes se ha sustituido por otro (cambia lo ya leído) o
+    la salida es más corta que al guardar el punto de control, se vuelve a
+    valorar el fichero entero.
+
+    Durante la ejecución el punto de control se actualiza cada
+    INTERVALO_CHECKPOINT solicitantes, así que si se interrumpe solo se
+    repiten los solicitantes valorados desde el último; lo escrito en la
+    salida después del último punto de control se descarta al reanudar. Las
+    salidas comprimidas no se pueden cortar por la mitad, así que en ellas el
+    punto de control solo se guarda al terminar cada ejecución, y cada
+    ejecución añade al fichero un nuevo flujo comprimido (ver abrir_salida).
+
+    Argumentos constructor:
+        caso_file_path: Ruta hacia el fichero JSON del caso.
+        solicitantes_file_path: Ruta hacia el fichero CSV de solicitantes.
+        checkpoint_path: Ruta hacia el fichero del punto de control.
+
+    Atributos/Propiedades:
+        caso_file_path: Ruta hacia el fichero JSON del caso.
+        solicitantes_file_path: Ruta hacia el fichero CSV de solicitantes.
+        checkpoint_path: Ruta hacia el fichero del punto de control.
+    """
+
+    # Número de solicitantes entre dos puntos de control durante una
+    # ejecución.
+    INTERVALO_CHECKPOINT = 10000
+
+    # Bytes que se leen de cada vez al calcular el hash de los solicitantes.
+    TAM_BLOQUE = 1 << 20
+
+    def __init__(self, caso_file_path, solicitantes_file_path,
+                 checkpoint_path):
+        self._caso_file_path = caso_file_path
+        self._solicitantes_file_path = solicitantes_file_path
+        self._checkpoint_path = checkpoint_path
+
+    @property
+    def caso_file_path(self):
+        """
+        Getter de la propiedad caso_file_path.
+        """
+        return self._caso_file_path
+
+    @property
+    def solicitantes_file_path(self):
+        """
+        Getter de la propiedad solicitantes_file_path.
+        """
+        return self._solicitantes_file_path
+
+    @property
+    def checkpoint_path(self):
+        """
+        Getter de la propiedad checkpoint_path.
+        """
+        return self._checkpoint_path
+
+    def _estado_ficheros(self):
+        """
+        Devuelve un diccionario con el hash del fichero del caso y la cabecera
+        del fichero de solicitantes (si alguno cambia, el punto de control deja
+        de ser válido).
+        """
+        with io.open(self._caso_file_path, 'rb') as f:
+            hash_caso = hashlib.sha1(f.read()).hexdigest()
+
+        with io.open(self._solicitantes_file_path, 'rb') as f:
+            cabecera = _parsear_linea_CSV(f.readline())
+
+        return {"caso": hash_caso, "cabecera": cabecera}
+
+    def _actualizar_huella(self, huella, inicio, fin):
+        """
+        Añade al hash de los solicitantes los bytes del fichero entre dos
+        posiciones.
+
+        Argumentos:
+            huella: Objeto hash (de hashlib) con lo leído antes de inicio.
+            inicio: Posición (en bytes) del primer byte a añadir.
+            fin: Posición (en bytes) siguiente al último byte a añadir.
+        """
+        with io.open(self._solicitantes_file_path, 'rb') as f:
+            f.seek(inicio)
+            pendientes = fin - inicio
+            while (pendientes > 0):
+                bloque = f.read(min(pendientes, self.TAM_BLOQUE))
+                if (len(bloque) == 0):
+                    break
+                huella.update(bloque)
+                pendientes -= len(bloque)
+
+    @staticmethod
+    def _tamano_salida(salida_path):
+        """
+        Devuelve el tamaño (en bytes) del fichero de salida o None si se
+        escribe en la salida estándar o el fichero no existe.
+
+        Argumentos:
+            salida_path: Ruta hacia el fichero de salida.
+        """
+        if (salida_path == u"-" or not os.path.exists(salida_path)):
+            return None
+
+        return os.path.getsize(salida_path)
+
+    def _cargar_checkpoint(self, estado, huella, salida_path):
+        """
+        Devuelve una tupla (posicion, n_filas) con el punto de control guardado
+        o None si no existe o no es válido para el estado actual de los
+        ficheros. Si es válido, deja en huella el hash de los solicitantes
+        hasta la posición y descarta lo escrito en la salida después del punto
+        de control.
+
+        Argumentos:
+            estado: Diccionario devuelto por _estado_ficheros.
+            huella: Objeto hash (de hashlib) vacío.
+            salida_path: Ruta hacia el fichero de salida.
+        """
+        try:
+            with io.open(self._checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+        posicion = checkpoint.get("posicion", 0)
+
+        if (checkpoint.get("caso") != estado["caso"] or
+                checkpoint.get("cabecera") != estado["cabecera"] or
+                posicion > os.path.getsize(self._solicitantes_file_path)):
+            return None
+
+        # Lo ya leído debe seguir igual (el fichero solo puede crecer)
+        self._actualizar_huella(huella, 0, posicion)
+        if (checkpoint.get("huella") != huella.hexdigest()):
+            return None
+
+        tamano = checkpoint.get("salida")
+        if (tamano is not None and salida_path != u"-"):
+            tamano_actual = self._tamano_salida(salida_path)
+            if (tamano_actual is None or tamano_actual < tamano):
+                return None
+            if (tamano_actual > tamano):
+                with io.open(salida_path, 'r+b') as f:
+                    f.truncate(tamano)
+
+        return (posicion, checkpoint["n_filas"])
+
+    def _guardar_checkpoint(self, estado, posicion, n_filas, huella,
+                            tamano_salida):
+        """
+        Guarda el punto de control (primero en un fichero temporal, para no
+        dejar nunca un punto de control a medio escribir).
+
+        Argumentos:
+            estado: Diccionario devuelto por _estado_ficheros.
+            posicion: Posición (en bytes) hasta la que se ha valorado.
+            n_filas: Número de filas valoradas hasta la posición.
+            huella: Objeto hash (de hashlib) de los solicitantes hasta la
+                    posición.
+            tamano_salida: Tamaño (en bytes) de la salida o None.
+        """
+        checkpoint = dict(estado)
+        checkpoint["posicion"] = posicion
+        checkpoint["n_filas"] = n_filas
+        checkpoint["huella"] = huella.hexdigest()
+        checkpoint["salida"] = tamano_salida
+
+        temp_path = self._checkpoint_path + u".tmp"
+
+        with io.open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(unicode(json.dumps(checkpoint)))
+
+        if (os.name == "nt" and os.path.exists(self._checkpoint_path)):
+            os.remove(self._checkpoint_path)
+        os.rename(temp_path, self._checkpoint_path)
+
+    def ejecutar(self, salida_path, formato="completo", capacidad_cache=0):
+        """
+        Valora los solicitantes nuevos (o todos, si no hay un punto de control
+        válido) y escribe sus explicaciones.
+
+        Argumentos:
+            salida_path: Ruta hacia el fichero de salida (ver abrir_salida).
+            formato: (opcional) String con el formato de la explicación (ver
+                     EscritorExplicaciones).
+            capacidad_cache: (opcional) Capacidad de la caché de valoraciones
+                             (ver CacheValoraciones); 0 para no usarla.
+
+        Devuelve:
+            Tupla (n_solicitantes, n_aprobados, completa) con el número de
+            solicitantes valorados en esta ejecución, cuántos de ellos han sido
+            aprobados y si se ha valorado el fichero entero.
+
+        Excepciones:
+            IOError: Error al leer los ficheros o formato incorrecto.
+            ValueError: Algún valor no se puede convertir al tipo de su
+                        requisito.
+        """
+        caso = Caso()
+        caso.load_from_JSON_file(self._caso_file_path)
+
+        estado = self._estado_ficheros()
+        huella = hashlib.sha1()
+        checkpoint = self._cargar_checkpoint(estado, huella, salida_path)
+        completa = checkpoint is None
+        if (completa):
+            huella = hashlib.sha1()
+        posicion, n_filas = (0, 0) if completa else checkpoint
+        # Posición hasta la que se ha añadido el fichero al hash
+        posicion_huella = posicion
+        comprimida = salida_path.endswith((u".gz", u".bz2"))
+
+        cache = None
+        if (capacidad_cache > 0):
+            cache = CacheValoraciones(caso, capacidad_cache)
+
+        salida = abrir_salida(salida_path, anadir=not completa)
+        escritor = EscritorExplicaciones(salida, formato)
+
+        try:
+            for identificador, valores, siguiente, n_filas_leidas in \
+                    leer_solicitantes_CSV_desde(self._solicitantes_file_path,
+                                                caso, posicion, n_filas):
+                if (cache is not None):
+                    escritor.escribir_cache(identificador, valores, cache)
+                else:
+                    caso.asignar_valores(valores)
+                    escritor.escribir(identificador, caso)
+
+                posicion, n_filas = siguiente, n_filas_leidas
+
+                if (not comprimida and escritor.n_solicitantes %
+                        self.INTERVALO_CHECKPOINT == 0):
+                    salida.flush()
+                    self._actualizar_huella(huella, posicion_huella, posicion)
+                    posicion_huella = posicion
+                    self._guardar_checkpoint(
+                        estado, posicion, n_filas, huella,
+                        self._tamano_salida(salida_path))
+        finally:
+            salida.flush()
+            if (salida_path != u"-"):
+                salida.close()
+
+        self._actualizar_huella(huella, posicion_huella, posicion)
+        self._guardar_checkpoint(estado, posicion, n_filas, huella,
+                                 self._tamano_salida(salida_path))
+
+        return (escritor.n_solicitantes, escritor.n_aprobados, completa)
+
+
+def main(argv=None):
+    """
+    Valora desde la línea de comandos un lote de solicitantes leído de un
+    fichero CSV y escribe las explicaciones (o, con la opción --mejores, los
+    mejores aprobados según la puntuación del caso y, con la opción
+    --casi-aprobados, los rechazados por poco).
+
+    Argumentos:
+        argv: (opcional) Lista con los argumentos (por defecto, los del
+              programa).
+    """
+    parser = argparse.ArgumentParser(
+        description=u"Valora un lote de solicitantes de un fichero CSV.")
+    parser.add_argument("caso", help=u"fichero JSON del caso")
+    parser.add_argument("solicitantes", help=u"fichero CSV de solicitantes")
+    parser.add_argument("-o", "--salida", default="-",
+                        help=u"fichero de salida (.gz o .bz2 para "
+                        u"comprimirlo; - para la salida estándar)")
+    parser.add_argument("-f", "--formato", default="completo",
+                        choices=EscritorExplicaciones.FORMATOS,
+                        help=u"formato de la explicación")
+    parser.add_argument("-k", "--mejores", type=int, default=0,
+                        help=u"en lugar de las explicaciones, escribir los K "
+                        u"aprobados con mayor puntuación")
+    parser.add_argument("-c", "--cache", type=int, default=0,
+                        help=u"guardar la valoración de hasta N "
+                        u"combinaciones de valores para no repetirla en los "
+                        u"solicitantes duplicados")
+    parser.add_argument("--checkpoint", metavar="FICHERO",
+                        help=u"valorar solo los solicitantes añadidos desde "
+                        u"la última ejecución con el mismo punto de control "
+                        u"(todos si el caso ha cambiado) y añadir sus "
+                        u"explicaciones al final de la salida")
+    parser.add_argument("--cuarentena", metavar="FICHERO",
+                        help=u"comprobar antes todos los valores, escribir "
+                        u"los incorrectos en FICHERO y valorar solo los "
+                        u"solicitantes sin errores")
+    parser.add_argument("--casi-aprobados", type=float, metavar="PORCENTAJE",
+                        help=u"en lugar de las explicaciones, escribir los "
+                        u"rechazados a los que les falta menos de PORCENTAJE "
+                        u"(del rango de cada requisito) para aprobar")
+    args = parser.parse_args(argv)
+
+    if (args.checkpoint is not None and args.mejores > 0):
+        parser.error(u"las opciones --checkpoint y --mejores no se pueden "
+                     u"usar juntas")
+
+    if (args.checkpoint is not None and args.cuarentena is not None):
+        parser.error(u"las opciones --checkpoint y --cuarentena no se pueden "
+                     u"usar juntas")
+
+    if (args.casi_aprobados is not None and
+            (args.checkpoint is not None or args.mejores > 0)):
+        parser.error(u"la opción --casi-aprobados no se puede usar con "
+                     u"--checkpoint ni con --mejores")
+
+    if (args.casi_aprobados is not None and args.casi_aprobados < 0):
+        parser.error(u"el porcentaje de --casi-aprobados no puede ser "
+                     u"negativo")
+
+    if (args.checkpoint is not None):
+        ejecucion = EjecucionIncremental(args.caso, args.solicitantes,
+                                         args.checkpoint)
+        n_solicitantes, n_aprobados, completa = ejecucion.ejecutar(
+            args.salida, args.formato, args.cache)
+        print(u"Solicitantes: " + str(n_solicitantes) +
+              u" - Aprobados: " + str(n_aprobados) +
+              (u" (valoración completa)" if completa else u""),
+              file=sys.stderr)
+        return
+
+    caso = Caso()
+    caso.load_from_JSON_file(args.caso)
+
+    if (args.cuarentena is not None):
+        informe = validar_solicitantes_CSV(args.solicitantes, caso)
+        cuarentena = abrir_salida(args.cuarentena)
+        try:
+            informe.escribir_cuarentena(cuarentena)
+        finally:
+            cuarentena.flush()
+            if (args.cuarentena != u"-"):
+                cuarentena.close()
+        print(u"Solicitantes en cuarentena: " +
+              str(len(informe.posiciones_invalidas)) + u"/" +
+              str(informe.n_solicitantes), file=sys.stderr)
+        solicitantes = informe.validos()
+    elif (args.casi_aprobados is not None):
+        informe = validar_solicitantes_CSV(args.solicitantes, caso)
+    else:
+        solicitantes = leer_solicitantes_CSV(args.solicitantes, caso)
+
+    salida = abrir_salida(args.salida)
+
+    if (args.casi_aprobados is not None):
+        try:
+            n_casi_aprobados = escribir_casi_aprobados(
+                caso, informe, salida, args.casi_aprobados / 100.0)
+        finally:
+            salida.flush()
+            if (args.salida != u"-"):
+                salida.close()
+        print(u"Rechazados por menos del " + u"%g" % args.casi_aprobados +
+              u"%: " + str(n_casi_aprobados), file=sys.stderr)
+        return
+
+    cache = None
+    if (args.cache > 0):
+        cache = CacheValoraciones(caso, args.cache)
+
+    try:
+        if (args.mejores > 0):
+            for puntuacion, identificador in mejores_solicitantes(
+                    caso, solicitantes, args.mejores, cache):
+                salida.write(unicode(identificador) + u"\t" +
+                             unicode(puntuacion) + u"\n")
+        else:
+            n_solicitantes, n_aprobados = escribir_explicaciones(
+                caso, solicitantes, salida, args.formato, cache)
+            print(u"Solicitantes: " + str(n_solicitantes) +
+                  u" - Aprobados: " + str(n_aprobados), file=sys.stderr)
+
+        if (cache is not None):
+            print(u"Caché: " + str(cache.n_aciertos) + u" aciertos, " +
+                  str(cache.n_fallos) + u" fallos (" +
+                  u"%.1f" % (100 * cache.tasa_aciertos) + u"%)",
+                  file=sys.stderr)
+    finally:
+        salida.flush()
+        if (args.salida != u"-"):
+            salida.close()
+
+
+if __name__ == "__main__":
+    """
+    Valoración de lotes desde la línea de comandos.
+    """
+    main()
@@ -8,10 +8,29 @@ Autor: Andrés Salinas Lima <i52salia@uco.es>.
 """
 
 from __future__ import print_function
-from valorador_view import ValoradorMessageBoxes
+from valorador_expresiones import Expresion
 import sys
 import os
+import io
+import re
 import json
+import bisect
+import hashlib
+import numbers
+import datetime
+import threading
+import collections
+
+# Compatibilidad con Python 3 (donde todos los strings son unicode).
+try:
+    unicode
+except NameError:
+    unicode = str
+
+
+# Clave "descripcion" de un JSON seguida de su valor (grupo 1).
+_DESCRIPCION_JSON = re.compile(br'"descripcion"\s*:\s*("(?:[^"\\]|\\.)*")',
+                               re.DOTALL)
 
 
 class ValoradorModel():
@@ -32,19 +51,57 @@ class Caso(object):
     """
     Representa un caso (contiene los requisitos a valorar).
 
+    Argumentos constructor:
+        textos: (opcional) Reserva de textos compartidos (objeto de la clase
+                ReservaTextos) en la que se guardan los textos del caso al
+                cargarlo (por defecto, la reserva TEXTOS, compartida por todos
+                los casos).
+
     Atributos/Propiedades:
         nombre: String con el nombre del caso.
         descripcion: String con la descripción del caso.
         explicacion: String con la explicación del resultado de la valoración.
-        requisitos: Los requisitos a evaluar (array con objetos de la clase
-                   Requisito).
+        requisitos: Los requisitos a los que hay que dar valor (array con
+                    objetos de la clase Requisito). Incluye los requisitos que
+                    forman parte de algún grupo, pero no los grupos.
+        requisitos_raiz: Los requisitos del primer nivel del caso, que son los
+                         que se evalúan al valorarlo (array con objetos de la
+                         clase Requisito, que pueden ser grupos).
+        resultados: Resultado de cada requisito del primer nivel en la última
+                    valoración (True, False o None si no se llegó a evaluar).
+        tasas_rechazo: Proporción estimada de valoraciones en las que ha sido
+                       rechazado cada requisito del primer nivel.
+        puntuacion: Criterios de la puntuación opcional del caso (array con
+                    tuplas (requisito, peso, invertir)).
+        definicion: Definición inmutable del caso (objeto de la clase
+                    DefinicionCaso) para valorar solicitantes con registros
+                    de valores propios en lugar de con el valor de los
+                    requisitos.
+        textos: Reserva de textos compartidos del caso.
     """
 
-    def __init__(self):
+    # Número de valoraciones rápidas entre dos reordenaciones de los
+    # requisitos según su selectividad.
+    _INTERVALO_REORDENACION = 64
+
+    # Tamaño (en bytes) a partir del cual los ficheros de caso se cargan por
+    # defecto con las descripciones diferidas.
+    TAM_DESCRIPCIONES_DIFERIDAS = 16 * 1024 * 1024
+
+    def __init__(self, textos=None):
+        self._textos = TEXTOS if textos is None else textos
         self._nombre = ""
         self._descripcion = ""
         self._explicacion = ""
         self._requisitos = []
+        self._requisitos_raiz = []
+        self._definiciones = []
+        self._resultados = []
+        self._puntuacion = []
+        self._definicion = None
+        self._descripciones_diferidas = None
+        self._fichero_descripciones = None
+        self._reset_estadisticas()
 
     @property
     def nombre(self):
@@ -58,7 +115,7 @@ class Caso(object):
         """
         Getter de la propiedad descripcion.
         """
-        return self._descripcion
+        return _texto(self._descripcion)
 
     @property
     def explicacion(self):
@@ -74,6 +131,63 @@ class Caso(object):
         """
         return self._requisitos
 
+    @property
+    def requisitos_raiz(self):
+        """
+        Getter de la propiedad requisitos_raiz.
+        """
+        return self._requisitos_raiz
+
+    @property
+    def resultados(self):
+        """
+        Getter de la propiedad resultados.
+        """
+        return self._resultados
+
+    @property
+    def tasas_rechazo(self):
+        """
+        Getter de la propiedad tasas_rechazo.
+
+        Se usa la regla de sucesión de Laplace para que los requisitos aún no
+        evaluados no tengan tasa 0.
+        """
+        return [(float(rechazos) + 1) / (evaluaciones + 2)
+                for rechazos, evaluaciones
+                in zip(self._rechazos, self._evaluaciones)]
+
+    @property
+    def puntuacion(self):
+        """
+        Getter de la propiedad puntuacion.
+        """
+        return [(requisito, peso, invertir)
+                for requisito, peso, invertir, _, _ in self._puntuacion]
+
+    @property
+    def definicion(self):
+        """
+        Getter de la propiedad definicion.
+
+        La definición se crea la primera vez que se pide después de cargar el
+        caso; si el caso se vuelve a cargar, las definiciones anteriores no
+        cambian (se crea una nueva).
+        """
+        if (self._definicion is None):
+            self._definicion = DefinicionCaso(
+                self._nombre, self._descripcion, self._requisitos,
+                self._requisitos_raiz, self._puntuacion)
+
+        return self._definicion
+
+    @property
+    def textos(self):
+        """
+        Getter de la propiedad textos.
+        """
+        return self._textos
+
     def __str__(self):
         """
         Devuelve la representación en string del objeto (para usar con print).
@@ -82,13 +196,24 @@ class Caso(object):
                 u"\n- DESCRIPCIÓN: " + unicode(self.descripcion) +
                 u"\n- NÚMERO DE REQUISITOS: " + str(len(self.requisitos)))
 
-    def load_from_JSON_file(self, file_path):
+    def load_from_JSON_file(self, file_path, descripciones_diferidas=None):
         """
         Carga el caso y todos sus requisitos a partir de un fichero JSON con el
         formato adecuado.
 
+        Con las descripciones diferidas, de las descripciones largas solo se
+        guarda su posición en el fichero y se leen cuando se necesitan (al
+        mostrarlas o al generar una explicación), lo que reduce mucho la
+        memoria ocupada por los casos con miles de requisitos y descripciones
+        extensas.
+
         Argumentos:
             file_path: Ruta hacia el fichero.
+            descripciones_diferidas: (opcional) True para diferir la lectura
+                                     de las descripciones, False para
+                                     cargarlas enteras (por defecto, se
+                                     difieren si el fichero ocupa al menos
+                                     TAM_DESCRIPCIONES_DIFERIDAS bytes).
 
         Excepciones:
             IOError: El fichero JSON no tiene el formato correcto.
@@ -96,43 +221,249 @@ class Caso(object):
         # Primero reinicializamos el caso
         self._full_reset()
 
-        parsed_json = self._parse_JSON_file(file_path)
+        self._descripciones_diferidas = descripciones_diferidas
+
+        try:
+            if (descripciones_diferidas is None):
+                descripciones_diferidas = (os.path.getsize(file_path) >=
+                                           self.TAM_DESCRIPCIONES_DIFERIDAS)
+        except OSError:
+            raise IOError(u"Error al abrir el fichero JSON!")
+
+        if (descripciones_diferidas):
+            parsed_json = self._parse_JSON_file_diferido(file_path)
+            self._fichero_descripciones = file_path
+        else:
+            parsed_json = self._parse_JSON_file(file_path)
 
         try:
             # Cargamos los datos del caso
-            self._nombre = parsed_json['caso']['nombre']
-            self._descripcion = parsed_json['caso']['descripcion']
+            self._nombre = self._textos.compartir(
+                parsed_json['caso']['nombre'])
+            self._descripcion = self._cargar_descripcion(parsed_json['caso'])
 
             # Cargamos los datos de cada requisito dependiendo de su tipo
             for requisito in parsed_json['caso']['requisitos']:
-                if (requisito['tipo'] == "Booleano"):
-                    x = RequisitoBooleano(requisito['nombre'],
-                                          requisito['descripcion'],
-                                          requisito['valor_deseado'])
-                    self.requisitos.append(x)
-
-                elif (requisito['tipo'] == "Porcentaje"):
-                    x = RequisitoPorcentaje(requisito['nombre'],
-                                            requisito['descripcion'],
-                                            float(requisito['valor_minimo']),
-                                            float(requisito['valor_maximo']))
-                    self.requisitos.append(x)
-
-                elif (requisito['tipo'] == "Numero"):
-                    x = RequisitoNumero(requisito['nombre'],
-                                        requisito['descripcion'],
-                                        float(requisito['valor_minimo']),
-                                        float(requisito['valor_maximo']))
-                    self.requisitos.append(x)
+                self.requisitos_raiz.append(self._crear_requisito(requisito))
+
+            # Enlazamos los requisitos del tipo Expresion con los requisitos
+            # de los que dependen
+            self._vincular_expresiones()
+
+            # Cargamos los criterios de la puntuación (opcional)
+            for criterio in parsed_json['caso'].get('puntuacion', []):
+                self._puntuacion.append(self._crear_criterio(criterio))
+
+            self._reset_estadisticas()
         except:
             self._full_reset()
             raise IOError(u"El fichero JSON no tiene el formato correcto!")
+        finally:
+            self._fichero_descripciones = None
 
         # Comprobamos que todos los requisitos se han cargado
-        if (len(self.requisitos) != len(parsed_json['caso']['requisitos'])):
+        if (len(self.requisitos_raiz) !=
+                len(parsed_json['caso']['requisitos'])):
             self._full_reset()
             raise IOError(u"El fichero JSON no tiene el formato correcto!")
 
+        # Liberamos los textos del caso anterior que ya no usa nadie
+        del parsed_json
+        self._textos.purgar()
+
+    def reload_from_JSON_file(self, file_path):
+        """
+        Vuelve a cargar el caso desde su fichero JSON (por ejemplo, después de
+        que haya sido modificado) conservando el valor de los requisitos cuya
+        definición no ha cambiado.
+
+        Si el fichero no es válido, el caso no se modifica.
+
+        Argumentos:
+            file_path: Ruta hacia el fichero.
+
+        Devuelve:
+            Lista con la posición (en la lista requisitos) de los requisitos
+            nuevos o cuya definición o posición ha cambiado.
+
+        Excepciones:
+            IOError: El fichero JSON no tiene el formato correcto.
+        """
+        nuevo = Caso(self._textos)
+        nuevo.load_from_JSON_file(file_path, self._descripciones_diferidas)
+
+        anteriores = dict((requisito.nombre, (definicion, requisito.valor))
+                          for requisito, definicion
+                          in zip(self.requisitos, self._definiciones))
+
+        modificados = []
+
+        for i, (requisito, definicion) in enumerate(
+                zip(nuevo.requisitos, nuevo._definiciones)):
+            if (i >= len(self.requisitos) or
+                    self._definiciones[i] != definicion):
+                modificados.append(i)
+
+            definicion_anterior, valor = anteriores.get(requisito.nombre,
+                                                        (None, None))
+
+            if (definicion_anterior == definicion and valor is not None and
+                    requisito.tipo != "Expresion"):
+                requisito.valor = valor
+
+        self._nombre = nuevo._nombre
+        self._descripcion = nuevo._descripcion
+        self._requisitos = nuevo._requisitos
+        self._requisitos_raiz = nuevo._requisitos_raiz
+        self._definiciones = nuevo._definiciones
+        self._puntuacion = nuevo._puntuacion
+        self._definicion = None
+        self._explicacion = u""
+        self._resultados = []
+        self._reset_estadisticas()
+
+        # Liberamos los textos de la definición anterior que ya no usa nadie
+        anteriores = definicion_anterior = None
+        self._textos.purgar()
+
+        return modificados
+
+    def _crear_requisito(self, requisito):
+        """
+        Crea un requisito (o un grupo de requisitos, recursivamente) a partir
+        de su definición en el JSON, con el parser de la clase registrada para
+        su tipo (ver registrar_tipo).
+
+        Los requisitos que no son grupos se añaden también a la lista
+        requisitos del caso.
+
+        Argumentos:
+            requisito: Diccionario con la definición del requisito.
+
+        Excepciones:
+            ValueError: El tipo del requisito no es válido.
+        """
+        # Los textos de la definición (que se guarda) se comparten con los
+        # de los demás requisitos y casos (la descripción, al cargarla)
+        requisito = dict((self._textos.compartir(clave),
+                          self._textos.compartir(valor)
+                          if (isinstance(valor, unicode) and
+                              clave != 'descripcion') else valor)
+                         for clave, valor in requisito.items())
+
+        clase = TIPOS_REQUISITO.get(requisito['tipo'])
+
+        if (clase is None):
+            raise ValueError(u"El tipo de requisito \"" + requisito['tipo'] +
+                             u"\" no es válido!")
+
+        self._cargar_descripcion(requisito)
+        x = clase.desde_JSON(requisito, self._crear_requisito)
+
+        if (isinstance(x, RequisitoGrupo)):
+            return x
+
+        self.requisitos.append(x)
+        self._definiciones.append(requisito)
+
+        return x
+
+    def _cargar_descripcion(self, definicion):
+        """
+        Devuelve la descripción de un caso o de un requisito a partir de su
+        definición en el JSON (sustituida también en la definición): el texto
+        (guardado en la reserva de textos) o, si se ha diferido su lectura, un
+        objeto DescripcionDiferida.
+
+        Argumentos:
+            definicion: Diccionario con la definición.
+        """
+        descripcion = definicion['descripcion']
+
+        if (self._fichero_descripciones is not None and
+                descripcion.startswith(DescripcionDiferida.MARCA)):
+            inicio, fin, resumen = descripcion[
+                len(DescripcionDiferida.MARCA):].split(u":")
+            descripcion = DescripcionDiferida(self._fichero_descripciones,
+                                              int(inicio), int(fin), resumen)
+        else:
+            # Las diferidas no se comparten: dos con el mismo texto pueden
+            # estar en posiciones distintas (p. ej. tras editar el fichero)
+            descripcion = self._textos.compartir(descripcion)
+
+        definicion['descripcion'] = descripcion
+
+        return descripcion
+
+    def _crear_criterio(self, criterio):
+        """
+        Crea un criterio de la puntuación del caso a partir de su definición
+        en el JSON.
+
+        Argumentos:
+            criterio: Diccionario con el nombre del requisito, su peso y
+                      (opcionalmente) si hay que invertir su valor.
+
+        Excepciones:
+            ValueError: El requisito no existe o no tiene un rango numérico.
+        """
+        requisitos_por_nombre = dict((requisito.nombre, requisito)
+                                     for requisito in self.requisitos)
+
+        if (criterio['requisito'] not in requisitos_por_nombre):
+            raise ValueError(u"El requisito \"" + criterio['requisito'] +
+                             u"\" no existe!")
+
+        requisito = requisitos_por_nombre[criterio['requisito']]
+
+        if (not requisito.NUMERICO or
+                not isinstance(requisito, RequisitoRango)):
+            raise ValueError(u"El requisito \"" + requisito.nombre +
+                             u"\" no se puede usar en la puntuación!")
+
+        return (requisito,
+                float(criterio['peso']),
+                bool(criterio.get('invertir', False)),
+                requisito.valor_minimo,
+                float(requisito.valor_maximo - requisito.valor_minimo))
+
+    def _vincular_expresiones(self):
+        """
+        Enlaza cada requisito del tipo Expresion con los requisitos de los que
+        depende y comprueba que no haya dependencias circulares.
+
+        Excepciones:
+            ValueError: Una expresión depende de un requisito que no existe o
+                        de sí misma (directa o indirectamente).
+        """
+        requisitos_por_nombre = dict((requisito.nombre, requisito)
+                                     for requisito in self.requisitos)
+
+        expresiones = [requisito for requisito in self.requisitos
+                       if requisito.tipo == "Expresion"]
+
+        for requisito in expresiones:
+            requisito.vincular(requisitos_por_nombre)
+
+        # Recorrido en profundidad para detectar ciclos
+        visitados = set()
+
+        def visitar(requisito, camino):
+            if (id(requisito) in camino):
+                raise ValueError(u"El requisito \"" + requisito.nombre +
+                                 u"\" depende de sí mismo!")
+            if (id(requisito) in visitados):
+                return
+            camino.add(id(requisito))
+            for operando in requisito.operandos:
+                if (operando.tipo == "Expresion"):
+                    visitar(operando, camino)
+            camino.remove(id(requisito))
+            visitados.add(id(requisito))
+
+        for requisito in expresiones:
+            visitar(requisito, set())
+
     def _parse_JSON_file(self, file_path):
         """
         Lee y parsea un fichero JSON.
@@ -144,7 +475,7 @@ class Caso(object):
             IOError: Error al abrir el fichero JSON.
         """
         try:
-            with open(file_path, 'r') as f:
+            with io.open(file_path, 'r', encoding='utf-8') as f:
                 parsed_json = json.load(f)
                 f.close()
         except:
@@ -152,6 +483,42 @@ class Caso(object):
 
         return parsed_json
 
+    def _parse_JSON_file_diferido(self, file_path):
+        """
+        Lee y parsea un fichero JSON sustituyendo antes cada descripción larga
+        por una marca con su posición en el fichero (así los textos largos no
+        llegan a cargarse en memoria).
+
+        Argumentos:
+            file_path: Ruta hacia el fichero.
+
+        Excepciones:
+            IOError: Error al abrir el fichero JSON.
+        """
+        def marcar(encontrado):
+            inicio, fin = encontrado.span(1)
+            if (fin - inicio < DescripcionDiferida.LONGITUD_MINIMA):
+                return encontrado.group(0)
+
+            marca = json.dumps(DescripcionDiferida.MARCA + u"%d:%d:%s" % (
+                inicio, fin, DescripcionDiferida.resumir(encontrado.group(1))))
+
+            return (encontrado.group(0)[:inicio - encontrado.start()] +
+                    marca.encode('ascii'))
+
+        try:
+            with io.open(file_path, 'rb') as f:
+                datos = f.read()
+
+            # En UTF-8 las comillas y las barras invertidas nunca forman parte
+            # de un carácter multibyte, así que se buscan en los bytes
+            datos = _DESCRIPCION_JSON.sub(marcar, datos)
+            parsed_json = json.loads(datos.decode('utf-8'))
+        except:
+            raise IOError(u"Error al abrir el fichero JSON!")
+
+        return parsed_json
+
     def _full_reset(self):
         """
         Reinicializa el caso completamente (elimina todo, incluido los
@@ -160,7 +527,36 @@ class Caso(object):
         self._nombre = ""
         self._descripcion = ""
         self._requisitos = []
+        self._requisitos_raiz = []
+        self._definiciones = []
         self._explicacion = ""
+        self._resultados = []
+        self._puntuacion = []
+        self._definicion = None
+        self._reset_estadisticas()
+
+    def _reset_estadisticas(self):
+        """
+        Reinicializa las estadísticas de rechazo de los requisitos y el orden
+        de evaluación de la valoración rápida (de menor a mayor coste).
+        """
+        n_requisitos = len(self.requisitos_raiz)
+
+        self._evaluaciones = [0] * n_requisitos
+        self._rechazos = [0] * n_requisitos
+        self._n_valoraciones_rapidas = 0
+        self._orden = sorted(range(n_requisitos),
+                             key=lambda i: self.requisitos_raiz[i].coste)
+
+    def _reordenar(self):
+        """
+        Ordena los requisitos de la valoración rápida para evaluar primero los
+        más selectivos: los que más rechazan por unidad de coste.
+        """
+        tasas_rechazo = self.tasas_rechazo
+
+        self._orden.sort(key=lambda i: -tasas_rechazo[i] /
+                         self.requisitos_raiz[i].coste)
 
     def reset(self):
         """
@@ -168,73 +564,297 @@ class Caso(object):
         requisitos).
         """
         self._explicacion = ""
+        self._resultados = []
 
         for requisito in self.requisitos:
             requisito.reset()
 
-    def valorar(self):
+    def asignar_valores(self, valores):
+        """
+        Asigna de una vez el valor de todos los requisitos del caso (por
+        ejemplo, los de un solicitante de un lote).
+
+        Argumentos:
+            valores: Secuencia con el valor de cada requisito, en el mismo
+                     orden que la propiedad requisitos. Los requisitos con
+                     valor None se reinicializan (los requisitos del tipo
+                     Expresion siempre deben llevar None).
+        """
+        for requisito, valor in zip(self.requisitos, valores):
+            if (valor is None):
+                requisito.reset()
+            else:
+                requisito.valor = valor
+
+    def solicitante_actual(self):
+        """
+        Devuelve un registro (objeto de la clase ValoresSolicitante) de la
+        definición del caso con los valores asignados ahora mismo a los
+        requisitos.
+        """
+        return ValoresSolicitante(
+            self.definicion, [None if requisito.tipo == "Expresion"
+                              else requisito.valor
+                              for requisito in self.requisitos])
+
+    def puntuar(self):
+        """
+        Calcula la puntuación del caso con los valores actuales de los
+        requisitos: la suma ponderada de los valores normalizados (0 en
+        valor_minimo y 1 en valor_maximo, o al revés si el criterio indica
+        invertir) de los requisitos de la puntuación.
+
+        Excepciones:
+            RuntimeError: El caso no tiene definida una puntuación.
+            RuntimeError: Los requisitos de la puntuación deben tener un valor
+                          asignado.
+        """
+        return _puntuar(self._puntuacion)
+
+    def valorar(self, rapido=False, explicar_rechazados=False, explicar=True):
         """
-        Evalúa todos los requisitos, devuelve el resultado de la valoración y
-        actualiza el atributo explicacion con la explicación del resultado.
+        Evalúa todos los requisitos del primer nivel (los grupos solo evalúan
+        los requisitos necesarios para decidir su resultado), devuelve el
+        resultado de la valoración y actualiza el atributo explicacion con la
+        explicación del resultado.
+
+        En el modo rápido solo interesa el resultado: la valoración se detiene
+        en el primer requisito rechazado, no se genera la explicación y los
+        requisitos se evalúan en el orden que más rápido suele rechazar
+        (según las estadísticas de las valoraciones anteriores).
+
+        Argumentos:
+            rapido: (opcional) True para usar el modo rápido.
+            explicar_rechazados: (opcional) True para repetir la valoración
+                                 completa (con explicación) cuando el modo
+                                 rápido rechaza el caso. La repetición no
+                                 vuelve a contar el caso en las estadísticas
+                                 de rechazo.
+            explicar: (opcional) False para no generar la explicación en la
+                      valoración completa (se siguen evaluando todos los
+                      requisitos y actualizando los resultados; la
+                      explicación se puede generar después con
+                      generar_explicacion).
 
         Excepciones:
             RuntimeError: El caso debe tener al menos un requisito para poder ser
             valorado.
         """
-        n_requisitos = len(self.requisitos)
+        n_requisitos = len(self.requisitos_raiz)
 
         if(n_requisitos == 0):
             raise RuntimeError(
                 u"El caso debe tener al menos un requisito para poder ser "
                 "valorado!")
 
+        if(not rapido):
+            return self._valorar_completo(True, explicar)
+
+        if(self._valorar_rapido()):
+            return True
+
+        if(explicar_rechazados):
+            return self._valorar_completo(False, explicar)
+
+        return False
+
+    def _valorar_rapido(self):
+        """
+        Evalúa los requisitos del primer nivel hasta encontrar uno rechazado y
+        actualiza sus estadísticas de rechazo.
+        """
+        requisitos = self.requisitos_raiz
+
+        self._explicacion = u""
+        self._resultados = [None] * len(requisitos)
+
+        self._n_valoraciones_rapidas += 1
+        if(self._n_valoraciones_rapidas % self._INTERVALO_REORDENACION == 0):
+            self._reordenar()
+
+        for i in self._orden:
+            requisito_result = requisitos[i].valorar()
+            self._resultados[i] = requisito_result
+            self._evaluaciones[i] += 1
+
+            if(not requisito_result):
+                self._rechazos[i] += 1
+                return False
+
+        return True
+
+    def _valorar_completo(self, actualizar_estadisticas, explicar=True):
+        """
+        Evalúa todos los requisitos del primer nivel y genera la explicación.
+
+        Argumentos:
+            actualizar_estadisticas: True para tener en cuenta el resultado en
+                                     las estadísticas de rechazo.
+            explicar: (opcional) False para no generar la explicación.
+        """
         result = True
         self._explicacion = u""
-        i = 1
+        self._resultados = []
 
-        for requisito in self.requisitos:
-            self._explicacion += (
-                u"*** Requisito " + str(i) + u"/" +
-                str(n_requisitos) + u" ***\n"
-                + unicode(requisito)
-                + u"\n* VALOR INTRODUCIDO: " + unicode(requisito.valor))
-
-            if(requisito.valorar()):
-                self._explicacion += u"\n===> APROBADO <===\n\n"
-            else:
-                self._explicacion += u"\n===> RECHAZADO <===\n\n"
-                result = False
+        for i, requisito in enumerate(self.requisitos_raiz):
+            requisito_result = requisito.valorar()
+            self._resultados.append(requisito_result)
 
-            i += 1
+            if(actualizar_estadisticas):
+                self._evaluaciones[i] += 1
+                if(not requisito_result):
+                    self._rechazos[i] += 1
+
+            result = result and requisito_result
+
+        if(explicar):
+            self._explicacion = u"".join(self.generar_explicacion())
 
         return result
 
+    def explicar_resultados(self, resultados):
+        """
+        Devuelve la explicación de unos resultados ya conocidos (por ejemplo,
+        guardados tras una valoración anterior) con los valores actuales de los
+        requisitos, sin volver a valorar el caso. Solo se vuelven a evaluar los
+        grupos, para saber qué requisitos decidieron su resultado.
 
-class Requisito(object):
+        Argumentos:
+            resultados: Lista con el resultado de cada requisito del primer
+                        nivel (ver la propiedad resultados).
+        """
+        for requisito, requisito_result in zip(self.requisitos_raiz,
+                                               resultados):
+            if(requisito.tipo == "Grupo" and requisito_result is not None):
+                requisito.valorar()
+
+        self._resultados = list(resultados)
+        self._explicacion = u"".join(self.generar_explicacion())
+
+        return self._explicacion
+
+    def generar_explicacion(self):
+        """
+        Genera (generador) la explicación de la última valoración completa
+        fragmento a fragmento, para poder escribirla directamente en un fichero
+        sin construirla entera en memoria.
+        """
+        return _generar_explicacion(self.requisitos_raiz, self._resultados)
+
+
+def _puntuar(puntuacion, solicitante=None):
     """
-    Clase base para representar los requisitos.
+    Calcula la puntuación de un caso (ver Caso.puntuar).
+
+    Argumentos:
+        puntuacion: Lista con los criterios de la puntuación (tuplas
+                    (requisito, peso, invertir, minimo, rango)).
+        solicitante: (opcional) Registro (objeto de la clase
+                     ValoresSolicitante) con los valores a puntuar (por
+                     defecto, el valor asignado a cada requisito).
+
+    Excepciones:
+        RuntimeError: El caso no tiene definida una puntuación.
+        RuntimeError: Los requisitos de la puntuación deben tener un valor
+                      asignado.
+    """
+    if (len(puntuacion) == 0):
+        raise RuntimeError(u"El caso no tiene definida una puntuación!")
+
+    total = 0.0
+
+    for requisito, peso, invertir, minimo, rango in puntuacion:
+        valor = requisito._valor_de(solicitante)
+
+        if (valor is None):
+            raise RuntimeError(u"El requisito \"" + requisito.nombre +
+                               u"\" debe tener un valor asignado!")
+
+        if (rango > 0):
+            normalizado = min(max((valor - minimo) / rango, 0.0), 1.0)
+        else:
+            normalizado = 1.0
+
+        if (invertir):
+            normalizado = 1.0 - normalizado
+
+        total += peso * normalizado
+
+    return total
 
-    Esta clase no debe ser instanciada; es solo una interfaz (clase base
-    abstracta).
+
+def _generar_explicacion(requisitos_raiz, resultados, solicitante=None):
+    """
+    Genera (generador) la explicación de una valoración fragmento a fragmento
+    (ver Caso.generar_explicacion).
+
+    Argumentos:
+        requisitos_raiz: Lista con los requisitos del primer nivel del caso.
+        resultados: Lista con el resultado de cada requisito del primer nivel.
+        solicitante: (opcional) Registro (objeto de la clase
+                     ValoresSolicitante) con los valores valorados (por
+                     defecto, el valor asignado a cada requisito).
+    """
+    n_requisitos = len(requisitos_raiz)
+    i = 1
+
+    for requisito, requisito_result in zip(requisitos_raiz, resultados):
+        yield (u"*** Requisito " + str(i) + u"/" +
+               str(n_requisitos) + u" ***\n"
+               + unicode(requisito))
+
+        if(requisito_result is None):
+            yield u"\n===> NO EVALUADO <===\n\n"
+        elif(requisito_result):
+            yield (requisito.explicar_valoracion(solicitante) +
+                   u"\n===> APROBADO <===\n\n")
+        else:
+            yield (requisito.explicar_valoracion(solicitante) +
+                   requisito.explicar_margen(solicitante) +
+                   u"\n===> RECHAZADO <===\n\n")
+
+        i += 1
+
+
+class DefinicionCaso(object):
+    """
+    Definición inmutable de un caso: sus requisitos y su puntuación, sin los
+    valores de ningún solicitante (se obtiene con la propiedad definicion de
+    un objeto Caso).
+
+    La definición no se modifica al valorar: los valores de cada solicitante,
+    sus resultados y su explicación se guardan en un registro propio (objeto
+    de la clase ValoresSolicitante). Así, varios hilos (o varias ventanas)
+    pueden valorar a la vez solicitantes distintos con la misma definición,
+    sin copiarla y sin bloqueos.
 
     Argumentos constructor:
-        nombre: String con el nombre del requisito.
-        descripcion: String con la descripción del requisito.
+        nombre: String con el nombre del caso.
+        descripcion: String con la descripción del caso.
+        requisitos: Lista con los requisitos a los que hay que dar valor (ver
+                    Caso.requisitos).
+        requisitos_raiz: Lista con los requisitos del primer nivel.
+        puntuacion: Lista con los criterios de la puntuación (tuplas
+                    (requisito, peso, invertir, minimo, rango)).
 
     Atributos/Propiedades:
-        nombre: String con el nombre del requisito.
-        descripcion: String con la descripción del requisito.
-        tipo: String con el tipo del requisito ("Booleano", "Porcentaje" o
-              "Numero").
-        valor: Valor actualmente asignado al requisito (su tipo dependerá del
-               tipo de requisito). El requisito será evaluado en base a este
-               valor.
+        nombre: String con el nombre del caso.
+        descripcion: String con la descripción del caso.
+        requisitos: Tupla con los requisitos a los que hay que dar valor.
+        requisitos_raiz: Tupla con los requisitos del primer nivel.
+        puntuacion: Criterios de la puntuación (tupla con tuplas (requisito,
+                    peso, invertir)).
     """
 
-    def __init__(self, nombre, descripcion):
+    def __init__(self, nombre, descripcion, requisitos, requisitos_raiz,
+                 puntuacion):
         self._nombre = nombre
         self._descripcion = descripcion
-        self._valor = None
+        self._requisitos = tuple(requisitos)
+        self._requisitos_raiz = tuple(requisitos_raiz)
+        self._puntuacion = tuple(puntuacion)
+        self._indices = dict((requisito, i) for i, requisito
+                             in enumerate(self._requisitos))
 
     @property
     def nombre(self):
@@ -248,332 +868,2637 @@ class Requisito(object):
         """
         Getter de la propiedad descripcion.
         """
-        return self._descripcion
+        return _texto(self._descripcion)
 
     @property
-    def valor(self):
+    def requisitos(self):
         """
-        Getter de la propiedad valor.
+        Getter de la propiedad requisitos.
         """
-        return self._valor
+        return self._requisitos
 
-    @valor.setter
-    def valor(self, valor):
+    @property
+    def requisitos_raiz(self):
         """
-        Setter de la propiedad valor.
-
-        Deberá ser implementado por la clase heredera.
-
-        Argumentos:
-            valor: El valor del requisito.
+        Getter de la propiedad requisitos_raiz.
         """
-        raise NotImplementedError
+        return self._requisitos_raiz
 
     @property
-    def tipo(self):
+    def puntuacion(self):
         """
-        Getter de la propiedad tipo.
-
-        Deberá ser implementado por la clase heredera.
+        Getter de la propiedad puntuacion.
         """
-        raise NotImplementedError
+        return tuple((requisito, peso, invertir)
+                     for requisito, peso, invertir, _, _ in self._puntuacion)
 
-    def __str__(self):
-        """
-        Devuelve la representación en string del objeto (para usar con print).
+    def indice(self, requisito):
         """
-        return (u"- NOMBRE: " + unicode(self.nombre) +
-                u"\n- DESCRIPCIÓN: " + unicode(self.descripcion) +
-                u"\n- TIPO: " + unicode(self.tipo))
+        Devuelve la posición de un requisito en la tupla requisitos.
+
+        Argumentos:
+            requisito: El requisito (objeto de la clase Requisito).
 
-    def valorar(self):
+        Excepciones:
+            ValueError: El requisito no es de este caso (o es un grupo).
         """
-        Evalúa el requisito y devuelve True o False según corresponda.
+        try:
+            return self._indices[requisito]
+        except KeyError:
+            raise ValueError(u"El requisito \"" + requisito.nombre +
+                             u"\" no tiene valor en este caso!")
 
-        Deberá ser implementado por la clase heredera.
+    def nuevo_solicitante(self, valores=None):
         """
-        raise NotImplementedError
+        Devuelve un registro (objeto de la clase ValoresSolicitante) para los
+        valores de un solicitante.
 
-    def reset(self):
+        Argumentos:
+            valores: (opcional) Secuencia con el valor de cada requisito (ver
+                     Caso.asignar_valores).
         """
-        Reinicializa el valor del requisito.
+        return ValoresSolicitante(self, valores)
+
+    def valorar(self, solicitante, explicar=True):
         """
-        self._valor = None
+        Valora un solicitante (como Caso.valorar en el modo completo) y guarda
+        en su registro los resultados y la explicación.
 
+        Argumentos:
+            solicitante: Registro (objeto de la clase ValoresSolicitante) con
+                         los valores del solicitante.
+            explicar: (opcional) False para no generar la explicación.
 
-class RequisitoBooleano(Requisito):
+        Devuelve:
+            El resultado de la valoración.
+
+        Excepciones:
+            RuntimeError: El caso debe tener al menos un requisito para poder
+                          ser valorado.
+            RuntimeError: Alguno de los requisitos evaluados no tiene valor.
+            RuntimeError: La valoración ha sido cancelada (ver
+                          ValoresSolicitante.cancelar).
+        """
+        if(len(self._requisitos_raiz) == 0):
+            raise RuntimeError(
+                u"El caso debe tener al menos un requisito para poder ser "
+                u"valorado!")
+
+        solicitante._reset_valoracion()
+
+        resultados = []
+        for requisito in self._requisitos_raiz:
+            solicitante._comprobar_cancelado()
+            resultados.append(requisito.valorar(solicitante))
+
+        solicitante._resultados = resultados
+        if(explicar):
+            solicitante._explicacion = u"".join(
+                self.generar_explicacion(solicitante))
+
+        return all(resultados)
+
+    def valorar_columnas(self, columnas):
+        """
+        Valora de una vez un lote de solicitantes dado por columnas (una por
+        requisito), sin crear un registro por solicitante: cada requisito
+        comprueba su columna entera con su método cumple_lote, los grupos
+        combinan las columnas de resultados de sus requisitos y las
+        expresiones se calculan fila a fila a partir de las columnas de sus
+        operandos.
+
+        A diferencia de valorar, un valor que falta no es un error: el
+        resultado de ese requisito es None (indeterminado) y se propaga a los
+        grupos y al caso solo si el resultado depende de él.
+
+        Argumentos:
+            columnas: Secuencia con la columna de valores de cada requisito,
+                      en el orden de requisitos (las columnas de los
+                      requisitos del tipo Expresion se ignoran).
+
+        Devuelve:
+            Tupla (aprobados, resultados): aprobados es la lista con el
+            resultado de cada solicitante (True, False o None si no se puede
+            decidir) y resultados la lista con la columna de resultados de
+            cada requisito del primer nivel.
+
+        Excepciones:
+            RuntimeError: El caso debe tener al menos un requisito para poder
+                          ser valorado.
+            ValueError: El número de columnas no coincide con el de
+                        requisitos.
+        """
+        return self._valorar_columnas(self._columnas_valores(columnas))
+
+    def _valorar_columnas(self, columna, tolerancia=None):
+        """
+        Valora un lote dado por columnas (ver valorar_columnas).
+
+        Argumentos:
+            columna: Función que da la columna de valores de cada requisito
+                     (ver _columnas_valores).
+            tolerancia: (opcional) Si se indica, los requisitos con margen (ver
+                        Requisito.margen) se aprueban también si su margen no
+                        es menor que -tolerancia.
+        """
+        if(len(self._requisitos_raiz) == 0):
+            raise RuntimeError(
+                u"El caso debe tener al menos un requisito para poder ser "
+                u"valorado!")
+
+        def resultados(requisito):
+            if (requisito.tipo != "Grupo"):
+                if (tolerancia is None or not requisito.TIENE_MARGEN):
+                    return requisito.cumple_lote(columna(requisito))
+
+                return [None if margen is None else margen >= -tolerancia
+                        for margen in requisito.margen_lote(
+                            columna(requisito))]
+
+            minimo = requisito.minimo
+            n_requisitos = len(requisito.requisitos)
+            combinados = []
+
+            for fila in zip(*[resultados(x) for x in requisito.requisitos]):
+                aprobados = fila.count(True)
+                if (aprobados >= minimo):
+                    combinados.append(True)
+                elif (n_requisitos - fila.count(False) < minimo):
+                    combinados.append(False)
+                else:
+                    combinados.append(None)
+
+            return combinados
+
+        columnas_raiz = [resultados(requisito)
+                         for requisito in self._requisitos_raiz]
+        aprobados = []
+
+        for fila in zip(*columnas_raiz):
+            if (False in fila):
+                aprobados.append(False)
+            elif (None in fila):
+                aprobados.append(None)
+            else:
+                aprobados.append(True)
+
+        return (aprobados, columnas_raiz)
+
+    def _columnas_valores(self, columnas):
+        """
+        Devuelve una función que da la columna de valores de un requisito de
+        un lote dado por columnas (las de los requisitos del tipo Expresion se
+        calculan, una sola vez, a partir de las de sus operandos).
+
+        Argumentos:
+            columnas: Secuencia con la columna de valores de cada requisito.
+
+        Excepciones:
+            ValueError: El número de columnas no coincide con el de
+                        requisitos.
+        """
+        if(len(columnas) != len(self._requisitos)):
+            raise ValueError(u"El lote debe tener una columna por requisito!")
+
+        calculadas = {}
+
+        def columna(requisito):
+            if (requisito.tipo != "Expresion"):
+                return columnas[self._indices[requisito]]
+
+            if (requisito not in calculadas):
+                calcular = requisito.calcular
+                calculadas[requisito] = [
+                    calcular(list(fila)) for fila in zip(
+                        *[columna(x) for x in requisito.operandos])]
+
+            return calculadas[requisito]
+
+        return columna
+
+    def margenes_columnas(self, columnas):
+        """
+        Calcula de una vez el margen (ver Requisito.margen) de los valores de
+        un lote de solicitantes dado por columnas: cuánto le sobra a cada
+        valor para aprobar su requisito o, si es negativo, cuánto le falta.
+
+        Argumentos:
+            columnas: Secuencia con la columna de valores de cada requisito,
+                      en el orden de requisitos (ver valorar_columnas).
+
+        Devuelve:
+            Lista con la columna de márgenes de cada requisito, en el orden de
+            requisitos (None en lugar de la columna si el tipo del requisito
+            no tiene margen y None en los valores que faltan).
+
+        Excepciones:
+            ValueError: El número de columnas no coincide con el de
+                        requisitos.
+        """
+        columna = self._columnas_valores(columnas)
+
+        return [requisito.margen_lote(columna(requisito))
+                if requisito.TIENE_MARGEN else None
+                for requisito in self._requisitos]
+
+    def casi_aprobados(self, columnas, tolerancia=0.05):
+        """
+        Busca en un lote de solicitantes dado por columnas los rechazados por
+        poco: los que se aprobarían si cada requisito con margen (ver
+        Requisito.margen) aceptase los valores que se quedan a menos de
+        tolerancia de aprobarlo.
+
+        Argumentos:
+            columnas: Secuencia con la columna de valores de cada requisito,
+                      en el orden de requisitos (ver valorar_columnas).
+            tolerancia: (opcional) Margen máximo que puede faltar, relativo al
+                        rango de cada requisito (0.05 = 5%).
+
+        Devuelve:
+            Lista con la posición de los solicitantes rechazados por poco.
+
+        Excepciones:
+            RuntimeError: El caso debe tener al menos un requisito para poder
+                          ser valorado.
+            ValueError: El número de columnas no coincide con el de
+                        requisitos.
+            ValueError: La tolerancia no puede ser negativa.
+        """
+        if (tolerancia < 0):
+            raise ValueError(u"La tolerancia no puede ser negativa!")
+
+        columna = self._columnas_valores(columnas)
+        aprobados, _ = self._valorar_columnas(columna)
+        tolerados, _ = self._valorar_columnas(columna, tolerancia)
+
+        return [posicion for posicion, (aprobado, tolerado)
+                in enumerate(zip(aprobados, tolerados))
+                if aprobado is False and tolerado is True]
+
+    def generar_explicacion(self, solicitante):
+        """
+        Genera (generador) la explicación de la última valoración de un
+        solicitante fragmento a fragmento (ver Caso.generar_explicacion).
+
+        Argumentos:
+            solicitante: Registro (objeto de la clase ValoresSolicitante) ya
+                         valorado.
+        """
+        return _generar_explicacion(self._requisitos_raiz,
+                                    solicitante.resultados, solicitante)
+
+    def puntuar(self, solicitante):
+        """
+        Calcula la puntuación de un solicitante (ver Caso.puntuar).
+
+        Argumentos:
+            solicitante: Registro (objeto de la clase ValoresSolicitante) con
+                         los valores del solicitante.
+
+        Excepciones:
+            RuntimeError: El caso no tiene definida una puntuación.
+            RuntimeError: Los requisitos de la puntuación deben tener un valor
+                          asignado.
+        """
+        return _puntuar(self._puntuacion, solicitante)
+
+
+class ValoresSolicitante(object):
+    """
+    Registro ligero con los valores de un solicitante para una definición de
+    caso y con los resultados y la explicación de su última valoración.
+
+    Argumentos constructor:
+        definicion: Definición del caso (objeto de la clase DefinicionCaso).
+        valores: (opcional) Secuencia con el valor de cada requisito, en el
+                 orden de definicion.requisitos (None para los que no tienen
+                 valor y para los del tipo Expresion).
+
+    Excepciones constructor:
+        TypeError: Algún valor no es del tipo de su requisito.
+        ValueError: Algún valor no es válido para su requisito.
+
+    Atributos/Propiedades:
+        definicion: Definición del caso.
+        valores: Lista con el valor de cada requisito (None en los del tipo
+                 Expresion, cuyo valor se calcula con el método valor).
+        resultados: Resultado de cada requisito del primer nivel en la última
+                    valoración.
+        explicacion: String con la explicación de la última valoración.
+        cancelado: True si se ha pedido cancelar su valoración (ver
+                   cancelar).
+    """
+
+    __slots__ = ("_definicion", "_valores", "_resultados", "_explicacion",
+                 "_grupos", "_cancelado")
+
+    def __init__(self, definicion, valores=None):
+        self._definicion = definicion
+        self._valores = [None] * len(definicion.requisitos)
+        self._cancelado = False
+        self._reset_valoracion()
+
+        if (valores is not None):
+            self.asignar_valores(valores)
+
+    @property
+    def definicion(self):
+        """
+        Getter de la propiedad definicion.
+        """
+        return self._definicion
+
+    @property
+    def valores(self):
+        """
+        Getter de la propiedad valores.
+        """
+        return self._valores
+
+    @property
+    def resultados(self):
+        """
+        Getter de la propiedad resultados.
+        """
+        return self._resultados
+
+    @property
+    def explicacion(self):
+        """
+        Getter de la propiedad explicacion.
+        """
+        return self._explicacion
+
+    @property
+    def cancelado(self):
+        """
+        Getter de la propiedad cancelado.
+        """
+        return self._cancelado
+
+    def cancelar(self):
+        """
+        Pide que se detenga la valoración en curso de este solicitante (se
+        puede llamar desde otro hilo): la valoración termina con un
+        RuntimeError antes de evaluar el siguiente requisito.
+        """
+        self._cancelado = True
+
+    def _comprobar_cancelado(self):
+        """
+        Interrumpe la valoración si se ha pedido cancelarla.
+
+        Excepciones:
+            RuntimeError: La valoración ha sido cancelada.
+        """
+        if (self._cancelado):
+            raise RuntimeError(u"La valoración ha sido cancelada!")
+
+    def valor(self, requisito):
+        """
+        Devuelve el valor de un requisito para este solicitante (el de los
+        requisitos del tipo Expresion se calcula a partir de los de sus
+        operandos; los grupos no tienen valor).
+
+        Argumentos:
+            requisito: El requisito (objeto de la clase Requisito).
+        """
+        if (requisito.tipo == "Expresion"):
+            return requisito.calcular([self.valor(operando)
+                                       for operando in requisito.operandos])
+        if (requisito.tipo == "Grupo"):
+            return None
+
+        return self._valores[self._definicion.indice(requisito)]
+
+    def asignar_valor(self, requisito, valor):
+        """
+        Asigna el valor de un requisito para este solicitante.
+
+        Argumentos:
+            requisito: El requisito (objeto de la clase Requisito).
+            valor: El valor (None para quitarlo).
+
+        Excepciones:
+            TypeError: El valor no es del tipo del requisito.
+            ValueError: El valor no es válido para el requisito.
+        """
+        if (valor is not None):
+            valor = requisito.comprobar_valor(valor)
+
+        self._valores[self._definicion.indice(requisito)] = valor
+        self._reset_valoracion()
+
+    def asignar_valores(self, valores):
+        """
+        Asigna de una vez el valor de todos los requisitos (ver
+        Caso.asignar_valores).
+
+        Argumentos:
+            valores: Secuencia con el valor de cada requisito, en el orden de
+                     definicion.requisitos.
+
+        Excepciones:
+            TypeError: Algún valor no es del tipo de su requisito.
+            ValueError: Algún valor no es válido para su requisito.
+        """
+        for i, (requisito, valor) in enumerate(
+                zip(self._definicion.requisitos, valores)):
+            if (valor is not None):
+                valor = requisito.comprobar_valor(valor)
+            self._valores[i] = valor
+
+        self._reset_valoracion()
+
+    def _reset_valoracion(self):
+        """
+        Elimina los resultados de la última valoración.
+        """
+        self._resultados = []
+        self._explicacion = u""
+        self._grupos = {}
+
+    def _guardar_grupo(self, grupo, evaluados, decisivo):
+        """
+        Guarda los requisitos evaluados en la última valoración de un grupo y
+        el que decidió su resultado (para la explicación).
+
+        Argumentos:
+            grupo: El grupo (objeto de la clase RequisitoGrupo).
+            evaluados: Lista de tuplas (requisito, resultado).
+            decisivo: Requisito que decidió el resultado.
+        """
+        self._grupos[grupo] = (evaluados, decisivo)
+
+    def _valoracion_grupo(self, grupo):
+        """
+        Devuelve la tupla (evaluados, decisivo) guardada de un grupo (ver
+        _guardar_grupo).
+
+        Argumentos:
+            grupo: El grupo (objeto de la clase RequisitoGrupo).
+        """
+        return self._grupos.get(grupo, ([], None))
+
+
+def _texto(descripcion):
+    """
+    Devuelve el texto de una descripción (leyéndolo del fichero si es un
+    objeto DescripcionDiferida).
+
+    Argumentos:
+        descripcion: String u objeto DescripcionDiferida.
+    """
+    if (isinstance(descripcion, DescripcionDiferida)):
+        return descripcion.leer()
+
+    return descripcion
+
+
+class DescripcionDiferida(object):
+    """
+    Descripción de la que solo se guarda su posición en el fichero del caso
+    (y un resumen para comprobar que el fichero no ha cambiado); el texto se
+    lee del fichero cuando se necesita.
+
+    Las últimas descripciones leídas se guardan en una caché compartida para
+    no leer el fichero en cada explicación.
+
+    Argumentos constructor:
+        file_path: Ruta hacia el fichero del caso.
+        inicio: Posición (en bytes) del principio del string JSON.
+        fin: Posición (en bytes) del final del string JSON.
+        resumen: Resumen del string JSON (ver resumir).
+    """
+
+    __slots__ = ("_file_path", "_inicio", "_fin", "_resumen")
+
+    # Longitud mínima (en bytes) del string JSON para diferir su lectura (las
+    # descripciones cortas ocupan menos que su posición).
+    LONGITUD_MINIMA = 128
+
+    # Número de descripciones leídas que se guardan en la caché.
+    TAM_CACHE = 256
+
+    # Prefijo de las marcas que sustituyen a las descripciones al cargar el
+    # fichero.
+    MARCA = u"\x00DIFERIDA:"
+
+    # Texto que se devuelve si el fichero ha cambiado desde que se cargó.
+    NO_DISPONIBLE = (u"(La descripción no está disponible: el fichero del " +
+                     u"caso ha cambiado)")
+
+    _cache = collections.OrderedDict()
+    _cerrojo = threading.Lock()
+
+    def __init__(self, file_path, inicio, fin, resumen):
+        self._file_path = file_path
+        self._inicio = inicio
+        self._fin = fin
+        self._resumen = resumen
+
+    @staticmethod
+    def resumir(datos):
+        """
+        Devuelve el resumen (hash) de un string JSON.
+
+        Argumentos:
+            datos: Bytes del string JSON (con las comillas).
+        """
+        return hashlib.sha1(datos).hexdigest()
+
+    def __eq__(self, other):
+        """
+        Dos descripciones diferidas son iguales si lo es su texto (aunque
+        estén en posiciones distintas del fichero, para que al recargar un
+        caso no se consideren modificados los requisitos que solo se han
+        desplazado; por eso no se guardan en la reserva de textos).
+        """
+        if (not isinstance(other, DescripcionDiferida)):
+            return NotImplemented
+
+        return self._resumen == other._resumen
+
+    def __ne__(self, other):
+        """
+        Dos descripciones diferidas son distintas si lo es su texto.
+        """
+        if (not isinstance(other, DescripcionDiferida)):
+            return NotImplemented
+
+        return self._resumen != other._resumen
+
+    def __hash__(self):
+        """
+        Devuelve el hash de la descripción (el de su texto).
+        """
+        return hash(self._resumen)
+
+    def leer(self):
+        """
+        Devuelve el texto de la descripción (o NO_DISPONIBLE si el fichero ha
+        cambiado o ya no se puede leer).
+        """
+        clave = (self._file_path, self._inicio, self._resumen)
+
+        with self._cerrojo:
+            texto = self._cache.pop(clave, None)
+            if (texto is not None):
+                self._cache[clave] = texto
+                return texto
+
+        try:
+            with io.open(self._file_path, 'rb') as f:
+                f.seek(self._inicio)
+                datos = f.read(self._fin - self._inicio)
+            if (self.resumir(datos) != self._resumen):
+                return self.NO_DISPONIBLE
+            texto = json.loads(datos.decode('utf-8'))
+        except (IOError, OSError, ValueError):
+            return self.NO_DISPONIBLE
+
+        with self._cerrojo:
+            self._cache[clave] = texto
+            if (len(self._cache) > self.TAM_CACHE):
+                self._cache.popitem(last=False)
+
+        return texto
+
+
+def _tamano(objeto):
+    """
+    Devuelve los bytes que ocupa un objeto en memoria (o una estimación si el
+    intérprete no lo permite saber, como PyPy).
+
+    Argumentos:
+        objeto: El objeto.
+    """
+    try:
+        return sys.getsizeof(objeto)
+    except TypeError:
+        if (isinstance(objeto, unicode)):
+            return 48 + len(objeto.encode('utf-8'))
+        return 64
+
+
+class ReservaTextos(object):
+    """
+    Reserva de textos compartidos: guarda una sola copia de cada texto, de
+    modo que los requisitos (de un caso o de varios casos cargados a la vez)
+    con el mismo nombre, la misma descripción o cualquier otro texto idéntico
+    comparten el mismo objeto en memoria.
+
+    Atributos/Propiedades:
+        n_textos: Número de textos distintos guardados.
+        bytes_textos: Bytes que ocupan los textos guardados.
+        n_repetidos: Número de copias de textos que se han evitado.
+        bytes_ahorrados: Bytes que ocupaban las copias evitadas.
+    """
+
+    def __init__(self):
+        self._textos = {}
+        self._cerrojo = threading.Lock()
+        self._bytes_textos = 0
+        self._n_repetidos = 0
+        self._bytes_ahorrados = 0
+
+    @property
+    def n_textos(self):
+        """
+        Getter de la propiedad n_textos.
+        """
+        return len(self._textos)
+
+    @property
+    def bytes_textos(self):
+        """
+        Getter de la propiedad bytes_textos.
+        """
+        return self._bytes_textos
+
+    @property
+    def n_repetidos(self):
+        """
+        Getter de la propiedad n_repetidos.
+        """
+        return self._n_repetidos
+
+    @property
+    def bytes_ahorrados(self):
+        """
+        Getter de la propiedad bytes_ahorrados.
+        """
+        return self._bytes_ahorrados
+
+    def compartir(self, texto):
+        """
+        Devuelve la copia guardada de un texto (guardándolo si es la primera
+        vez que aparece).
+
+        Argumentos:
+            texto: String (o cualquier objeto inmutable comparable cuyas
+                   copias iguales sean intercambiables).
+        """
+        with self._cerrojo:
+            compartido = self._textos.get(texto)
+
+            if (compartido is None):
+                self._textos[texto] = compartido = texto
+                self._bytes_textos += _tamano(texto)
+            elif (compartido is not texto):
+                self._n_repetidos += 1
+                self._bytes_ahorrados += _tamano(texto)
+
+        return compartido
+
+    def purgar(self):
+        """
+        Elimina los textos que ya no usa ningún caso (por ejemplo, después de
+        cerrar o recargar casos). Solo funciona en los intérpretes que llevan
+        la cuenta de las referencias a cada objeto (CPython).
+
+        Devuelve:
+            Número de textos eliminados.
+        """
+        if (not hasattr(sys, "getrefcount")):
+            return 0
+
+        with self._cerrojo:
+            # Referencias de un texto que solo está en la reserva: la clave y
+            # el valor del diccionario, la variable del bucle y el argumento
+            # de getrefcount
+            sin_usar = [texto for texto in self._textos
+                        if sys.getrefcount(texto) <= 4]
+
+            for texto in sin_usar:
+                del self._textos[texto]
+                self._bytes_textos -= _tamano(texto)
+
+        return len(sin_usar)
+
+    def vaciar(self):
+        """
+        Elimina todos los textos y reinicia las estadísticas (los casos ya
+        cargados conservan sus textos).
+        """
+        with self._cerrojo:
+            self._textos = {}
+            self._bytes_textos = 0
+            self._n_repetidos = 0
+            self._bytes_ahorrados = 0
+
+    def informe(self):
+        """
+        Devuelve un string con el informe de memoria de la reserva.
+        """
+        return (u"Textos distintos: " + str(self.n_textos) +
+                u" (" + _formatear_bytes(self.bytes_textos) + u")" +
+                u"\nCopias evitadas: " + str(self.n_repetidos) +
+                u" (" + _formatear_bytes(self.bytes_ahorrados) +
+                u" ahorrados)")
+
+
+def _formatear_bytes(n_bytes):
+    """
+    Devuelve un string con una cantidad de bytes en la unidad más adecuada.
+
+    Argumentos:
+        n_bytes: Número de bytes.
+    """
+    if (n_bytes < 1024):
+        return u"%d B" % n_bytes
+
+    for unidad in (u"KB", u"MB", u"GB"):
+        n_bytes /= 1024.0
+        if (n_bytes < 1024 or unidad == u"GB"):
+            return u"%.1f %s" % (n_bytes, unidad)
+
+
+# Reserva de textos compartida por defecto por todos los casos.
+TEXTOS = ReservaTextos()
+
+# Clases de requisito de cada tipo (ver registrar_tipo).
+TIPOS_REQUISITO = {}
+
+
+def registrar_tipo(clase):
+    """
+    Registra una clase de requisito (decorador de clase) para que los casos
+    puedan usar su tipo en el JSON.
+
+    La clase debe definir el atributo TIPO (el valor de la clave 'tipo' en el
+    JSON) y el método de clase desde_JSON (su parser), además de los métodos
+    cumple (comprobación de un valor) y cumple_lote (comprobación de una
+    columna de valores) de la clase Requisito.
+
+    Argumentos:
+        clase: La clase de requisito (heredera de Requisito).
+
+    Excepciones:
+        ValueError: Ya hay otra clase registrada con el mismo tipo.
+    """
+    if (TIPOS_REQUISITO.get(clase.TIPO, clase) is not clase):
+        raise ValueError(u"El tipo de requisito \"" + clase.TIPO +
+                         u"\" ya está registrado!")
+
+    TIPOS_REQUISITO[clase.TIPO] = clase
+
+    return clase
+
+
+def _texto_valor(valor):
+    """
+    Devuelve el texto con el que se muestra un valor en las explicaciones.
+
+    Los números decimales se escriben con repr, que da el mismo texto en
+    Python 2 y en Python 3 (unicode los redondea a 12 cifras en Python 2).
+
+    Argumentos:
+        valor: El valor.
+    """
+    if (isinstance(valor, float)):
+        return unicode(repr(valor))
+
+    return unicode(valor)
+
+
+def _fecha(valor):
+    """
+    Comprueba que un string es una fecha "AAAA-MM-DD" válida y la devuelve
+    normalizada (así las fechas se pueden comparar como strings).
+
+    Argumentos:
+        valor: String con la fecha.
+
+    Excepciones:
+        TypeError: El valor debe ser un string.
+        ValueError: El valor no es una fecha válida.
+    """
+    if (not isinstance(valor, (str, unicode))):
+        raise TypeError(u"El valor introducido debe ser una fecha " +
+                        u"(AAAA-MM-DD)!")
+
+    try:
+        fecha = datetime.datetime.strptime(valor, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(u"El valor introducido debe ser una fecha " +
+                         u"(AAAA-MM-DD)!")
+
+    return unicode(fecha.isoformat())
+
+
+class Requisito(object):
+    """
+    Clase base para representar los requisitos.
+
+    Esta clase no debe ser instanciada; es solo una interfaz (clase base
+    abstracta). Cada tipo de requisito es una clase heredera registrada con
+    registrar_tipo.
+
+    Argumentos constructor:
+        nombre: String con el nombre del requisito.
+        descripcion: String con la descripción del requisito (o un objeto
+                     DescripcionDiferida).
+
+    Atributos/Propiedades:
+        TIPO: String con el tipo del requisito en el JSON (atributo de clase).
+        NUMERICO: True si los valores del tipo son números (atributo de
+                  clase).
+        VALOR_ESPERADO: String con el valor que se espera en el tipo, para los
+                        mensajes de error (atributo de clase).
+        TIENE_MARGEN: True si el tipo calcula el margen de sus valores (ver
+                      margen) (atributo de clase).
+        CALCULADO: True si el valor del tipo no se introduce, sino que se
+                   calcula a partir de otros requisitos (atributo de clase).
+        nombre: String con el nombre del requisito.
+        descripcion: String con la descripción del requisito.
+        tipo: String con el tipo del requisito ("Booleano", "Porcentaje",
+              "Numero", "Intervalos", "Entero", "Enumerado", "Fecha",
+              "Expresion", "Grupo" o el de cualquier otra clase registrada).
+        valor: Valor actualmente asignado al requisito (su tipo dependerá del
+               tipo de requisito). El requisito será evaluado en base a este
+               valor.
+        coste: Estimación del coste de evaluar el requisito (se usa para
+               evaluar primero los requisitos más baratos de cada grupo).
+
+    Los métodos valorar y explicar_valoracion pueden recibir un registro de
+    valores de un solicitante (objeto de la clase ValoresSolicitante); en ese
+    caso usan el valor del registro y no modifican el requisito.
+    """
+
+    TIPO = None
+    NUMERICO = True
+    VALOR_ESPERADO = u"un valor válido"
+    TIENE_MARGEN = False
+    CALCULADO = False
+
+    def __init__(self, nombre, descripcion):
+        self._nombre = nombre
+        self._descripcion = descripcion
+        self._valor = None
+
+    @property
+    def nombre(self):
+        """
+        Getter de la propiedad nombre.
+        """
+        return self._nombre
+
+    @property
+    def descripcion(self):
+        """
+        Getter de la propiedad descripcion.
+        """
+        return _texto(self._descripcion)
+
+    @property
+    def valor(self):
+        """
+        Getter de la propiedad valor.
+        """
+        return self._valor
+
+    @valor.setter
+    def valor(self, valor):
+        """
+        Setter de la propiedad valor.
+
+        Argumentos:
+            valor: El valor del requisito (se comprueba con comprobar_valor).
+        """
+        self._valor = self.comprobar_valor(valor)
+
+    @property
+    def tipo(self):
+        """
+        Getter de la propiedad tipo.
+        """
+        return self.TIPO
+
+    @property
+    def coste(self):
+        """
+        Getter de la propiedad coste.
+        """
+        return 1
+
+    @classmethod
+    def desde_JSON(cls, definicion, crear_requisito):
+        """
+        Crea un requisito del tipo a partir de su definición en el JSON.
+
+        Deberá ser implementado por la clase heredera.
+
+        Argumentos:
+            definicion: Diccionario con la definición del requisito (con la
+                        descripción ya cargada).
+            crear_requisito: Función que crea un requisito a partir de su
+                             definición (para los tipos que contienen otros
+                             requisitos).
+        """
+        raise NotImplementedError
+
+    def __str__(self):
+        """
+        Devuelve la representación en string del objeto (para usar con print).
+        """
+        return (u"- NOMBRE: " + unicode(self.nombre) +
+                u"\n- DESCRIPCIÓN: " + unicode(self.descripcion) +
+                u"\n- TIPO: " + unicode(self.tipo))
+
+    def comprobar_valor(self, valor):
+        """
+        Comprueba que un valor se puede asignar al requisito y lo devuelve
+        (sin asignarlo).
+
+        Deberá ser implementado por la clase heredera.
+
+        Argumentos:
+            valor: El valor a comprobar.
+        """
+        raise NotImplementedError
+
+    def convertir_texto(self, texto):
+        """
+        Convierte un texto (una celda de un CSV, un campo de la interfaz...)
+        en un valor del requisito.
+
+        Deberá ser implementado por la clase heredera.
+
+        Argumentos:
+            texto: String (no vacío) con el valor.
+
+        Excepciones:
+            ValueError: El texto no es un valor del tipo del requisito.
+        """
+        raise NotImplementedError
+
+    def convertir_lote(self, textos):
+        """
+        Convierte de una vez una columna de textos (ya sin espacios) en
+        valores del requisito (ver convertir_texto) y devuelve la lista de
+        valores (None en los textos vacíos o que no se pueden convertir).
+
+        Las clases herederas lo redefinen con un camino rápido que convierte
+        la columna entera sin llamadas a métodos por valor.
+
+        Argumentos:
+            textos: Secuencia de strings.
+        """
+        valores = []
+
+        for texto in textos:
+            try:
+                valores.append(None if texto == u""
+                               else self.convertir_texto(texto))
+            except ValueError:
+                valores.append(None)
+
+        return valores
+
+    def comprobar_lote(self, valores):
+        """
+        Comprueba de una vez una columna de valores ya convertidos (ver
+        convertir_lote) y devuelve la lista de tuplas (posicion, motivo) de
+        los que no se pueden asignar al requisito aunque sean del tipo
+        correcto (vacía si el tipo no pone más condiciones).
+
+        Argumentos:
+            valores: Secuencia de valores (None en los vacíos).
+        """
+        return []
+
+    def rango_numerico(self):
+        """
+        Devuelve la tupla (minimo, maximo) de números decimales entre los que
+        debe estar el valor (convertido en número decimal) para aprobar el
+        requisito o None si el tipo no se reduce a esa comprobación (ver
+        valor_desde_numero).
+        """
+        return None
+
+    def valor_desde_numero(self, numero):
+        """
+        Convierte un valor guardado como número decimal (en un array de
+        números, en memoria compartida...) de nuevo en un valor del requisito.
+
+        Argumentos:
+            numero: Número decimal con el valor.
+        """
+        return numero
+
+    def cumple(self, valor):
+        """
+        Devuelve True si un valor (no None) aprueba el requisito.
+
+        Deberá ser implementado por la clase heredera.
+
+        Argumentos:
+            valor: El valor a comprobar.
+        """
+        raise NotImplementedError
+
+    def cumple_lote(self, valores):
+        """
+        Comprueba de una vez una columna de valores (de muchos solicitantes) y
+        devuelve la lista de resultados (None en los valores None).
+
+        Las clases herederas lo redefinen con un bucle sin llamadas a métodos
+        por valor.
+
+        Argumentos:
+            valores: Secuencia de valores.
+        """
+        cumple = self.cumple
+
+        return [None if valor is None else cumple(valor) for valor in valores]
+
+    def margen(self, valor):
+        """
+        Devuelve el margen de un valor (no None): la distancia con signo al
+        límite más cercano de los valores que aprueban el requisito, relativa
+        a su rango (positiva si el valor aprueba y negativa si no; -0.05
+        significa que el valor se ha quedado a un 5% del rango de aprobar).
+
+        Solo está disponible en los tipos con TIENE_MARGEN.
+
+        Argumentos:
+            valor: El valor.
+
+        Excepciones:
+            TypeError: El tipo del requisito no tiene margen.
+        """
+        raise TypeError(u"Los requisitos del tipo " + unicode(self.tipo) +
+                        u" no tienen margen!")
+
+    def margen_lote(self, valores):
+        """
+        Calcula de una vez el margen (ver margen) de una columna de valores y
+        devuelve la lista de márgenes (None en los valores None).
+
+        Argumentos:
+            valores: Secuencia de valores.
+
+        Excepciones:
+            TypeError: El tipo del requisito no tiene margen.
+        """
+        margen = self.margen
+
+        return [None if valor is None else margen(valor) for valor in valores]
+
+    def explicar_margen(self, solicitante=None):
+        """
+        Devuelve el texto que se añade a la explicación del caso cuando el
+        requisito es rechazado (la distancia a la que se ha quedado el valor
+        de aprobar o un texto vacío si el tipo no tiene margen).
+
+        Argumentos:
+            solicitante: (opcional) Registro (objeto de la clase
+                         ValoresSolicitante) con el que se ha valorado.
+        """
+        return u""
+
+    def _valor_de(self, solicitante):
+        """
+        Devuelve el valor del requisito en el registro de un solicitante o, si
+        no se indica ninguno, el valor asignado al requisito.
+
+        Argumentos:
+            solicitante: Registro (objeto de la clase ValoresSolicitante) o
+                         None.
+        """
+        if (solicitante is None):
+            return self.valor
+
+        return solicitante.valor(self)
+
+    def explicar_valoracion(self, solicitante=None):
+        """
+        Devuelve el texto que se añade a la explicación del caso tras valorar
+        el requisito (el valor con el que ha sido valorado).
+
+        Argumentos:
+            solicitante: (opcional) Registro (objeto de la clase
+                         ValoresSolicitante) con el que se ha valorado.
+        """
+        return (u"\n* VALOR INTRODUCIDO: " +
+                _texto_valor(self._valor_de(solicitante)))
+
+    def valorar(self, solicitante=None):
+        """
+        Evalúa el requisito y devuelve True o False según corresponda (con el
+        método cumple).
+
+        Argumentos:
+            solicitante: (opcional) Registro (objeto de la clase
+                         ValoresSolicitante) con el valor a evaluar.
+
+        Excepciones:
+            RuntimeError: El requisito debe tener un valor asignado antes de
+                          poder ser valorado.
+        """
+        if(solicitante is None):
+            valor = self._valor
+        else:
+            valor = solicitante.valor(self)
+
+        if(valor is None):
+            raise RuntimeError(u"El requisito \"" + self.nombre +
+                               "\" debe tener un valor asignado!")
+
+        return self.cumple(valor)
+
+    def reset(self):
+        """
+        Reinicializa el valor del requisito.
+        """
+        self._valor = None
+
+
+class RequisitoRango(Requisito):
+    """
+    Clase base para los requisitos que se aprueban si su valor está entre un
+    mínimo y un máximo (Porcentaje, Numero, Entero, Fecha y Expresion; el tipo
+    Intervalos redefine la comprobación).
+
+    Esta clase no debe ser instanciada.
+
+    Argumentos constructor:
+        nombre: String con el nombre del requisito.
+        descripcion: String con la descripción del requisito.
+        valor_minimo: Valor mínimo necesario para evaluar el requisito como True.
+        valor_maximo: Valor máximo posible para evaluar el requisito como True.
+
+    Atributos/Propiedades:
+        valor_minimo: Valor mínimo necesario para evaluar el requisito como True.
+        valor_maximo: Valor máximo posible para evaluar el requisito como True.
+
+    El margen de un valor (ver Requisito.margen) es su distancia al mínimo o
+    al máximo relativa a la anchura del rango (o la distancia sin más si el
+    mínimo y el máximo coinciden).
+    """
+
+    TIENE_MARGEN = True
+
+    def __init__(self, nombre, descripcion, valor_minimo, valor_maximo):
+        super(RequisitoRango, self).__init__(nombre, descripcion)
+
+        self._valor_minimo = valor_minimo
+        self._valor_maximo = valor_maximo
+
+    @classmethod
+    def desde_JSON(cls, definicion, crear_requisito):
+        """
+        Crea un requisito del tipo a partir de su definición en el JSON (ver
+        Requisito.desde_JSON).
+        """
+        return cls(definicion['nombre'], definicion['descripcion'],
+                   float(definicion['valor_minimo']),
+                   float(definicion['valor_maximo']))
+
+    @property
+    def valor_minimo(self):
+        """
+        Getter de la propiedad valor_minimo.
+        """
+        return self._valor_minimo
+
+    @property
+    def valor_maximo(self):
+        """
+        Getter de la propiedad valor_maximo.
+        """
+        return self._valor_maximo
+
+    def __str__(self):
+        """
+        Devuelve la representación en string del objeto (para usar con print).
+        """
+        return (super(RequisitoRango, self).__str__() +
+                u"\n- VALOR MÍNIMO: " + unicode(self.valor_minimo) +
+                u"\n- VALOR MÁXIMO: " + unicode(self.valor_maximo))
+
+    def convertir_texto(self, texto):
+        """
+        Convierte un texto en un valor del requisito (un número decimal).
+
+        Argumentos:
+            texto: String con el valor.
+
+        Excepciones:
+            ValueError: El texto no es un número.
+        """
+        return float(texto)
+
+    def convertir_lote(self, textos):
+        """
+        Convierte de una vez una columna de textos (ver
+        Requisito.convertir_lote).
+
+        Argumentos:
+            textos: Secuencia de strings.
+        """
+        # Camino rápido: la columna entera se convierte sin errores
+        try:
+            return list(map(float, textos))
+        except ValueError:
+            return super(RequisitoRango, self).convertir_lote(textos)
+
+    def rango_numerico(self):
+        """
+        Devuelve el mínimo y el máximo como números decimales (ver
+        Requisito.rango_numerico) si los valores del tipo son números.
+        """
+        if (not self.NUMERICO):
+            return None
+
+        return (float(self._valor_minimo), float(self._valor_maximo))
+
+    def cumple(self, valor):
+        """
+        Devuelve True si un valor está entre el mínimo y el máximo.
+
+        Argumentos:
+            valor: El valor a comprobar.
+        """
+        return self._valor_minimo <= valor <= self._valor_maximo
+
+    def cumple_lote(self, valores):
+        """
+        Comprueba de una vez una columna de valores (ver
+        Requisito.cumple_lote).
+
+        Argumentos:
+            valores: Secuencia de valores.
+        """
+        minimo = self._valor_minimo
+        maximo = self._valor_maximo
+
+        return [None if valor is None else minimo <= valor <= maximo
+                for valor in valores]
+
+    def _anchura(self):
+        """
+        Devuelve la anchura del rango con la que se calcula el margen relativo
+        (1 si el mínimo y el máximo coinciden).
+        """
+        return float(self._valor_maximo - self._valor_minimo) or 1.0
+
+    def _distancia(self, valor):
+        """
+        Devuelve la distancia con signo de un valor al límite más cercano del
+        rango (positiva dentro del rango y negativa fuera).
+
+        Argumentos:
+            valor: El valor.
+        """
+        return min(valor - self._valor_minimo, self._valor_maximo - valor)
+
+    def _texto_distancia(self, distancia):
+        """
+        Devuelve el texto de una distancia (sin signo) para la explicación.
+
+        Argumentos:
+            distancia: La distancia.
+        """
+        return u"%g" % distancia
+
+    def margen(self, valor):
+        """
+        Devuelve el margen de un valor (ver Requisito.margen).
+
+        Argumentos:
+            valor: El valor.
+        """
+        return self._distancia(valor) / self._anchura()
+
+    def margen_lote(self, valores):
+        """
+        Calcula de una vez el margen de una columna de valores (ver
+        Requisito.margen_lote).
+
+        Argumentos:
+            valores: Secuencia de valores.
+        """
+        minimo = self._valor_minimo
+        maximo = self._valor_maximo
+        anchura = self._anchura()
+
+        return [None if valor is None else
+                min(valor - minimo, maximo - valor) / anchura
+                for valor in valores]
+
+    def explicar_margen(self, solicitante=None):
+        """
+        Devuelve el texto que se añade a la explicación del caso cuando el
+        requisito es rechazado (ver Requisito.explicar_margen).
+
+        Argumentos:
+            solicitante: (opcional) Registro (objeto de la clase
+                         ValoresSolicitante) con el que se ha valorado.
+        """
+        valor = self._valor_de(solicitante)
+
+        if (valor is None or self.cumple(valor)):
+            return u""
+
+        return (u"\n* DISTANCIA AL APROBADO: " +
+                self._texto_distancia(-self._distancia(valor)) +
+                u" (%.1f%% del rango)" % (-100 * self.margen(valor)))
+
+
+@registrar_tipo
+class RequisitoBooleano(Requisito):
+    """
+    Representa un requisito del tipo Booleano.
+
+    Argumentos constructor:
+        nombre: String con el nombre del requisito.
+        descripcion: String con la descripción del requisito.
+        valor_deseado: Valor que el requisito debe tener para ser evaluado como
+                       True.
+
+    Excepciones constructor:
+        TypeError: El argumento valor_deseado debe ser un booleano.
+
+    Atributos/Propiedades:
+        nombre: String con el nombre del requisito.
+        descripcion: String con la descripción del requisito.
+        tipo: String con el tipo del requisito ("Booleano").
+        valor: Valor actualmente asignado al requisito.
+        valor_deseado: Valor que el requisito debe tener para ser evaluado como
+                       True.
+    """
+
+    TIPO = "Booleano"
+    VALOR_ESPERADO = u"un booleano"
+
+    # Textos aceptados como valor (en minúsculas).
+    TEXTOS = {
+        u"true": True,
+        u"false": False,
+        u"1": True,
+        u"0": False,
+    }
+
+    def __init__(self, nombre, descripcion, valor_deseado):
+        super(RequisitoBooleano, self).__init__(nombre, descripcion)
+
+        if (not isinstance(valor_deseado, bool)):
+            raise TypeError(u"El valor introducido debe ser un booleano!")
+
+        self._valor_deseado = valor_deseado
+
+    @classmethod
+    def desde_JSON(cls, definicion, crear_requisito):
+        """
+        Crea un requisito del tipo a partir de su definición en el JSON (ver
+        Requisito.desde_JSON).
+        """
+        return cls(definicion['nombre'], definicion['descripcion'],
+                   definicion['valor_deseado'])
+
+    def comprobar_valor(self, valor):
+        """
+        Comprueba que un valor se puede asignar al requisito y lo devuelve.
+
+        Argumentos:
+            valor: El valor del requisito.
+
+        Excepciones:
+            TypeError: El argumento valor debe ser un booleano.
+        """
+        if (not isinstance(valor, bool)):
+            raise TypeError("El valor introducido debe ser un booleano!")
+
+        return valor
+
+    def convertir_texto(self, texto):
+        """
+        Convierte un texto ("true", "false", "1" o "0") en un valor del
+        requisito.
+
+        Argumentos:
+            texto: String con el valor.
+
+        Excepciones:
+            ValueError: El texto no es un booleano.
+        """
+        try:
+            return self.TEXTOS[texto.lower()]
+        except KeyError:
+            raise ValueError(u"El valor introducido debe ser un booleano!")
+
+    def rango_numerico(self):
+        """
+        Devuelve el valor deseado como mínimo y máximo (ver
+        Requisito.rango_numerico).
+        """
+        return (float(self._valor_deseado), float(self._valor_deseado))
+
+    def valor_desde_numero(self, numero):
+        """
+        Convierte un valor guardado como número decimal en un booleano (ver
+        Requisito.valor_desde_numero).
+
+        Argumentos:
+            numero: Número decimal con el valor.
+        """
+        return numero != 0.0
+
+    @property
+    def valor_deseado(self):
+        """
+        Getter de la propiedad valor_deseado.
+        """
+        return self._valor_deseado
+
+    def __str__(self):
+        """
+        Devuelve la representación en string del objeto (para usar con print).
+        """
+        return (super(RequisitoBooleano, self).__str__() +
+                u"\n- VALOR DESEADO: " + str(self.valor_deseado))
+
+    def cumple(self, valor):
+        """
+        Devuelve True si un valor coincide con el valor deseado.
+
+        Argumentos:
+            valor: El valor a comprobar.
+        """
+        return valor == self._valor_deseado
+
+    def cumple_lote(self, valores):
+        """
+        Comprueba de una vez una columna de valores (ver
+        Requisito.cumple_lote).
+
+        Argumentos:
+            valores: Secuencia de valores.
+        """
+        deseado = self._valor_deseado
+
+        return [None if valor is None else valor == deseado
+                for valor in valores]
+
+
+@registrar_tipo
+class RequisitoPorcentaje(RequisitoRango):
+    """
+    Representa un requisito del tipo Porcentaje.
+
+    Argumentos constructor:
+        nombre: String con el nombre del requisito.
+        descripcion: String con la descripción del requisito.
+        valor_minimo: Porcentaje mínimo necesario para evaluar el requisito como
+                      True.
+        valor_maximo: Porcentaje máximo posible para evaluar el requisito como
+                      True.
+
+    Excepciones constructor:
+        ValueError: El argumento valor_minimo debe estar entre 0 y 1.
+        ValueError: El argumento valor_maximo debe estar entre 0 y 1.
+
+    Atributos/Propiedades:
+        nombre: String con el nombre del requisito.
+        descripcion: String con la descripción del requisito.
+        tipo: String con el tipo del requisito ("Porcentaje").
+        valor: Valor actualmente asignado al requisito.
+        valor_minimo: Porcentaje mínimo necesario para evaluar el requisito como
+                      True.
+        valor_maximo: Porcentaje máximo posible para evaluar el requisito como
+                      True.
+    """
+
+    TIPO = "Porcentaje"
+    VALOR_ESPERADO = u"un número"
+
+    def __init__(self, nombre, descripcion, valor_minimo, valor_maximo):
+        if(valor_minimo < 0 or valor_minimo > 1):
+            raise ValueError(
+                u"El valor introducido debe ser un número decimal entre 0 y 1!")
+        if(valor_maximo < 0 or valor_maximo > 1):
+            raise ValueError(
+                u"El valor introducido debe ser un número decimal entre 0 y 1!")
+
+        super(RequisitoPorcentaje, self).__init__(nombre, descripcion,
+                                                  valor_minimo, valor_maximo)
+
+    def comprobar_valor(self, valor):
+        """
+        Comprueba que un valor se puede asignar al requisito y lo devuelve.
+
+        Argumentos:
+            valor: El valor del requisito.
+
+        Excepciones:
+            ValueError: El argumento valor_minimo debe estar entre 0 y 1.
+        """
+        if (valor < 0 or valor > 1):
+            raise ValueError(
+                u"El valor introducido debe ser un número decimal entre 0 y 1!")
+
+        return valor
+
+    def comprobar_lote(self, valores):
+        """
+        Comprueba de una vez que una columna de valores esté entre 0 y 1 (ver
+        Requisito.comprobar_lote).
+
+        Argumentos:
+            valores: Secuencia de valores.
+        """
+        return [(i, u"no está entre 0 y 1") for i, valor in enumerate(valores)
+                if valor is not None and not 0 <= valor <= 1]
+
+
+@registrar_tipo
+class RequisitoNumero(RequisitoRango):
     """
-    Representa un requisito del tipo Booleano.
+    Representa un requisito del tipo Numero.
 
     Argumentos constructor:
         nombre: String con el nombre del requisito.
         descripcion: String con la descripción del requisito.
-        valor_deseado: Valor que el requisito debe tener para ser evaluado como
-                       True.
+        valor_minimo: Valor mínimo necesario para evaluar el requisito como True.
+        valor_maximo: Valor máximo posible para evaluar el requisito como True.
 
     Excepciones constructor:
-        TypeError: El argumento valor_deseado debe ser un booleano.
+        TypeError: El argumento valor_minimo debe ser un número.
+        TypeError: El argumento valor_maximo debe ser un número.
+
+    Atributos/Propiedades:
+        nombre: String con el nombre del requisito.
+        tipo: String con el tipo del requisito ("Numero").
+        valor: Valor actualmente asignado al requisito
+        valor_minimo: Valor mínimo necesario para evaluar el requisito como True.
+        valor_maximo: Valor máximo posible para evaluar el requisito como True.
+    """
+
+    TIPO = "Numero"
+    VALOR_ESPERADO = u"un número"
+
+    def __init__(self, nombre, descripcion, valor_minimo, valor_maximo):
+        if (not isinstance(valor_minimo, float)):
+            raise TypeError(u"El valor introducido debe ser un número!")
+        if (not isinstance(valor_maximo, float)):
+            raise TypeError(u"El valor introducido debe ser un número!")
+
+        super(RequisitoNumero, self).__init__(nombre, descripcion,
+                                              valor_minimo, valor_maximo)
+
+    def comprobar_valor(self, valor):
+        """
+        Comprueba que un valor se puede asignar al requisito y lo devuelve.
+
+        Argumentos:
+            valor: El valor del requisito.
+
+        Excepciones:
+            TypeError: El argumento valor debe ser un número.
+        """
+        if (not isinstance(valor, float)):
+            raise TypeError(u"El valor introducido debe ser un número!")
+
+        return valor
+
+
+@registrar_tipo
+class RequisitoIntervalos(RequisitoNumero):
+    """
+    Representa un requisito del tipo Intervalos: se aprueba si su valor (un
+    número) está en alguno de varios intervalos cerrados (tramos de edad,
+    bandas de puntuación...).
+
+    Los intervalos se guardan ordenados y fusionados (los que se solapan o se
+    tocan se unen en uno), con sus extremos en dos listas, así que cada
+    comprobación es una búsqueda binaria (bisect) de coste O(log k) para k
+    intervalos.
+
+    Argumentos constructor:
+        nombre: String con el nombre del requisito.
+        descripcion: String con la descripción del requisito.
+        intervalos: Secuencia de pares (minimo, maximo) de números decimales.
+
+    Excepciones constructor:
+        TypeError: Los extremos de los intervalos deben ser números.
+        ValueError: Debe haber al menos un intervalo.
+        ValueError: El mínimo de un intervalo es mayor que su máximo.
 
     Atributos/Propiedades:
         nombre: String con el nombre del requisito.
         descripcion: String con la descripción del requisito.
-        tipo: String con el tipo del requisito ("Booleano").
+        tipo: String con el tipo del requisito ("Intervalos").
         valor: Valor actualmente asignado al requisito.
-        valor_deseado: Valor que el requisito debe tener para ser evaluado como
-                       True.
+        intervalos: Tupla con los intervalos (tuplas (minimo, maximo))
+                    ordenados y fusionados.
+        valor_minimo: Mínimo del primer intervalo.
+        valor_maximo: Máximo del último intervalo.
     """
 
-    def __init__(self, nombre, descripcion, valor_deseado):
-        super(RequisitoBooleano, self).__init__(nombre, descripcion)
+    TIPO = "Intervalos"
+
+    def __init__(self, nombre, descripcion, intervalos):
+        intervalos = [tuple(intervalo) for intervalo in intervalos]
+
+        if (len(intervalos) == 0):
+            raise ValueError(u"El requisito \"" + nombre + u"\" debe tener " +
+                             u"al menos un intervalo!")
+
+        fusionados = []
+        for minimo, maximo in sorted(intervalos):
+            if (not isinstance(minimo, float) or
+                    not isinstance(maximo, float)):
+                raise TypeError(u"El valor introducido debe ser un número!")
+            if (minimo > maximo):
+                raise ValueError(u"El mínimo del intervalo [" +
+                                 unicode(minimo) + u", " + unicode(maximo) +
+                                 u"] es mayor que su máximo!")
+
+            if (len(fusionados) > 0 and minimo <= fusionados[-1][1]):
+                fusionados[-1][1] = max(fusionados[-1][1], maximo)
+            else:
+                fusionados.append([minimo, maximo])
+
+        super(RequisitoIntervalos, self).__init__(nombre, descripcion,
+                                                  fusionados[0][0],
+                                                  fusionados[-1][1])
+
+        self._minimos = [minimo for minimo, _ in fusionados]
+        self._maximos = [maximo for _, maximo in fusionados]
+
+    @classmethod
+    def desde_JSON(cls, definicion, crear_requisito):
+        """
+        Crea un requisito del tipo a partir de su definición en el JSON (ver
+        Requisito.desde_JSON).
+        """
+        return cls(definicion['nombre'], definicion['descripcion'],
+                   [(float(minimo), float(maximo))
+                    for minimo, maximo in definicion['intervalos']])
+
+    @property
+    def intervalos(self):
+        """
+        Getter de la propiedad intervalos.
+        """
+        return tuple(zip(self._minimos, self._maximos))
+
+    def rango_numerico(self):
+        """
+        Devuelve el mínimo y el máximo del intervalo (ver
+        Requisito.rango_numerico) o None si hay más de un intervalo.
+        """
+        if (len(self._minimos) > 1):
+            return None
+
+        return super(RequisitoIntervalos, self).rango_numerico()
+
+    def __str__(self):
+        """
+        Devuelve la representación en string del objeto (para usar con print).
+        """
+        return (Requisito.__str__(self) + u"\n- INTERVALOS: " +
+                u", ".join(u"[" + unicode(minimo) + u", " + unicode(maximo) +
+                           u"]" for minimo, maximo in self.intervalos))
+
+    def cumple(self, valor):
+        """
+        Devuelve True si un valor está en alguno de los intervalos.
+
+        Argumentos:
+            valor: El valor a comprobar.
+        """
+        # Último intervalo que empieza antes del valor (o en el valor)
+        i = bisect.bisect_right(self._minimos, valor) - 1
+
+        return i >= 0 and valor <= self._maximos[i]
+
+    def cumple_lote(self, valores):
+        """
+        Comprueba de una vez una columna de valores (ver
+        Requisito.cumple_lote).
+
+        Argumentos:
+            valores: Secuencia de valores.
+        """
+        minimos = self._minimos
+        maximos = self._maximos
+
+        # Con un solo intervalo basta con comparar con sus extremos
+        if (len(minimos) == 1):
+            return super(RequisitoIntervalos, self).cumple_lote(valores)
+
+        # La comparación encadenada no llega a buscar el intervalo de los
+        # valores anteriores al primero
+        primero = minimos[0]
+        buscar = bisect.bisect_right
+
+        return [None if valor is None else
+                primero <= valor <= maximos[buscar(minimos, valor) - 1]
+                for valor in valores]
+
+    def _distancia(self, valor):
+        """
+        Devuelve la distancia con signo de un valor al extremo más cercano del
+        intervalo en el que está (positiva) o del intervalo más cercano
+        (negativa).
+
+        Argumentos:
+            valor: El valor.
+        """
+        minimos = self._minimos
+        maximos = self._maximos
+        i = bisect.bisect_right(minimos, valor) - 1
+
+        if (i >= 0 and valor <= maximos[i]):
+            return min(valor - minimos[i], maximos[i] - valor)
+
+        # Fuera de los intervalos: entre el anterior (i) y el siguiente (i + 1)
+        distancias = []
+        if (i >= 0):
+            distancias.append(valor - maximos[i])
+        if (i + 1 < len(minimos)):
+            distancias.append(minimos[i + 1] - valor)
+
+        return -min(distancias)
+
+    def margen_lote(self, valores):
+        """
+        Calcula de una vez el margen de una columna de valores (ver
+        Requisito.margen_lote). El margen es relativo a la anchura total, del
+        mínimo del primer intervalo al máximo del último.
+
+        Argumentos:
+            valores: Secuencia de valores.
+        """
+        if (len(self._minimos) == 1):
+            return super(RequisitoIntervalos, self).margen_lote(valores)
+
+        distancia = self._distancia
+        anchura = self._anchura()
+
+        return [None if valor is None else distancia(valor) / anchura
+                for valor in valores]
+
+
+@registrar_tipo
+class RequisitoEntero(RequisitoRango):
+    """
+    Representa un requisito del tipo Entero (número entero entre un mínimo y
+    un máximo: edad, número de hijos, años de antigüedad...).
+
+    Argumentos constructor:
+        nombre: String con el nombre del requisito.
+        descripcion: String con la descripción del requisito.
+        valor_minimo: Entero mínimo necesario para evaluar el requisito como
+                      True.
+        valor_maximo: Entero máximo posible para evaluar el requisito como
+                      True.
+
+    Excepciones constructor:
+        TypeError: El argumento valor_minimo debe ser un número entero.
+        TypeError: El argumento valor_maximo debe ser un número entero.
+
+    Atributos/Propiedades:
+        nombre: String con el nombre del requisito.
+        descripcion: String con la descripción del requisito.
+        tipo: String con el tipo del requisito ("Entero").
+        valor: Valor actualmente asignado al requisito.
+        valor_minimo: Entero mínimo necesario para evaluar el requisito como
+                      True.
+        valor_maximo: Entero máximo posible para evaluar el requisito como
+                      True.
+    """
+
+    TIPO = "Entero"
+    VALOR_ESPERADO = u"un número entero"
+
+    def __init__(self, nombre, descripcion, valor_minimo, valor_maximo):
+        super(RequisitoEntero, self).__init__(
+            nombre, descripcion, self.comprobar_valor(valor_minimo),
+            self.comprobar_valor(valor_maximo))
+
+    @classmethod
+    def desde_JSON(cls, definicion, crear_requisito):
+        """
+        Crea un requisito del tipo a partir de su definición en el JSON (ver
+        Requisito.desde_JSON).
+        """
+        return cls(definicion['nombre'], definicion['descripcion'],
+                   definicion['valor_minimo'], definicion['valor_maximo'])
+
+    def comprobar_valor(self, valor):
+        """
+        Comprueba que un valor se puede asignar al requisito y lo devuelve.
+
+        Argumentos:
+            valor: El valor del requisito.
+
+        Excepciones:
+            TypeError: El argumento valor debe ser un número entero.
+        """
+        if (isinstance(valor, bool) or
+                not isinstance(valor, numbers.Integral)):
+            raise TypeError(u"El valor introducido debe ser un número entero!")
+
+        return valor
+
+    def convertir_texto(self, texto):
+        """
+        Convierte un texto en un valor del requisito.
+
+        Argumentos:
+            texto: String con el valor.
+
+        Excepciones:
+            ValueError: El texto no es un número entero.
+        """
+        return int(texto)
+
+    def convertir_lote(self, textos):
+        """
+        Convierte de una vez una columna de textos (ver
+        Requisito.convertir_lote).
+
+        Argumentos:
+            textos: Secuencia de strings.
+        """
+        try:
+            return list(map(int, textos))
+        except ValueError:
+            return Requisito.convertir_lote(self, textos)
+
+    def valor_desde_numero(self, numero):
+        """
+        Convierte un valor guardado como número decimal en un entero (ver
+        Requisito.valor_desde_numero).
+
+        Argumentos:
+            numero: Número decimal con el valor.
+        """
+        return int(numero)
+
+
+@registrar_tipo
+class RequisitoEnumerado(Requisito):
+    """
+    Representa un requisito del tipo Enumerado: se aprueba si su valor (un
+    string) es uno de los valores permitidos. Los valores permitidos se
+    guardan en un conjunto, así que cada comprobación es una búsqueda en una
+    tabla hash (no depende del número de valores permitidos).
+
+    Argumentos constructor:
+        nombre: String con el nombre del requisito.
+        descripcion: String con la descripción del requisito.
+        valores_permitidos: Secuencia de strings con los valores con los que el
+                            requisito se evalúa como True.
+
+    Excepciones constructor:
+        TypeError: Los valores permitidos deben ser strings.
+        ValueError: Debe haber al menos un valor permitido.
+
+    Atributos/Propiedades:
+        nombre: String con el nombre del requisito.
+        descripcion: String con la descripción del requisito.
+        tipo: String con el tipo del requisito ("Enumerado").
+        valor: Valor actualmente asignado al requisito.
+        valores_permitidos: Conjunto (frozenset) con los valores permitidos.
+    """
+
+    TIPO = "Enumerado"
+    NUMERICO = False
+    VALOR_ESPERADO = u"un texto"
+
+    def __init__(self, nombre, descripcion, valores_permitidos):
+        super(RequisitoEnumerado, self).__init__(nombre, descripcion)
+
+        valores_permitidos = frozenset(self.comprobar_valor(valor)
+                                       for valor in valores_permitidos)
+
+        if (len(valores_permitidos) == 0):
+            raise ValueError(u"El requisito \"" + nombre + u"\" debe tener " +
+                             u"al menos un valor permitido!")
+
+        self._valores_permitidos = valores_permitidos
+
+    @classmethod
+    def desde_JSON(cls, definicion, crear_requisito):
+        """
+        Crea un requisito del tipo a partir de su definición en el JSON (ver
+        Requisito.desde_JSON).
+        """
+        return cls(definicion['nombre'], definicion['descripcion'],
+                   definicion['valores'])
+
+    def comprobar_valor(self, valor):
+        """
+        Comprueba que un valor se puede asignar al requisito y lo devuelve.
+
+        Argumentos:
+            valor: El valor del requisito.
+
+        Excepciones:
+            TypeError: El argumento valor debe ser un string.
+        """
+        if (not isinstance(valor, (str, unicode))):
+            raise TypeError(u"El valor introducido debe ser un texto!")
+
+        return unicode(valor)
+
+    def convertir_texto(self, texto):
+        """
+        Convierte un texto en un valor del requisito (el propio texto).
+
+        Argumentos:
+            texto: String con el valor.
+        """
+        return unicode(texto)
+
+    @property
+    def valores_permitidos(self):
+        """
+        Getter de la propiedad valores_permitidos.
+        """
+        return self._valores_permitidos
+
+    def __str__(self):
+        """
+        Devuelve la representación en string del objeto (para usar con print).
+        """
+        return (super(RequisitoEnumerado, self).__str__() +
+                u"\n- VALORES PERMITIDOS: " +
+                u", ".join(sorted(self.valores_permitidos)))
+
+    def cumple(self, valor):
+        """
+        Devuelve True si un valor es uno de los valores permitidos.
+
+        Argumentos:
+            valor: El valor a comprobar.
+        """
+        return valor in self._valores_permitidos
+
+    def cumple_lote(self, valores):
+        """
+        Comprueba de una vez una columna de valores (ver
+        Requisito.cumple_lote).
+
+        Argumentos:
+            valores: Secuencia de valores.
+        """
+        permitidos = self._valores_permitidos
+
+        return [None if valor is None else valor in permitidos
+                for valor in valores]
+
+
+@registrar_tipo
+class RequisitoFecha(RequisitoRango):
+    """
+    Representa un requisito del tipo Fecha: se aprueba si su valor (una fecha
+    "AAAA-MM-DD") está entre una fecha mínima y una máxima. Las fechas se
+    guardan normalizadas como strings, que se ordenan igual que las fechas y
+    se pueden guardar tal cual en JSON.
+
+    Argumentos constructor:
+        nombre: String con el nombre del requisito.
+        descripcion: String con la descripción del requisito.
+        valor_minimo: Fecha mínima necesaria para evaluar el requisito como
+                      True.
+        valor_maximo: Fecha máxima posible para evaluar el requisito como True.
+
+    Excepciones constructor:
+        TypeError: Los argumentos valor_minimo y valor_maximo deben ser
+                   strings.
+        ValueError: Los argumentos valor_minimo y valor_maximo deben ser
+                    fechas válidas.
+
+    Atributos/Propiedades:
+        nombre: String con el nombre del requisito.
+        descripcion: String con la descripción del requisito.
+        tipo: String con el tipo del requisito ("Fecha").
+        valor: Valor actualmente asignado al requisito.
+        valor_minimo: Fecha mínima necesaria para evaluar el requisito como
+                      True.
+        valor_maximo: Fecha máxima posible para evaluar el requisito como True.
+    """
 
-        if (not isinstance(valor_deseado, bool)):
-            raise TypeError(u"El valor introducido debe ser un booleano!")
+    TIPO = "Fecha"
+    NUMERICO = False
+    VALOR_ESPERADO = u"una fecha (AAAA-MM-DD)"
 
-        self._valor_deseado = valor_deseado
+    def __init__(self, nombre, descripcion, valor_minimo, valor_maximo):
+        super(RequisitoFecha, self).__init__(nombre, descripcion,
+                                             _fecha(valor_minimo),
+                                             _fecha(valor_maximo))
 
-    @Requisito.valor.setter
-    def valor(self, valor):
+    @classmethod
+    def desde_JSON(cls, definicion, crear_requisito):
+        """
+        Crea un requisito del tipo a partir de su definición en el JSON (ver
+        Requisito.desde_JSON).
+        """
+        return cls(definicion['nombre'], definicion['descripcion'],
+                   definicion['valor_minimo'], definicion['valor_maximo'])
+
+    def comprobar_valor(self, valor):
         """
-        Setter de la propierdad valor.
+        Comprueba que un valor se puede asignar al requisito y lo devuelve
+        normalizado.
 
         Argumentos:
             valor: El valor del requisito.
 
         Excepciones:
-            TypeError: El argumento valor debe ser un booleano.
+            TypeError: El argumento valor debe ser un string.
+            ValueError: El argumento valor debe ser una fecha válida.
         """
-        if (not isinstance(valor, bool)):
-            raise TypeError("El valor introducido debe ser un booleano!")
+        return _fecha(valor)
+
+    def convertir_texto(self, texto):
+        """
+        Convierte un texto en un valor del requisito.
 
-        self._valor = valor
+        Argumentos:
+            texto: String con el valor.
 
-    @property
-    def tipo(self):
+        Excepciones:
+            ValueError: El texto no es una fecha válida.
         """
-        Getter de la propiedad tipo.
+        return _fecha(texto)
+
+    def convertir_lote(self, textos):
         """
-        return("Booleano")
+        Convierte de una vez una columna de textos (ver
+        Requisito.convertir_lote) fecha a fecha.
 
-    @property
-    def valor_deseado(self):
+        Argumentos:
+            textos: Secuencia de strings.
         """
-        Getter de la propiedad valor_deseado.
+        return Requisito.convertir_lote(self, textos)
+
+    @staticmethod
+    def _dia(fecha):
         """
-        return self._valor_deseado
+        Devuelve el número de día (ordinal) de una fecha "AAAA-MM-DD" ya
+        normalizada.
 
-    def __str__(self):
+        Argumentos:
+            fecha: String con la fecha.
         """
-        Devuelve la representación en string del objeto (para usar con print).
+        return datetime.date(int(fecha[:-6]), int(fecha[-5:-3]),
+                             int(fecha[-2:])).toordinal()
+
+    def _anchura(self):
         """
-        return (super(RequisitoBooleano, self).__str__() +
-                u"\n- VALOR DESEADO: " + str(self.valor_deseado))
+        Devuelve la anchura del rango en días (1 si las dos fechas coinciden).
+        """
+        return float(self._dia(self._valor_maximo) -
+                     self._dia(self._valor_minimo)) or 1.0
 
-    def valorar(self):
+    def _distancia(self, valor):
         """
-        Evalúa el requisito y devuelve True o False según corresponda.
+        Devuelve la distancia con signo (en días) de una fecha a la fecha
+        límite más cercana.
 
-        Excepciones:
-            RuntimeError: El requisito debe tener un valor asignado antes de
-                          poder ser valorado.
+        Argumentos:
+            valor: La fecha.
         """
-        if(self.valor is None):
-            raise RuntimeError(u"El requisito \"" + self.nombre +
-                               "\" debe tener un valor asignado!")
+        dia = self._dia(valor)
+
+        return min(dia - self._dia(self._valor_minimo),
+                   self._dia(self._valor_maximo) - dia)
+
+    def _texto_distancia(self, distancia):
+        """
+        Devuelve el texto de una distancia en días para la explicación.
+
+        Argumentos:
+            distancia: La distancia en días.
+        """
+        return unicode(distancia) + (u" día" if distancia == 1 else u" días")
+
+    def margen_lote(self, valores):
+        """
+        Calcula de una vez el margen de una columna de fechas (ver
+        Requisito.margen_lote).
+
+        Argumentos:
+            valores: Secuencia de fechas.
+        """
+        minimo = self._dia(self._valor_minimo)
+        maximo = self._dia(self._valor_maximo)
+        anchura = self._anchura()
+        dia = self._dia
 
-        return (self.valor == self.valor_deseado)
+        return [None if valor is None else
+                min(dia(valor) - minimo, maximo - dia(valor)) / anchura
+                for valor in valores]
 
 
-class RequisitoPorcentaje(Requisito):
+@registrar_tipo
+class RequisitoExpresion(RequisitoRango):
     """
-    Representa un requisito del tipo Porcentaje.
+    Representa un requisito del tipo Expresion.
+
+    Su valor no se introduce, sino que se calcula a partir del valor de otros
+    requisitos del caso mediante una fórmula (ratios, puntuaciones
+    combinadas...). La fórmula se compila una sola vez al crear el requisito.
 
     Argumentos constructor:
         nombre: String con el nombre del requisito.
         descripcion: String con la descripción del requisito.
-        valor_minimo: Porcentaje mínimo necesario para evaluar el requisito como
-                      True.
-        valor_maximo: Porcentaje máximo posible para evaluar el requisito como
-                      True.
+        expresion: String con la fórmula a calcular.
+        variables: Diccionario que asocia cada variable de la fórmula con el
+                   nombre del requisito del que toma su valor.
+        valor_minimo: Valor mínimo necesario para evaluar el requisito como True.
+        valor_maximo: Valor máximo posible para evaluar el requisito como True.
 
     Excepciones constructor:
-        ValueError: El argumento valor_minimo debe estar entre 0 y 1.
-        ValueError: El argumento valor_maximo debe estar entre 0 y 1.
+        TypeError: El argumento valor_minimo debe ser un número.
+        TypeError: El argumento valor_maximo debe ser un número.
+        ValueError: La fórmula no es válida.
 
     Atributos/Propiedades:
         nombre: String con el nombre del requisito.
         descripcion: String con la descripción del requisito.
-        tipo: String con el tipo del requisito ("Porcentaje").
-        valor: Valor actualmente asignado al requisito.
-        valor_minimo: Porcentaje mínimo necesario para evaluar el requisito como
-                      True.
-        valor_maximo: Porcentaje máximo posible para evaluar el requisito como
-                      True.
+        tipo: String con el tipo del requisito ("Expresion").
+        valor: Valor calculado a partir de los requisitos de los que depende
+               (None si alguno de ellos no tiene valor o no se puede calcular).
+        expresion: String con la fórmula.
+        variables: Diccionario que asocia cada variable con el nombre de su
+                   requisito.
+        operandos: Lista con los requisitos de los que depende (en el orden de
+                   las variables de la expresión compilada).
+        valor_minimo: Valor mínimo necesario para evaluar el requisito como True.
+        valor_maximo: Valor máximo posible para evaluar el requisito como True.
     """
 
-    def __init__(self, nombre, descripcion, valor_minimo, valor_maximo):
-        super(RequisitoPorcentaje, self).__init__(nombre, descripcion)
+    TIPO = "Expresion"
+    CALCULADO = True
 
-        if(valor_minimo < 0 or valor_minimo > 1):
-            raise ValueError(
-                u"El valor introducido debe ser un número decimal entre 0 y 1!")
-        if(valor_maximo < 0 or valor_maximo > 1):
-            raise ValueError(
-                u"El valor introducido debe ser un número decimal entre 0 y 1!")
+    def __init__(self, nombre, descripcion, expresion, variables, valor_minimo,
+                 valor_maximo):
+        if (not isinstance(valor_minimo, float)):
+            raise TypeError(u"El valor introducido debe ser un número!")
+        if (not isinstance(valor_maximo, float)):
+            raise TypeError(u"El valor introducido debe ser un número!")
 
-        self._valor_minimo = valor_minimo
-        self._valor_maximo = valor_maximo
+        super(RequisitoExpresion, self).__init__(nombre, descripcion,
+                                                 valor_minimo, valor_maximo)
+
+        self._variables = dict(variables)
+        self._expresion = Expresion(expresion, sorted(self._variables))
+        self._operandos = []
+
+    @classmethod
+    def desde_JSON(cls, definicion, crear_requisito):
+        """
+        Crea un requisito del tipo a partir de su definición en el JSON (ver
+        Requisito.desde_JSON).
+        """
+        return cls(definicion['nombre'], definicion['descripcion'],
+                   definicion['expresion'], definicion['variables'],
+                   float(definicion['valor_minimo']),
+                   float(definicion['valor_maximo']))
+
+    @property
+    def valor(self):
+        """
+        Getter de la propiedad valor.
 
-    @Requisito.valor.setter
+        El valor se calcula en cada consulta con la expresión ya compilada.
+        """
+        return self.calcular([operando.valor for operando in self._operandos])
+
+    @valor.setter
     def valor(self, valor):
         """
         Setter de la propiedad valor.
 
-        Argumentos:
-            valor: El valor del requisito.
+        Excepciones:
+            TypeError: El valor de este tipo de requisito no se puede asignar.
+        """
+        self.comprobar_valor(valor)
+
+    def comprobar_valor(self, valor):
+        """
+        Comprueba que un valor se puede asignar al requisito.
 
         Excepciones:
-            ValueError: El argumento valor_minimo debe estar entre 0 y 1.
+            TypeError: El valor de este tipo de requisito no se puede asignar.
         """
-        if (valor < 0 or valor > 1):
-            raise ValueError(
-                u"El valor introducido debe ser un número decimal entre 0 y 1!")
+        raise TypeError(u"El valor de un requisito del tipo Expresion se " +
+                        u"calcula a partir de otros requisitos!")
+
+    def convertir_texto(self, texto):
+        """
+        Convierte un texto en un valor del requisito.
+
+        Excepciones:
+            TypeError: El valor de este tipo de requisito no se puede asignar.
+        """
+        return self.comprobar_valor(texto)
+
+    def convertir_lote(self, textos):
+        """
+        Devuelve una columna de valores vacíos (el valor se calcula).
 
-        self._valor = valor
+        Argumentos:
+            textos: Secuencia de strings.
+        """
+        return [None] * len(textos)
+
+    def rango_numerico(self):
+        """
+        Devuelve None: el valor se calcula y no se puede guardar (ver
+        Requisito.rango_numerico).
+        """
+        return None
+
+    def calcular(self, valores):
+        """
+        Calcula el valor del requisito con la expresión ya compilada.
+
+        Argumentos:
+            valores: Lista con el valor de cada operando (en el orden de la
+                     propiedad operandos).
+
+        Devuelve:
+            El valor calculado (None si algún operando no tiene valor o no se
+            puede calcular).
+        """
+        if (len(valores) != len(self._expresion.variables) or
+                None in valores):
+            return None
+
+        try:
+            return float(self._expresion.evaluar(valores))
+        except (ArithmeticError, TypeError, ValueError):
+            return None
 
     @property
-    def tipo(self):
+    def expresion(self):
         """
-        Getter de la propiedad tipo.
+        Getter de la propiedad expresion.
         """
-        return("Porcentaje")
+        return self._expresion.texto
 
     @property
-    def valor_minimo(self):
+    def variables(self):
         """
-        Getter de la propiedad valor_minimo.
+        Getter de la propiedad variables.
         """
-        return self._valor_minimo
+        return self._variables
 
     @property
-    def valor_maximo(self):
+    def operandos(self):
         """
-        Getter de la propiedad valor_maximo.
+        Getter de la propiedad operandos.
         """
-        return self._valor_maximo
+        return self._operandos
+
+    @property
+    def coste(self):
+        """
+        Getter de la propiedad coste.
+        """
+        return self._expresion.coste
+
+    def vincular(self, requisitos_por_nombre):
+        """
+        Enlaza las variables de la expresión con los requisitos de los que
+        toman su valor.
+
+        Argumentos:
+            requisitos_por_nombre: Diccionario que asocia el nombre de cada
+                                   requisito del caso con el requisito.
+
+        Excepciones:
+            ValueError: Alguna variable hace referencia a un requisito que no
+                        existe.
+        """
+        operandos = []
+
+        for variable in self._expresion.variables:
+            nombre = self._variables[variable]
+            if (nombre not in requisitos_por_nombre):
+                raise ValueError(u"El requisito \"" + nombre +
+                                 u"\" no existe!")
+            operandos.append(requisitos_por_nombre[nombre])
+
+        self._operandos = operandos
 
     def __str__(self):
         """
         Devuelve la representación en string del objeto (para usar con print).
         """
-        return (super(RequisitoPorcentaje, self).__str__() +
+        return (Requisito.__str__(self) +
+                u"\n- EXPRESIÓN: " + unicode(self.expresion) +
                 u"\n- VALOR MÍNIMO: " + str(self.valor_minimo) +
                 u"\n- VALOR MÁXIMO: " + str(self.valor_maximo))
 
-    def valorar(self):
+    def explicar_valoracion(self, solicitante=None):
+        """
+        Devuelve el texto que se añade a la explicación del caso tras valorar
+        el requisito (el valor calculado).
+
+        Argumentos:
+            solicitante: (opcional) Registro (objeto de la clase
+                         ValoresSolicitante) con el que se ha valorado.
+        """
+        return (u"\n* VALOR CALCULADO: " +
+                _texto_valor(self._valor_de(solicitante)))
+
+    def valorar(self, solicitante=None):
         """
         Evalúa el requisito y devuelve True o False según corresponda.
 
+        Argumentos:
+            solicitante: (opcional) Registro (objeto de la clase
+                         ValoresSolicitante) con los valores de los
+                         operandos.
+
         Excepciones:
-            RuntimeError: El requisito debe tener un valor asignado antes de
+            RuntimeError: El valor del requisito debe poder calcularse antes de
                           poder ser valorado.
         """
-        if(self.valor is None):
+        valor = self._valor_de(solicitante)
+
+        if(valor is None):
             raise RuntimeError(u"El requisito \"" + self.nombre +
-                               "\" debe tener un valor asignado!")
+                               u"\" no ha podido ser calculado (compruebe el "
+                               u"valor de los requisitos de los que depende)!")
 
-        return (self.valor >= self.valor_minimo and
-                self.valor <= self.valor_maximo)
+        return self.cumple(valor)
 
 
-class RequisitoNumero(Requisito):
+@registrar_tipo
+class RequisitoGrupo(Requisito):
     """
-    Representa un requisito del tipo Numero.
+    Representa un grupo de requisitos (tipo Grupo).
+
+    Un grupo combina otros requisitos (que pueden ser a su vez grupos) con uno
+    de estos operadores:
+        "Y": Se aprueba si se aprueban todos sus requisitos.
+        "O": Se aprueba si se aprueba alguno de sus requisitos.
+        "AL_MENOS": Se aprueba si se aprueban al menos 'minimo' requisitos.
+
+    Los requisitos del grupo se evalúan de menor a mayor coste y la evaluación
+    se detiene en cuanto el resultado del grupo queda decidido.
 
     Argumentos constructor:
-        nombre: String con el nombre del requisito.
-        descripcion: String con la descripción del requisito.
-        valor_minimo: Valor mínimo necesario para evaluar el requisito como True.
-        valor_maximo: Valor máximo posible para evaluar el requisito como True.
+        nombre: String con el nombre del grupo.
+        descripcion: String con la descripción del grupo.
+        operador: String con el operador del grupo ("Y", "O" o "AL_MENOS").
+        requisitos: Lista con los requisitos del grupo.
+        minimo: (opcional) Número de requisitos que deben aprobarse (solo para
+                el operador "AL_MENOS").
 
     Excepciones constructor:
-        TypeError: El argumento valor_minimo debe ser un número.
-        TypeError: El argumento valor_maximo debe ser un número.
+        ValueError: El operador no es válido.
+        ValueError: El grupo debe tener al menos un requisito.
+        ValueError: El argumento minimo debe estar entre 1 y el número de
+                    requisitos del grupo.
 
     Atributos/Propiedades:
-        nombre: String con el nombre del requisito.
-        tipo: String con el tipo del requisito ("Numero").
-        valor: Valor actualmente asignado al requisito
-        valor_minimo: Valor mínimo necesario para evaluar el requisito como True.
-        valor_maximo: Valor máximo posible para evaluar el requisito como True.
+        nombre: String con el nombre del grupo.
+        descripcion: String con la descripción del grupo.
+        tipo: String con el tipo del requisito ("Grupo").
+        operador: String con el operador del grupo.
+        minimo: Número de requisitos que deben aprobarse para aprobar el grupo.
+        requisitos: Lista con los requisitos del grupo en el orden en que se
+                    evalúan.
+        coste: Suma del coste de los requisitos del grupo.
+        decisivo: Requisito que decidió el resultado en la última valoración.
     """
 
-    def __init__(self, nombre, descripcion, valor_minimo, valor_maximo):
-        super(RequisitoNumero, self).__init__(nombre, descripcion)
+    TIPO = "Grupo"
 
-        if (not isinstance(valor_minimo, float)):
-            raise TypeError(u"El valor introducido debe ser un número!")
-        if (not isinstance(valor_maximo, float)):
-            raise TypeError(u"El valor introducido debe ser un número!")
+    # Operadores válidos.
+    _OPERADORES = ("Y", "O", "AL_MENOS")
 
-        self._valor_minimo = valor_minimo
-        self._valor_maximo = valor_maximo
+    def __init__(self, nombre, descripcion, operador, requisitos, minimo=0):
+        super(RequisitoGrupo, self).__init__(nombre, descripcion)
 
-    @Requisito.valor.setter
-    def valor(self, valor):
+        if (operador not in self._OPERADORES):
+            raise ValueError(u"El operador \"" + unicode(operador) +
+                             u"\" no es válido!")
+        if (len(requisitos) == 0):
+            raise ValueError(
+                u"El grupo debe tener al menos un requisito!")
+
+        if (operador == "Y"):
+            minimo = len(requisitos)
+        elif (operador == "O"):
+            minimo = 1
+        elif (minimo < 1 or minimo > len(requisitos)):
+            raise ValueError(
+                u"El mínimo de requisitos a aprobar debe estar entre 1 y " +
+                str(len(requisitos)) + u"!")
+
+        self._operador = operador
+        self._minimo = minimo
+        # sorted es estable: a igual coste se respeta el orden del fichero
+        self._requisitos = sorted(requisitos, key=lambda x: x.coste)
+        self._coste = sum(requisito.coste for requisito in requisitos)
+        self._evaluados = []
+        self._decisivo = None
+
+    def comprobar_valor(self, valor):
         """
-        Setter de la propiedad valor.
+        Comprueba que un valor se puede asignar al grupo.
 
         Excepciones:
-            TypeError: El argumento valor debe ser un número.
+            TypeError: Un grupo no tiene valor propio.
         """
-        if (not isinstance(valor, float)):
-            raise TypeError(u"El valor introducido debe ser un número!")
+        raise TypeError(u"Un grupo de requisitos no tiene valor propio!")
+
+    @classmethod
+    def desde_JSON(cls, definicion, crear_requisito):
+        """
+        Crea un grupo a partir de su definición en el JSON, creando antes sus
+        requisitos (ver Requisito.desde_JSON).
+        """
+        return cls(definicion['nombre'], definicion['descripcion'],
+                   definicion['operador'],
+                   [crear_requisito(x) for x in definicion['requisitos']],
+                   int(definicion.get('minimo', 0)))
+
+    def convertir_texto(self, texto):
+        """
+        Convierte un texto en un valor del grupo.
 
-        self._valor = valor
+        Excepciones:
+            TypeError: Un grupo no tiene valor propio.
+        """
+        return self.comprobar_valor(texto)
+
+    def cumple_lote(self, valores):
+        """
+        Un grupo no tiene una columna de valores propia: sus resultados se
+        combinan a partir de los de sus requisitos (ver
+        DefinicionCaso.valorar_columnas).
+
+        Excepciones:
+            TypeError: Un grupo no tiene valor propio.
+        """
+        return self.comprobar_valor(valores)
 
     @property
-    def tipo(self):
+    def operador(self):
         """
-        Getter de la propiedad tipo.
+        Getter de la propiedad operador.
         """
-        return("Numero")
+        return self._operador
 
     @property
-    def valor_minimo(self):
+    def minimo(self):
         """
-        Getter de la propiedad valor_minimo.
+        Getter de la propiedad minimo.
         """
-        return self._valor_minimo
+        return self._minimo
 
     @property
-    def valor_maximo(self):
+    def requisitos(self):
         """
-        Getter de la propiedad valor_maximo.
+        Getter de la propiedad requisitos.
         """
-        return self._valor_maximo
+        return self._requisitos
+
+    @property
+    def coste(self):
+        """
+        Getter de la propiedad coste.
+        """
+        return self._coste
+
+    @property
+    def decisivo(self):
+        """
+        Getter de la propiedad decisivo.
+        """
+        return self._decisivo
 
     def __str__(self):
         """
         Devuelve la representación en string del objeto (para usar con print).
         """
-        return (super(RequisitoNumero, self).__str__() +
-                u"\n- VALOR MÍNIMO: " + str(self.valor_minimo) +
-                u"\n- VALOR MÁXIMO: " + str(self.valor_maximo))
+        return (super(RequisitoGrupo, self).__str__() +
+                u"\n- OPERADOR: " + unicode(self.operador) +
+                u"\n- MÍNIMO DE REQUISITOS A APROBAR: " + str(self.minimo) +
+                u"/" + str(len(self.requisitos)))
 
-    def valorar(self):
+    def explicar_valoracion(self, solicitante=None):
         """
-        Evalúa el requisito y devuelve True o False según corresponda.
+        Devuelve el texto que se añade a la explicación del caso tras valorar
+        el grupo: los requisitos que se han evaluado y el que ha decidido el
+        resultado.
+
+        Argumentos:
+            solicitante: (opcional) Registro (objeto de la clase
+                         ValoresSolicitante) con el que se ha valorado.
+        """
+        return u"".join(self._lineas_valoracion(u"\n", solicitante))
+
+    def _lineas_valoracion(self, sangria, solicitante=None):
+        """
+        Genera las líneas de la explicación de la última valoración (de forma
+        recursiva para los grupos anidados).
+
+        Argumentos:
+            sangria: String con el salto de línea y la sangría de cada línea.
+            solicitante: (opcional) Registro (objeto de la clase
+                         ValoresSolicitante) con el que se ha valorado.
+        """
+        if (solicitante is None):
+            evaluados, decisivo = self._evaluados, self._decisivo
+        else:
+            evaluados, decisivo = solicitante._valoracion_grupo(self)
+
+        yield (sangria + u"* REQUISITOS EVALUADOS: " +
+               str(len(evaluados)) + u"/" + str(len(self.requisitos)))
+
+        for requisito, resultado in evaluados:
+            linea = sangria + u"  - " + unicode(requisito.nombre)
+
+            if (requisito.tipo != "Grupo"):
+                linea += (u" (valor: " +
+                          _texto_valor(requisito._valor_de(solicitante)) +
+                          u")")
+
+            if (resultado):
+                linea += u" ===> APROBADO"
+            else:
+                linea += u" ===> RECHAZADO"
+
+            yield linea
+
+            if (requisito.tipo == "Grupo"):
+                for linea in requisito._lineas_valoracion(sangria + u"    ",
+                                                          solicitante):
+                    yield linea
+
+        if (decisivo is not None):
+            yield (sangria + u"* DECIDIDO POR: " + unicode(decisivo.nombre))
+
+    def valorar(self, solicitante=None):
+        """
+        Evalúa los requisitos del grupo (solo los necesarios) y devuelve True o
+        False según corresponda.
+
+        Argumentos:
+            solicitante: (opcional) Registro (objeto de la clase
+                         ValoresSolicitante) con los valores a evaluar (los
+                         requisitos evaluados se guardan en el registro y no
+                         en el grupo).
 
         Excepciones:
-            RuntimeError: El requisito debe tener un valor asignado antes de
-                          poder ser valorado.
+            RuntimeError: Alguno de los requisitos evaluados no tiene valor.
+            RuntimeError: La valoración del solicitante ha sido cancelada.
         """
-        if(self.valor is None):
-            raise RuntimeError(u"El requisito \"" + self.nombre +
-                               "\" debe tener un valor asignado!")
+        evaluados = []
+        decisivo = None
+
+        if (solicitante is None):
+            self._evaluados = evaluados
+            self._decisivo = None
+        else:
+            solicitante._guardar_grupo(self, evaluados, None)
+
+        aprobados = 0
+        pendientes = len(self.requisitos)
+
+        for requisito in self.requisitos:
+            if (solicitante is not None):
+                solicitante._comprobar_cancelado()
+            resultado = requisito.valorar(solicitante)
+            evaluados.append((requisito, resultado))
+            pendientes -= 1
+
+            if (resultado):
+                aprobados += 1
+
+            if (aprobados >= self.minimo or
+                    aprobados + pendientes < self.minimo):
+                decisivo = requisito
+                break
+
+        if (solicitante is None):
+            self._decisivo = decisivo
+        else:
+            solicitante._guardar_grupo(self, evaluados, decisivo)
 
-        return (self.valor >= self.valor_minimo and
-                self.valor <= self.valor_maximo)
+        return aprobados >= self.minimo
+
+    def reset(self):
+        """
+        Reinicializa el resultado de la última valoración del grupo.
+        """
+        self._evaluados = []
+        self._decisivo = None
 
 
 if __name__ == "__main__":
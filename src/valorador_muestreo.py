@@ -0,0 +1,415 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo con la estimación por muestreo de la tasa de aprobados de un lote.
+
+En lugar de valorar todos los solicitantes, se valora una muestra aleatoria
+(simple o estratificada) y se estiman la proporción de aprobados y la de
+rechazados por cada requisito del primer nivel con sus intervalos de
+confianza. El muestreo se detiene en cuanto todos los intervalos tienen la
+precisión pedida.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+from __future__ import print_function
+import sys
+import math
+import numbers
+import random
+
+# Compatibilidad con Python 3 (donde todos los strings son unicode).
+try:
+    unicode
+except NameError:
+    unicode = str
+
+
+def cuantil_normal(confianza):
+    """
+    Devuelve el valor z tal que el intervalo [-z, z] de la distribución normal
+    estándar tiene la probabilidad indicada.
+
+    Argumentos:
+        confianza: Probabilidad del intervalo (entre 0 y 1).
+
+    Excepciones:
+        ValueError: La confianza debe estar entre 0 y 1.
+    """
+    if (confianza <= 0 or confianza >= 1):
+        raise ValueError(u"La confianza debe ser un número decimal entre 0 " +
+                         u"y 1!")
+
+    # Bisección sobre la función de error (suficiente para unos pocos
+    # decimales y sin depender de bibliotecas externas)
+    inferior, superior = 0.0, 40.0
+    for _ in range(100):
+        z = (inferior + superior) / 2
+        if (math.erf(z / math.sqrt(2)) < confianza):
+            inferior = z
+        else:
+            superior = z
+
+    return (inferior + superior) / 2
+
+
+def intervalo_wilson(proporcion, n, z):
+    """
+    Devuelve una tupla (proporcion, inferior, superior) con el intervalo de
+    confianza de Wilson de una proporción.
+
+    Argumentos:
+        proporcion: Proporción observada.
+        n: Tamaño (efectivo) de la muestra.
+        z: Valor z de la confianza (ver cuantil_normal).
+    """
+    if (n <= 0):
+        return (proporcion, 0.0, 1.0)
+
+    z2 = z * z
+    denominador = 1 + z2 / n
+    centro = (proporcion + z2 / (2 * n)) / denominador
+    radio = (z * math.sqrt(proporcion * (1 - proporcion) / n +
+                           z2 / (4 * n * n)) / denominador)
+
+    return (proporcion, max(0.0, centro - radio), min(1.0, centro + radio))
+
+
+class EstimacionValoracion(object):
+    """
+    Resultado de una estimación por muestreo.
+
+    Las proporciones se dan como tuplas (proporcion, inferior, superior) con
+    la estimación y los extremos de su intervalo de confianza.
+
+    Argumentos constructor:
+        n_poblacion: Número de solicitantes del lote.
+        n_muestra: Número de solicitantes valorados.
+        tasa_aprobados: Estimación de la proporción de aprobados.
+        tasas_rechazo: Lista de tuplas (nombre, estimacion) con la estimación
+                       de la proporción de rechazados por cada requisito del
+                       primer nivel.
+        precision_alcanzada: True si todos los intervalos tienen la precisión
+                             pedida.
+        n_errores: (opcional) Número de solicitantes de la muestra que no se
+                   han podido valorar (no cuentan en las estimaciones).
+
+    Atributos/Propiedades:
+        n_poblacion: Número de solicitantes del lote.
+        n_muestra: Número de solicitantes valorados.
+        n_errores: Número de solicitantes de la muestra que no se han podido
+                   valorar.
+        tasa_aprobados: Estimación de la proporción de aprobados.
+        tasas_rechazo: Estimación de la proporción de rechazados por cada
+                       requisito del primer nivel.
+        precision_alcanzada: True si todos los intervalos tienen la precisión
+                             pedida.
+    """
+
+    def __init__(self, n_poblacion, n_muestra, tasa_aprobados, tasas_rechazo,
+                 precision_alcanzada, n_errores=0):
+        self._n_poblacion = n_poblacion
+        self._n_muestra = n_muestra
+        self._n_errores = n_errores
+        self._tasa_aprobados = tasa_aprobados
+        self._tasas_rechazo = tasas_rechazo
+        self._precision_alcanzada = precision_alcanzada
+
+    @property
+    def n_poblacion(self):
+        """
+        Getter de la propiedad n_poblacion.
+        """
+        return self._n_poblacion
+
+    @property
+    def n_muestra(self):
+        """
+        Getter de la propiedad n_muestra.
+        """
+        return self._n_muestra
+
+    @property
+    def n_errores(self):
+        """
+        Getter de la propiedad n_errores.
+        """
+        return self._n_errores
+
+    @property
+    def tasa_aprobados(self):
+        """
+        Getter de la propiedad tasa_aprobados.
+        """
+        return self._tasa_aprobados
+
+    @property
+    def tasas_rechazo(self):
+        """
+        Getter de la propiedad tasas_rechazo.
+        """
+        return self._tasas_rechazo
+
+    @property
+    def precision_alcanzada(self):
+        """
+        Getter de la propiedad precision_alcanzada.
+        """
+        return self._precision_alcanzada
+
+    def __str__(self):
+        """
+        Devuelve la representación en string del objeto (para usar con print).
+        """
+        def formatear(estimacion):
+            return u"%.2f%% [%.2f%%, %.2f%%]" % tuple(100 * x
+                                                    for x in estimacion)
+
+        texto = (u"Muestra: " + unicode(self.n_muestra) + u"/" +
+                 unicode(self.n_poblacion) + u" solicitantes")
+
+        if (self.n_errores > 0):
+            texto += (u" (" + unicode(self.n_errores) +
+                      u" con errores descartados)")
+
+        texto += u"\nAprobados: " + formatear(self.tasa_aprobados)
+
+        for nombre, estimacion in self.tasas_rechazo:
+            texto += u"\nRechazados por \"" + nombre + u"\": " + \
+                formatear(estimacion)
+
+        return texto
+
+
+class _Estrato(object):
+    """
+    Recuento de la muestra de un estrato.
+
+    Argumentos constructor:
+        indices: Lista con la posición de los solicitantes del estrato (en
+                 orden aleatorio).
+        n_requisitos: Número de requisitos del primer nivel del caso.
+    """
+
+    def __init__(self, indices, n_requisitos):
+        self.indices = indices
+        self.n_leidos = 0
+        self.n_muestra = 0
+        self.n_aprobados = 0
+        self.n_rechazos = [0] * n_requisitos
+
+
+def _estimar(estratos, contar, z):
+    """
+    Estima una proporción a partir de la muestra de cada estrato (muestreo
+    estratificado con corrección por población finita) y devuelve su
+    intervalo de Wilson con el tamaño de muestra efectivo.
+
+    Los solicitantes con errores no cuentan: el peso de cada estrato es su
+    número de solicitantes valorables, estimado a partir de los ya leídos.
+
+    Argumentos:
+        estratos: Lista de objetos _Estrato.
+        contar: Función que devuelve el número de casos favorables de un
+                estrato.
+        z: Valor z de la confianza.
+    """
+    proporcion = 0.0
+    varianza = 0.0
+    n_muestra = 0
+
+    tamanos = [float(len(e.indices)) * e.n_muestra / e.n_leidos
+               if (e.n_leidos > 0) else float(len(e.indices))
+               for e in estratos]
+    n_valorables = sum(tamanos)
+
+    for estrato, tamano in zip(estratos, tamanos):
+        if (estrato.n_muestra == 0):
+            continue
+
+        peso = tamano / n_valorables
+        p = float(contar(estrato)) / estrato.n_muestra
+        proporcion += peso * p
+        varianza += (peso * peso * p * (1 - p) / estrato.n_muestra *
+                     (1 - float(estrato.n_leidos) / len(estrato.indices)))
+        n_muestra += estrato.n_muestra
+
+    proporcion = min(1.0, max(0.0, proporcion))
+
+    if (all(estrato.n_leidos == len(estrato.indices)
+            for estrato in estratos)):
+        # Se han valorado todos los solicitantes: la proporción es exacta
+        return (proporcion, proporcion, proporcion)
+
+    if (varianza > 0):
+        n_efectivo = proporcion * (1 - proporcion) / varianza
+    else:
+        n_efectivo = n_muestra
+
+    return intervalo_wilson(proporcion, n_efectivo, z)
+
+
+def _acceso_solicitantes(solicitantes):
+    """
+    Devuelve una tupla (n, acceso) con el número de solicitantes y una función
+    que recibe la posición de un solicitante y devuelve su tupla
+    (identificador, valores).
+
+    Argumentos:
+        solicitantes: Solicitantes en cualquiera de las formas que admite
+                      estimar_valoracion.
+    """
+    if (hasattr(solicitantes, "n_solicitantes")):
+        # LoteIndexado: cada fila se lee del fichero cuando se pide
+        return (solicitantes.n_solicitantes, solicitantes.solicitante)
+
+    if (isinstance(solicitantes, tuple) and len(solicitantes) == 2 and
+            isinstance(solicitantes[0], numbers.Integral) and
+            callable(solicitantes[1])):
+        return solicitantes
+
+    return (len(solicitantes), solicitantes.__getitem__)
+
+
+def estimar_valoracion(caso, solicitantes, precision=0.01, confianza=0.95,
+                       estrato=None, n_minimo=100, semilla=None):
+    """
+    Estima la proporción de aprobados y la de rechazados por cada requisito
+    del primer nivel valorando una muestra aleatoria de los solicitantes, que
+    crece hasta que todos los intervalos de confianza tienen como mucho la
+    semiamplitud pedida (o hasta valorar todos los solicitantes).
+
+    Solo se leen los solicitantes de la muestra, así que con un
+    valorador_lotes.LoteIndexado (o una función de acceso) no hace falta
+    cargar ni convertir el lote entero.
+
+    Con muestreo estratificado cada estrato se muestrea en proporción a su
+    tamaño, lo que reduce la varianza si los estratos son homogéneos (por
+    ejemplo, estratificando por el valor de un requisito Booleano); para
+    asignar cada solicitante a su estrato hay que leerlos todos.
+
+    Los solicitantes que no se pueden leer o valorar (por ejemplo, por tener
+    un valor vacío o incorrecto) no detienen el muestreo: se descartan de la
+    estimación y se cuentan en la propiedad n_errores del resultado.
+
+    Argumentos:
+        caso: Caso (objeto de la clase Caso) con el que se valora.
+        solicitantes: Secuencia (por ejemplo, una lista) de tuplas
+                      (identificador, valores), como las que devuelve
+                      valorador_lotes.leer_solicitantes_CSV, un
+                      valorador_lotes.LoteIndexado o una tupla (n, acceso)
+                      con el número de solicitantes y una función que recibe
+                      la posición de un solicitante y devuelve su tupla
+                      (identificador, valores).
+        precision: (opcional) Semiamplitud máxima de los intervalos.
+        confianza: (opcional) Nivel de confianza de los intervalos.
+        estrato: (opcional) Función que recibe la lista de valores de un
+                 solicitante y devuelve la clave de su estrato; None para
+                 muestreo aleatorio simple.
+        n_minimo: (opcional) Tamaño mínimo de la muestra antes de comprobar la
+                  precisión.
+        semilla: (opcional) Semilla del generador aleatorio (para repetir la
+                 misma muestra).
+
+    Devuelve:
+        Un objeto EstimacionValoracion.
+
+    Excepciones:
+        ValueError: La precisión o la confianza no son válidas o no hay
+                    solicitantes.
+    """
+    if (precision <= 0):
+        raise ValueError(u"La precisión debe ser mayor que 0!")
+
+    z = cuantil_normal(confianza)
+    n_poblacion, acceso = _acceso_solicitantes(solicitantes)
+
+    if (n_poblacion == 0):
+        raise ValueError(u"No hay solicitantes!")
+
+    generador = random.Random(semilla)
+    requisitos = caso.requisitos_raiz
+    n_requisitos = len(requisitos)
+
+    n_errores = 0
+
+    if (estrato is None):
+        indices = list(range(n_poblacion))
+        generador.shuffle(indices)
+        estratos = [_Estrato(indices, n_requisitos)]
+    else:
+        claves = {}
+        for i in range(n_poblacion):
+            try:
+                _, valores = acceso(i)
+            except (IOError, ValueError):
+                n_errores += 1
+                continue
+            claves.setdefault(estrato(valores), []).append(i)
+        estratos = [_Estrato(indices, n_requisitos)
+                    for _, indices in sorted(claves.items())]
+        for e in estratos:
+            generador.shuffle(e.indices)
+
+    def estimaciones():
+        tasa_aprobados = _estimar(estratos, lambda e: e.n_aprobados, z)
+        tasas_rechazo = [(requisito.nombre,
+                          _estimar(estratos,
+                                   lambda e, j=j: e.n_rechazos[j], z))
+                         for j, requisito in enumerate(requisitos)]
+        return tasa_aprobados, tasas_rechazo
+
+    def precision_alcanzada(tasa_aprobados, tasas_rechazo):
+        return all((superior - inferior) / 2 <= precision
+                   for _, inferior, superior
+                   in [tasa_aprobados] + [t for _, t in tasas_rechazo])
+
+    # La precisión se comprueba cada cierto número de valoraciones (calcular
+    # los intervalos cuesta más que valorar un solicitante)
+    comprobacion = max(1, n_minimo // 4)
+    n_muestra = 0
+    n_leidos = n_errores
+
+    while (n_leidos < n_poblacion):
+        # Siguiente solicitante del estrato con menor fracción muestreada
+        siguiente = min((e for e in estratos if e.n_leidos < len(e.indices)),
+                        key=lambda e: float(e.n_leidos) / len(e.indices))
+
+        indice = siguiente.indices[siguiente.n_leidos]
+        siguiente.n_leidos += 1
+        n_leidos += 1
+
+        try:
+            _, valores = acceso(indice)
+            caso.asignar_valores(valores)
+            result = caso.valorar(explicar=False)
+        except (IOError, TypeError, ValueError, RuntimeError):
+            n_errores += 1
+            continue
+
+        if (result):
+            siguiente.n_aprobados += 1
+        for j, requisito_result in enumerate(caso.resultados):
+            if (not requisito_result):
+                siguiente.n_rechazos[j] += 1
+
+        siguiente.n_muestra += 1
+        n_muestra += 1
+
+        if (n_muestra >= n_minimo and n_muestra % comprobacion == 0 and
+                precision_alcanzada(*estimaciones())):
+            break
+
+    tasa_aprobados, tasas_rechazo = estimaciones()
+
+    return EstimacionValoracion(
+        n_poblacion, n_muestra, tasa_aprobados, tasas_rechazo,
+        precision_alcanzada(tasa_aprobados, tasas_rechazo), n_errores)
+
+
+if __name__ == "__main__":
+    """
+    En caso de que intentemos ejecutar este módulo.
+    """
+    print(u"Este módulo no debería ser ejecutado", file=sys.stderr)
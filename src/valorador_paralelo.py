@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo con la valoración en paralelo de lotes de solicitantes en memoria
+compartida.
+
+Los valores de los solicitantes se guardan en una matriz de números en memoria
+compartida junto con los límites (mínimo y máximo) de cada requisito, de modo
+que los procesos trabajadores no reciben copias de los datos: cada uno valora
+directamente un tramo de filas de la matriz y escribe los veredictos en un
+buffer de resultados también compartido. Lo único que se envía a cada
+trabajador es la posición del tramo que debe valorar.
+
+Solo se pueden valorar así los casos cuyos requisitos se reducen todos a
+comprobar que un valor numérico está entre un mínimo y un máximo (los que
+tienen rango_numerico: Booleano, Porcentaje, Numero, Entero e Intervalos de un
+solo intervalo).
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+from __future__ import print_function
+import sys
+import multiprocessing
+from array import array
+from multiprocessing.sharedctypes import RawArray
+
+
+# Datos compartidos de cada proceso trabajador (ver _iniciar_trabajador).
+_compartido = {}
+
+
+def _iniciar_trabajador(matriz, minimos, maximos, veredictos):
+    """
+    Guarda en el proceso trabajador las referencias a la memoria compartida
+    (se llama una sola vez al arrancar cada trabajador).
+
+    Argumentos:
+        matriz: RawArray con los valores de los solicitantes por filas.
+        minimos: RawArray con el valor mínimo de cada requisito.
+        maximos: RawArray con el valor máximo de cada requisito.
+        veredictos: RawArray en el que se escribe el veredicto de cada
+                    requisito de cada solicitante.
+    """
+    _compartido["matriz"] = matriz
+    _compartido["minimos"] = minimos
+    _compartido["maximos"] = maximos
+    _compartido["veredictos"] = veredictos
+
+
+def _valorar_tramo(tramo):
+    """
+    Valora las filas de un tramo de la matriz compartida y escribe sus
+    veredictos en el buffer de resultados compartido.
+
+    Argumentos:
+        tramo: Tupla (inicio, fin) con las filas a valorar.
+
+    Devuelve:
+        Número de solicitantes del tramo aprobados.
+    """
+    inicio, fin = tramo
+    matriz = _compartido["matriz"]
+    minimos = list(_compartido["minimos"])
+    maximos = list(_compartido["maximos"])
+    veredictos = _compartido["veredictos"]
+    n_requisitos = len(minimos)
+    n_aprobados = 0
+
+    for fila in range(inicio, fin):
+        base = fila * n_requisitos
+        aprobado = True
+
+        for j in range(n_requisitos):
+            valor = matriz[base + j]
+            if (minimos[j] <= valor <= maximos[j]):
+                veredictos[base + j] = 1
+            else:
+                veredictos[base + j] = 0
+                aprobado = False
+
+        if (aprobado):
+            n_aprobados += 1
+
+    return n_aprobados
+
+
+class LoteCompartido(object):
+    """
+    Lote de solicitantes guardado en memoria compartida para valorarlo en
+    paralelo.
+
+    Argumentos constructor:
+        caso: Caso (objeto de la clase Caso) con el que se valora.
+        solicitantes: Iterable de tuplas (identificador, valores), como las que
+                      devuelve valorador_lotes.leer_solicitantes_CSV.
+
+    Excepciones constructor:
+        ValueError: El caso tiene requisitos de un tipo que no se puede valorar
+                    en memoria compartida.
+        RuntimeError: Algún solicitante no tiene valor en algún requisito.
+
+    Atributos/Propiedades:
+        caso: Caso con el que se valora.
+        n_solicitantes: Número de solicitantes del lote.
+        identificadores: Lista con el identificador de cada solicitante.
+        n_aprobados: Número de solicitantes aprobados (None si el lote
+                     todavía no se ha valorado).
+    """
+
+    # Número de solicitantes de cada tramo que se envía a un trabajador.
+    TAM_TRAMO = 20000
+
+    def __init__(self, caso, solicitantes):
+        for requisito in caso.requisitos_raiz:
+            if (requisito.rango_numerico() is None):
+                raise ValueError(u"El requisito \"" + requisito.nombre +
+                                 u"\" es del tipo " + requisito.tipo +
+                                 u", que no se puede valorar en memoria " +
+                                 u"compartida!")
+
+        requisitos = caso.requisitos
+        n_requisitos = len(requisitos)
+
+        self._caso = caso
+        self._identificadores = []
+        self._n_aprobados = None
+
+        rangos = [requisito.rango_numerico() for requisito in requisitos]
+        minimos = [minimo for minimo, _ in rangos]
+        maximos = [maximo for _, maximo in rangos]
+
+        self._minimos = RawArray('d', minimos)
+        self._maximos = RawArray('d', maximos)
+
+        # Los valores se acumulan primero en un array normal porque no se sabe
+        # cuántos solicitantes hay hasta terminar de leerlos
+        valores_lote = array('d')
+        for identificador, valores in solicitantes:
+            for requisito, valor in zip(requisitos, valores):
+                if (valor is None):
+                    raise RuntimeError(u"El requisito \"" + requisito.nombre +
+                                       u"\" debe tener un valor asignado!")
+                valores_lote.append(float(valor))
+            self._identificadores.append(identificador)
+
+        self._matriz = RawArray('d', len(valores_lote))
+        self._matriz[:] = valores_lote
+        self._veredictos = RawArray('b', len(self._identificadores) *
+                                    n_requisitos)
+
+    @property
+    def caso(self):
+        """
+        Getter de la propiedad caso.
+        """
+        return self._caso
+
+    @property
+    def n_solicitantes(self):
+        """
+        Getter de la propiedad n_solicitantes.
+        """
+        return len(self._identificadores)
+
+    @property
+    def identificadores(self):
+        """
+        Getter de la propiedad identificadores.
+        """
+        return self._identificadores
+
+    @property
+    def n_aprobados(self):
+        """
+        Getter de la propiedad n_aprobados.
+        """
+        return self._n_aprobados
+
+    def valorar(self, n_procesos=None, tam_tramo=None):
+        """
+        Valora todos los solicitantes del lote repartiendo los tramos entre
+        varios procesos trabajadores.
+
+        Argumentos:
+            n_procesos: (opcional) Número de procesos trabajadores (por
+                        defecto, uno por procesador).
+            tam_tramo: (opcional) Número de solicitantes de cada tramo (por
+                       defecto, TAM_TRAMO).
+
+        Devuelve:
+            Número de solicitantes aprobados.
+        """
+        if (tam_tramo is None):
+            tam_tramo = self.TAM_TRAMO
+
+        n_solicitantes = self.n_solicitantes
+        tramos = [(inicio, min(inicio + tam_tramo, n_solicitantes))
+                  for inicio in range(0, n_solicitantes, tam_tramo)]
+
+        # La memoria compartida se pasa una sola vez al arrancar cada
+        # trabajador; a partir de ahí solo viajan las posiciones de los tramos
+        pool = multiprocessing.Pool(
+            n_procesos, _iniciar_trabajador,
+            (self._matriz, self._minimos, self._maximos, self._veredictos))
+        try:
+            self._n_aprobados = sum(pool.map(_valorar_tramo, tramos))
+        finally:
+            pool.close()
+            pool.join()
+
+        return self._n_aprobados
+
+    def resultados(self, indice):
+        """
+        Devuelve la lista con el veredicto de cada requisito de un solicitante
+        (en el orden de caso.requisitos_raiz).
+
+        Argumentos:
+            indice: Posición del solicitante.
+        """
+        n_requisitos = len(self._minimos)
+        base = indice * n_requisitos
+
+        return [bool(veredicto) for veredicto
+                in self._veredictos[base:base + n_requisitos]]
+
+    def aprobado(self, indice):
+        """
+        Devuelve el resultado de la valoración de un solicitante.
+
+        Argumentos:
+            indice: Posición del solicitante.
+        """
+        return all(self.resultados(indice))
+
+    def valores(self, indice):
+        """
+        Devuelve la lista de valores de un solicitante (preparada para
+        caso.asignar_valores).
+
+        Argumentos:
+            indice: Posición del solicitante.
+        """
+        n_requisitos = len(self._minimos)
+        base = indice * n_requisitos
+        valores = []
+
+        for requisito, valor in zip(self._caso.requisitos,
+                                    self._matriz[base:base + n_requisitos]):
+            valores.append(requisito.valor_desde_numero(valor))
+
+        return valores
+
+    def explicar(self, indice):
+        """
+        Devuelve la explicación de la valoración de un solicitante.
+
+        Argumentos:
+            indice: Posición del solicitante.
+        """
+        self._caso.asignar_valores(self.valores(indice))
+
+        return self._caso.explicar_resultados(self.resultados(indice))
+
+
+if __name__ == "__main__":
+    """
+    En caso de que intentemos ejecutar este módulo.
+    """
+    print(u"Este módulo no debería ser ejecutado", file=sys.stderr)
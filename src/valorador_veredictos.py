@@ -0,0 +1,404 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Módulo con el almacén compacto de veredictos para archivar lotes valorados.
+
+Por cada requisito del primer nivel del caso se guarda un mapa de bits con un
+bit por solicitante (1 si el requisito fue aprobado) y, por cada requisito, una
+columna con los valores introducidos (los de los tipos no numéricos, como
+Enumerado o Fecha, se guardan como la posición del valor en un diccionario de
+valores distintos de la columna). Con los mapas de bits se pueden contar y
+combinar (Y, NO) los veredictos de millones de solicitantes de forma muy
+rápida, y la explicación de cualquier solicitante se puede regenerar cuando se
+necesite a partir de los bits guardados y del caso.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+from __future__ import print_function
+import sys
+import io
+import json
+import math
+import struct
+import binascii
+from array import array
+
+# Compatibilidad con Python 3 (donde todos los strings son unicode).
+try:
+    unicode
+except NameError:
+    unicode = str
+
+
+# Valor con el que se guardan los requisitos sin valor.
+_SIN_VALOR = float("nan")
+
+# Marca al principio de los ficheros del almacén.
+_CABECERA = b"VALORADOR-VEREDICTOS-1\n"
+
+
+def _bytes_a_entero(datos):
+    """
+    Convierte un mapa de bits guardado en un bytearray (el bit i está en el
+    byte i // 8) en un entero (el bit i es el bit i del entero).
+
+    Argumentos:
+        datos: bytearray con el mapa de bits.
+    """
+    if (len(datos) == 0):
+        return 0
+
+    return int(binascii.hexlify(bytes(datos[::-1])), 16)
+
+
+def _entero_a_bytes(entero, n_bytes):
+    """
+    Convierte un entero en un mapa de bits guardado en un bytearray (operación
+    inversa de _bytes_a_entero).
+
+    Argumentos:
+        entero: Entero con el mapa de bits.
+        n_bytes: Número de bytes del mapa de bits.
+    """
+    hexadecimal = "%x" % entero
+    hexadecimal = hexadecimal.zfill(n_bytes * 2)
+
+    return bytearray(binascii.unhexlify(hexadecimal))[::-1]
+
+
+class AlmacenVeredictos(object):
+    """
+    Almacén compacto de los veredictos de un lote de solicitantes.
+
+    Argumentos constructor:
+        caso: Caso (objeto de la clase Caso) con el que se valoran los
+              solicitantes.
+
+    Atributos/Propiedades:
+        caso: Caso con el que se valoran los solicitantes.
+        n_solicitantes: Número de solicitantes guardados.
+        identificadores: Lista con el identificador de cada solicitante.
+    """
+
+    def __init__(self, caso):
+        self._caso = caso
+        self._identificadores = []
+        self._bits = [bytearray() for _ in caso.requisitos_raiz]
+        self._valores = [array('d') for _ in caso.requisitos]
+        self._diccionarios = [None if requisito.NUMERICO else []
+                              for requisito in caso.requisitos]
+        self._codigos = [{} for _ in caso.requisitos]
+        self._enteros = {}
+
+    @property
+    def caso(self):
+        """
+        Getter de la propiedad caso.
+        """
+        return self._caso
+
+    @property
+    def n_solicitantes(self):
+        """
+        Getter de la propiedad n_solicitantes.
+        """
+        return len(self._identificadores)
+
+    @property
+    def identificadores(self):
+        """
+        Getter de la propiedad identificadores.
+        """
+        return self._identificadores
+
+    def anadir_solicitante(self, identificador, valores):
+        """
+        Valora un solicitante y guarda sus valores y veredictos.
+
+        Argumentos:
+            identificador: Identificador del solicitante.
+            valores: Lista de valores de los requisitos (en el orden de
+                     caso.requisitos).
+
+        Devuelve:
+            El resultado de la valoración.
+        """
+        self._caso.asignar_valores(valores)
+        result = self._caso.valorar(explicar=False)
+
+        indice = len(self._identificadores)
+        byte, bit = indice >> 3, 1 << (indice & 7)
+
+        if (bit == 1):
+            for bits in self._bits:
+                bits.append(0)
+
+        for bits, requisito_result in zip(self._bits, self._caso.resultados):
+            if (requisito_result):
+                bits[byte] |= bit
+
+        for columna, requisito, diccionario, codigos in zip(
+                self._valores, self._caso.requisitos, self._diccionarios,
+                self._codigos):
+            valor = requisito.valor
+            if (valor is None):
+                columna.append(_SIN_VALOR)
+            elif (diccionario is None):
+                columna.append(float(valor))
+            else:
+                if (valor not in codigos):
+                    codigos[valor] = len(diccionario)
+                    diccionario.append(valor)
+                columna.append(float(codigos[valor]))
+
+        self._identificadores.append(identificador)
+        self._enteros = {}
+
+        return result
+
+    def anadir_lote(self, solicitantes):
+        """
+        Valora y guarda un lote de solicitantes.
+
+        Argumentos:
+            solicitantes: Iterable de tuplas (identificador, valores), como las
+                          que devuelve valorador_lotes.leer_solicitantes_CSV.
+
+        Devuelve:
+            Número de solicitantes aprobados del lote.
+        """
+        n_aprobados = 0
+
+        for identificador, valores in solicitantes:
+            if (self.anadir_solicitante(identificador, valores)):
+                n_aprobados += 1
+
+        return n_aprobados
+
+    def _indice_requisito(self, nombre):
+        """
+        Devuelve la posición de un requisito del primer nivel del caso.
+
+        Argumentos:
+            nombre: String con el nombre del requisito.
+
+        Excepciones:
+            ValueError: El requisito no existe en el caso.
+        """
+        for i, requisito in enumerate(self._caso.requisitos_raiz):
+            if (requisito.nombre == nombre):
+                return i
+
+        raise ValueError(u"El requisito \"" + nombre + u"\" no existe!")
+
+    def _entero(self, i):
+        """
+        Devuelve el mapa de bits del requisito i como entero (se guarda hasta
+        que se añadan más solicitantes).
+
+        Argumentos:
+            i: Posición del requisito del primer nivel.
+        """
+        if (i not in self._enteros):
+            self._enteros[i] = _bytes_a_entero(self._bits[i])
+
+        return self._enteros[i]
+
+    def todos(self):
+        """
+        Devuelve la máscara (entero) con todos los solicitantes.
+        """
+        return (1 << self.n_solicitantes) - 1
+
+    def aprobados(self, nombre=None):
+        """
+        Devuelve la máscara (entero) con los solicitantes que aprobaron el
+        requisito indicado o, si no se indica ninguno, el caso completo.
+
+        Argumentos:
+            nombre: (opcional) String con el nombre del requisito del primer
+                    nivel.
+        """
+        if (nombre is not None):
+            return self._entero(self._indice_requisito(nombre))
+
+        mascara = self.todos()
+        for i in range(len(self._bits)):
+            mascara &= self._entero(i)
+
+        return mascara
+
+    def consultar(self, aprobados=(), rechazados=()):
+        """
+        Devuelve la máscara (entero) con los solicitantes que aprobaron todos
+        los requisitos de aprobados y fueron rechazados en todos los de
+        rechazados.
+
+        Argumentos:
+            aprobados: (opcional) Nombres de los requisitos aprobados.
+            rechazados: (opcional) Nombres de los requisitos rechazados.
+        """
+        mascara = self.todos()
+
+        for nombre in aprobados:
+            mascara &= self._entero(self._indice_requisito(nombre))
+        for nombre in rechazados:
+            mascara &= ~self._entero(self._indice_requisito(nombre))
+
+        return mascara & self.todos()
+
+    @staticmethod
+    def contar(mascara):
+        """
+        Devuelve el número de solicitantes de una máscara (número de bits a 1).
+
+        Argumentos:
+            mascara: Entero con la máscara.
+        """
+        return bin(mascara).count("1")
+
+    def solicitantes(self, mascara):
+        """
+        Devuelve (generador) la posición de los solicitantes de una máscara.
+
+        Argumentos:
+            mascara: Entero con la máscara.
+        """
+        datos = _entero_a_bytes(mascara, (self.n_solicitantes + 7) >> 3)
+
+        for byte, valor in enumerate(datos):
+            if (valor):
+                for bit in range(8):
+                    if (valor >> bit & 1):
+                        yield (byte << 3) | bit
+
+    def resultados(self, indice):
+        """
+        Devuelve la lista con el veredicto de cada requisito del primer nivel
+        guardado para un solicitante.
+
+        Argumentos:
+            indice: Posición del solicitante.
+        """
+        byte, bit = indice >> 3, 1 << (indice & 7)
+
+        return [bool(bits[byte] & bit) for bits in self._bits]
+
+    def valores(self, indice):
+        """
+        Devuelve la lista de valores guardados de un solicitante (preparada
+        para caso.asignar_valores).
+
+        Argumentos:
+            indice: Posición del solicitante.
+        """
+        valores = []
+
+        for columna, requisito, diccionario in zip(
+                self._valores, self._caso.requisitos, self._diccionarios):
+            valor = columna[indice]
+            if (math.isnan(valor) or requisito.CALCULADO):
+                valores.append(None)
+            elif (diccionario is not None):
+                valores.append(diccionario[int(valor)])
+            else:
+                valores.append(requisito.valor_desde_numero(valor))
+
+        return valores
+
+    def explicar(self, indice):
+        """
+        Regenera la explicación de la valoración de un solicitante a partir de
+        sus veredictos y valores guardados.
+
+        Argumentos:
+            indice: Posición del solicitante.
+        """
+        self._caso.asignar_valores(self.valores(indice))
+
+        return self._caso.explicar_resultados(self.resultados(indice))
+
+    def guardar(self, file_path):
+        """
+        Guarda el almacén en un fichero binario.
+
+        Argumentos:
+            file_path: Ruta hacia el fichero.
+        """
+        cabecera = json.dumps({
+            "caso": self._caso.nombre,
+            "requisitos_raiz": [r.nombre for r in self._caso.requisitos_raiz],
+            "requisitos": [r.nombre for r in self._caso.requisitos],
+            "identificadores": [unicode(x) for x in self._identificadores],
+            "diccionarios": self._diccionarios,
+        }).encode('utf-8')
+
+        with io.open(file_path, 'wb') as f:
+            f.write(_CABECERA)
+            f.write(struct.pack("<Q", len(cabecera)))
+            f.write(cabecera)
+            for bits in self._bits:
+                f.write(bytes(bits))
+            for columna in self._valores:
+                f.write(columna.tostring() if sys.version_info[0] < 3
+                        else columna.tobytes())
+
+    @classmethod
+    def cargar(cls, file_path, caso):
+        """
+        Carga un almacén guardado con guardar.
+
+        Argumentos:
+            file_path: Ruta hacia el fichero.
+            caso: Caso (objeto de la clase Caso) con el que se valoraron los
+                  solicitantes.
+
+        Excepciones:
+            IOError: El fichero no es un almacén de veredictos válido o no
+                     corresponde al caso.
+        """
+        almacen = cls(caso)
+
+        with io.open(file_path, 'rb') as f:
+            if (f.read(len(_CABECERA)) != _CABECERA):
+                raise IOError(u"El fichero no es un almacén de veredictos!")
+
+            longitud = struct.unpack("<Q", f.read(8))[0]
+            cabecera = json.loads(f.read(longitud).decode('utf-8'))
+
+            if (cabecera["caso"] != caso.nombre or
+                    cabecera["requisitos_raiz"] !=
+                    [r.nombre for r in caso.requisitos_raiz] or
+                    cabecera["requisitos"] !=
+                    [r.nombre for r in caso.requisitos]):
+                raise IOError(u"El almacén de veredictos no corresponde al " +
+                              u"caso!")
+
+            almacen._identificadores = cabecera["identificadores"]
+            for i, diccionario in enumerate(cabecera.get("diccionarios", [])):
+                if (diccionario is not None):
+                    almacen._diccionarios[i] = diccionario
+                    almacen._codigos[i] = dict(
+                        (valor, codigo)
+                        for codigo, valor in enumerate(diccionario))
+            n_solicitantes = len(almacen._identificadores)
+
+            for bits in almacen._bits:
+                bits.extend(f.read((n_solicitantes + 7) >> 3))
+            for columna in almacen._valores:
+                datos = f.read(n_solicitantes * columna.itemsize)
+                if (sys.version_info[0] < 3):
+                    columna.fromstring(datos)
+                else:
+                    columna.frombytes(datos)
+
+        return almacen
+
+
+if __name__ == "__main__":
+    """
+    En caso de que intentemos ejecutar este módulo.
+    """
+    print(u"Este módulo no debería ser ejecutado", file=sys.stderr)
@@ -12,6 +12,12 @@ import sys
 from PyQt4 import QtCore
 from PyQt4 import QtGui
 
+# Compatibilidad con Python 3 (donde todos los strings son unicode).
+try:
+    unicode
+except NameError:
+    unicode = str
+
 
 class ValoradorView():
     """
@@ -20,15 +26,41 @@ class ValoradorView():
     Monta la interfaz del valorador a partir de las clases ValoradorWidget y
     ValoradorMainWindow y permite acceder a ellas a partir de sus atributos.
 
+    En el modo diferido la ventana principal se crea vacía (solo con la barra
+    de menús y la barra de estado) y el widget con la interfaz del valorador
+    no se construye hasta que se usa por primera vez, de modo que la ventana
+    puede mostrarse antes.
+
+    Argumentos constructor:
+        lazy: (opcional) True para construir el widget del valorador en el
+              primer uso (modo diferido).
+
     Atributos/Propiedades:
         main_widget: QWidget con la interfaz del valorador (objeto de la clase
             ValoradorWidget).
         main_window: Ventana principal (objeto de la clase ValoradorMainWindow).
     """
 
-    def __init__(self):
-        self.main_widget = ValoradorWidget()
-        self.main_window = ValoradorMainWindow(self.main_widget)
+    def __init__(self, lazy=False):
+        self._main_widget = None
+
+        if (lazy):
+            self.main_window = ValoradorMainWindow()
+        else:
+            self.main_window = ValoradorMainWindow(self.main_widget)
+
+    @property
+    def main_widget(self):
+        """
+        Getter de la propiedad main_widget (lo construye y lo coloca en la
+        ventana principal la primera vez).
+        """
+        if (self._main_widget is None):
+            self._main_widget = ValoradorWidget()
+            if (hasattr(self, "main_window")):
+                self.main_window.set_valorador_Widget(self._main_widget)
+
+        return self._main_widget
 
     def show(self):
         """
@@ -44,11 +76,12 @@ class ValoradorWidget(QtGui.QWidget):
     Atributos/Propiedades:
         abrir_Button: QPushButton para abrir fichero del caso.
         valorar_Button: QPushButton para valorar el caso.
+        cancelar_Button: QPushButton para cancelar la valoración en curso.
         reset_Button: QPushButton para reinicializar el caso.
         ruta_caso_LineEdit: QLineEdit de solo lectura que muestra la ruta del
                             fichero del caso.
         valor_LineEdit: QLineEdit para introducir el valor de un requisito
-                        del tipo Porcentaje o Numero.
+                        de cualquier tipo salvo Booleano.
         valor_ComboBox: QComboBox para introducir el valor de un requisito
                         del tipo Booleano.
         desc_caso_TextEdit: QTextEdit de solo lectura que muestra la
@@ -136,6 +169,11 @@ class ValoradorWidget(QtGui.QWidget):
         self.valorar_Button.setStatusTip(
             u"Iniciar proceso de valoración")
 
+        self.cancelar_Button = QtGui.QPushButton(u"Cancelar")
+        self.cancelar_Button.setEnabled(False)
+        self.cancelar_Button.setStatusTip(
+            u"Cancelar la valoración en curso")
+
         self.reset_Button = QtGui.QPushButton(u"Reset")
         self.reset_Button.setStatusTip(
             u"Reinicializar resultado y valores de los requisitos")
@@ -198,6 +236,7 @@ class ValoradorWidget(QtGui.QWidget):
         valorar_Layout = QtGui.QHBoxLayout()
         valorar_Layout.setAlignment(QtCore.Qt.AlignCenter)
         valorar_Layout.addWidget(self.valorar_Button)
+        valorar_Layout.addWidget(self.cancelar_Button)
         valorar_Layout_Widget = QtGui.QWidget()
         valorar_Layout_Widget.setLayout(valorar_Layout)
 
@@ -285,17 +324,25 @@ class ValoradorMainWindow(QtGui.QMainWindow):
     con el valorador.
 
     Argumentos constructor:
-        valorador_Widget: Widget con el valorador (objeto de la clase
-            valoradorWidget).
+        valorador_Widget: (opcional) Widget con el valorador (objeto de la clase
+            valoradorWidget). Si no se indica, se puede colocar después con
+            set_valorador_Widget.
 
     Atributos/Propiedades:
         valorador_Widget: Widget con el valorador (objeto de la clase
             valoradorWidget).
         exit_Action: QAction para salir del programa.
         open_file_Action: QAction para abrir fichero de caso.
+        open_catalogo_Action: QAction para abrir un caso desde el catálogo de
+                              un directorio de casos.
+        open_solicitantes_Action: QAction para abrir un lote de solicitantes
+                                  y ver su valoración con el caso abierto.
+        watch_file_Action: QAction (seleccionable) para activar o desactivar
+                           la recarga automática del fichero de caso abierto
+                           cuando se modifica.
     """
 
-    def __init__(self, valorador_Widget):
+    def __init__(self, valorador_Widget=None):
         super(ValoradorMainWindow, self).__init__()
 
         self.valorador_Widget = valorador_Widget
@@ -318,10 +365,34 @@ class ValoradorMainWindow(QtGui.QMainWindow):
         self.open_file_Action.setStatusTip(
             u"Abrir fichero JSON con el caso a valorar")
 
+        self.open_catalogo_Action = QtGui.QAction(
+            u"Abrir Caso desde Catálogo", self)
+        self.open_catalogo_Action.setShortcut('Ctrl+K')
+        self.open_catalogo_Action.setStatusTip(
+            u"Elegir el caso a valorar entre los casos de un directorio")
+
+        self.open_solicitantes_Action = QtGui.QAction(
+            u"Abrir Lote de Solicitantes", self)
+        self.open_solicitantes_Action.setShortcut('Ctrl+L')
+        self.open_solicitantes_Action.setStatusTip(
+            u"Abrir un fichero CSV de solicitantes y valorarlos con el caso "
+            u"abierto")
+
+        self.watch_file_Action = QtGui.QAction(
+            u"Recargar Caso al Modificarse", self)
+        self.watch_file_Action.setCheckable(True)
+        self.watch_file_Action.setChecked(True)
+        self.watch_file_Action.setStatusTip(
+            u"Recargar automáticamente el caso abierto cuando se modifique su "
+            u"fichero (conservando los valores introducidos)")
+
         ##### Barra de menús #####
         menu_bar = self.menuBar()
         file_Menu = menu_bar.addMenu(u"Archivo")
         file_Menu.addAction(self.open_file_Action)
+        file_Menu.addAction(self.open_catalogo_Action)
+        file_Menu.addAction(self.open_solicitantes_Action)
+        file_Menu.addAction(self.watch_file_Action)
         file_Menu.addSeparator()
         file_Menu.addAction(self.exit_Action)
 
@@ -330,11 +401,297 @@ class ValoradorMainWindow(QtGui.QMainWindow):
 
         ##### Widget contador #####
         # Añade a la ventana principal el contador.
-        self.setCentralWidget(self.valorador_Widget)
+        if (self.valorador_Widget is not None):
+            self.setCentralWidget(self.valorador_Widget)
 
         ##### Propiedades ventana #####
         self.setWindowTitle(u"Valorador de Requisitos")
 
+    def set_valorador_Widget(self, valorador_Widget):
+        """
+        Coloca el widget con el valorador en la ventana principal (para cuando
+        se construye después que la ventana).
+
+        Argumentos:
+            valorador_Widget: Widget con el valorador (objeto de la clase
+                valoradorWidget).
+        """
+        self.valorador_Widget = valorador_Widget
+        self.setCentralWidget(valorador_Widget)
+
+
+class ValoradorCatalogoDialog(QtGui.QDialog):
+    """
+    QDialog con la lista de casos de un catálogo para elegir el caso a abrir.
+
+    Argumentos constructor:
+        entradas: Lista con las entradas del catálogo (ver la propiedad
+                  entradas de la clase CatalogoCasos).
+        parent: (opcional) QWidget padre.
+
+    Atributos/Propiedades:
+        casos_Table: QTableWidget con los casos del catálogo.
+        file_path: String con la ruta del caso seleccionado ("" si no hay
+                   ninguno seleccionado).
+    """
+
+    # Tamaño inicial del diálogo.
+    _WIDTH = 750
+    _HEIGHT = 400
+
+    def __init__(self, entradas, parent=None):
+        super(ValoradorCatalogoDialog, self).__init__(parent)
+
+        self._entradas = entradas
+
+        self._init_UI()
+
+    def _init_UI(self):
+        """
+        Inicialización de la interfaz.
+        """
+        ##### Tabla de casos #####
+        self.casos_Table = QtGui.QTableWidget(len(self._entradas), 3)
+        self.casos_Table.setHorizontalHeaderLabels(
+            [u"Caso", u"Requisitos", u"Fichero"])
+        self.casos_Table.setSelectionBehavior(
+            QtGui.QAbstractItemView.SelectRows)
+        self.casos_Table.setSelectionMode(
+            QtGui.QAbstractItemView.SingleSelection)
+        self.casos_Table.setEditTriggers(
+            QtGui.QAbstractItemView.NoEditTriggers)
+        self.casos_Table.horizontalHeader().setStretchLastSection(True)
+        self.casos_Table.verticalHeader().setVisible(False)
+
+        for fila, entrada in enumerate(self._entradas):
+            if (entrada["error"] is None):
+                nombre = entrada["nombre"]
+                tooltip = entrada["descripcion"]
+                requisitos = (unicode(entrada["n_requisitos"]) + u" (" +
+                              u", ".join(tipo + u": " + unicode(n) for tipo, n
+                                         in sorted(entrada["tipos"].items())) +
+                              u")")
+            else:
+                nombre = u"(no válido)"
+                tooltip = entrada["error"]
+                requisitos = u""
+
+            nombre_Item = QtGui.QTableWidgetItem(nombre)
+            nombre_Item.setToolTip(tooltip)
+            self.casos_Table.setItem(fila, 0, nombre_Item)
+            self.casos_Table.setItem(fila, 1,
+                                     QtGui.QTableWidgetItem(requisitos))
+            self.casos_Table.setItem(
+                fila, 2, QtGui.QTableWidgetItem(entrada["fichero"]))
+
+        self.casos_Table.resizeColumnsToContents()
+        self.casos_Table.cellDoubleClicked.connect(self.accept)
+
+        ##### Botones #####
+        buttons = QtGui.QDialogButtonBox(
+            QtGui.QDialogButtonBox.Open | QtGui.QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        ##### Layout #####
+        layout = QtGui.QVBoxLayout()
+        layout.addWidget(self.casos_Table)
+        layout.addWidget(buttons)
+        self.setLayout(layout)
+
+        ##### Propiedades ventana #####
+        self.setWindowTitle(u"Catálogo de Casos")
+        self.resize(self._WIDTH, self._HEIGHT)
+
+    @property
+    def file_path(self):
+        """
+        Getter de la propiedad file_path.
+        """
+        fila = self.casos_Table.currentRow()
+
+        if (fila < 0 or self._entradas[fila]["error"] is not None):
+            return ""
+
+        return self._entradas[fila]["file_path"]
+
+
+class SolicitantesTableModel(QtCore.QAbstractTableModel):
+    """
+    Modelo de tabla con los solicitantes de un lote (una fila por solicitante
+    y una columna con el veredicto del caso y otra por cada requisito del
+    primer nivel).
+
+    Los datos se piden al lote solo para las filas que se muestran, así que
+    cada solicitante se lee y se valora la primera vez que se ve (o cuando
+    hace falta para ordenar o filtrar la tabla).
+
+    Argumentos constructor:
+        lote: Lote de solicitantes (objeto de la clase LoteIndexado).
+        parent: (opcional) QObject padre.
+
+    Atributos/Propiedades:
+        lote: Lote de solicitantes.
+    """
+
+    # Texto de cada estado de la valoración (en el orden de LoteIndexado).
+    _ESTADOS = (u"", u"APROBADO", u"RECHAZADO", u"ERROR")
+
+    def __init__(self, lote, parent=None):
+        super(SolicitantesTableModel, self).__init__(parent)
+
+        self.lote = lote
+        self._cabeceras = ([u"Solicitante", u"Valoración"] +
+                           [requisito.nombre for requisito
+                            in lote.definicion.requisitos_raiz])
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        """
+        Devuelve el número de filas (solicitantes).
+        """
+        if (parent.isValid()):
+            return 0
+
+        return self.lote.n_solicitantes
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        """
+        Devuelve el número de columnas.
+        """
+        if (parent.isValid()):
+            return 0
+
+        return len(self._cabeceras)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        """
+        Devuelve el contenido de una celda (valorando el solicitante si hace
+        falta).
+        """
+        if (not index.isValid() or role != QtCore.Qt.DisplayRole):
+            return None
+
+        fila, columna = index.row(), index.column()
+
+        if (columna == 0):
+            return unicode(self.lote.identificador(fila))
+
+        if (columna == 1):
+            return self._ESTADOS[self.lote.estado(fila)]
+
+        requisito_result = self.lote.resultados(fila)[columna - 2]
+        if (requisito_result is None):
+            return u""
+
+        return self._ESTADOS[1] if requisito_result else self._ESTADOS[2]
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        """
+        Devuelve el título de una columna o el número de una fila.
+        """
+        if (role != QtCore.Qt.DisplayRole):
+            return None
+
+        if (orientation == QtCore.Qt.Horizontal):
+            return self._cabeceras[section]
+
+        return unicode(section + 1)
+
+
+class ValoradorSolicitantesDialog(QtGui.QDialog):
+    """
+    QDialog con la tabla de los solicitantes de un lote, su veredicto y la
+    explicación del solicitante seleccionado.
+
+    Argumentos constructor:
+        table_Model: Modelo con los solicitantes (objeto de la clase
+                     SolicitantesTableModel).
+        parent: (opcional) QWidget padre.
+
+    Atributos/Propiedades:
+        table_Model: Modelo con los solicitantes.
+        proxy_Model: QSortFilterProxyModel que ordena y filtra la tabla.
+        filtro_ComboBox: QComboBox para mostrar todos los solicitantes, solo
+                         los aprobados o solo los rechazados.
+        solicitantes_Table: QTableView con los solicitantes.
+        explicacion_TextEdit: QTextEdit de solo lectura que muestra la
+                              explicación del solicitante seleccionado.
+    """
+
+    # Tamaño inicial del diálogo.
+    _WIDTH = 1000
+    _HEIGHT = 600
+
+    # Textos del filtro de solicitantes y valoración que deja ver cada uno.
+    FILTROS = ((u"Todos", u""),
+               (u"Aprobados", u"^APROBADO$"),
+               (u"Rechazados", u"^RECHAZADO$"))
+
+    def __init__(self, table_Model, parent=None):
+        super(ValoradorSolicitantesDialog, self).__init__(parent)
+
+        self.table_Model = table_Model
+
+        self._init_UI()
+
+    def _init_UI(self):
+        """
+        Inicialización de la interfaz.
+        """
+        ##### Modelo ordenable y filtrable #####
+        self.proxy_Model = QtGui.QSortFilterProxyModel(self)
+        self.proxy_Model.setSourceModel(self.table_Model)
+        self.proxy_Model.setFilterKeyColumn(1)
+
+        ##### Filtro #####
+        self.filtro_ComboBox = QtGui.QComboBox()
+        self.filtro_ComboBox.addItems([texto for texto, _ in self.FILTROS])
+        self.filtro_ComboBox.setStatusTip(
+            u"Mostrar todos los solicitantes o solo los aprobados o "
+            u"rechazados")
+
+        ##### Tabla de solicitantes #####
+        self.solicitantes_Table = QtGui.QTableView()
+        self.solicitantes_Table.setModel(self.proxy_Model)
+        self.solicitantes_Table.setSelectionBehavior(
+            QtGui.QAbstractItemView.SelectRows)
+        self.solicitantes_Table.setSelectionMode(
+            QtGui.QAbstractItemView.SingleSelection)
+        self.solicitantes_Table.setEditTriggers(
+            QtGui.QAbstractItemView.NoEditTriggers)
+        self.solicitantes_Table.horizontalHeader().setStretchLastSection(True)
+
+        # Sin columna de ordenación inicial, para no valorar todo el lote al
+        # abrirlo
+        self.solicitantes_Table.horizontalHeader().setSortIndicator(
+            -1, QtCore.Qt.AscendingOrder)
+        self.solicitantes_Table.setSortingEnabled(True)
+
+        ##### Explicación #####
+        self.explicacion_TextEdit = QtGui.QTextEdit()
+        self.explicacion_TextEdit.setReadOnly(True)
+        self.explicacion_TextEdit.setStatusTip(
+            u"Explicación de la valoración del solicitante seleccionado")
+
+        ##### Layout #####
+        filtro_Layout = QtGui.QHBoxLayout()
+        filtro_Layout.addWidget(QtGui.QLabel(u"Mostrar"))
+        filtro_Layout.addWidget(self.filtro_ComboBox)
+        filtro_Layout.addStretch()
+
+        splitter = QtGui.QSplitter(QtCore.Qt.Horizontal)
+        splitter.addWidget(self.solicitantes_Table)
+        splitter.addWidget(self.explicacion_TextEdit)
+
+        layout = QtGui.QVBoxLayout()
+        layout.addLayout(filtro_Layout)
+        layout.addWidget(splitter)
+        self.setLayout(layout)
+
+        ##### Propiedades ventana #####
+        self.setWindowTitle(u"Solicitantes")
+        self.resize(self._WIDTH, self._HEIGHT)
+
 
 class ValoradorMessageBoxes():
     """
@@ -413,6 +770,40 @@ class ValoradorMessageBoxes():
         return unicode(QtGui.QFileDialog.getOpenFileName(
             parent, u"Abrir fichero", ".", selectedFilter))
 
+    @staticmethod
+    def open_directory_dialog(parent):
+        """
+        Muestra una ventana de diálogo para seleccionar un directorio.
+
+        Argumentos:
+            parent: QWidget padre.
+
+        Devuelve:
+            String con la ruta del directorio seleccionado.
+        """
+        return unicode(QtGui.QFileDialog.getExistingDirectory(
+            parent, u"Abrir directorio de casos", "."))
+
+    @staticmethod
+    def open_catalogo_dialog(parent, entradas):
+        """
+        Muestra una ventana de diálogo con los casos de un catálogo para
+        seleccionar el caso a abrir.
+
+        Argumentos:
+            parent: QWidget padre.
+            entradas: Lista con las entradas del catálogo.
+
+        Devuelve:
+            String con la ruta del caso seleccionado ("" si se cancela).
+        """
+        dialog = ValoradorCatalogoDialog(entradas, parent)
+
+        if (dialog.exec_() == QtGui.QDialog.Accepted):
+            return dialog.file_path
+
+        return ""
+
 
 if __name__ == "__main__":
     """
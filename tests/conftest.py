@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+"""
+Configuración común de las pruebas (se ejecutan con pytest desde la raíz del
+repositorio).
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import os
+import sys
+import random
+import datetime
+
+import pytest
+
+# Directorio con el código del valorador.
+_SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         os.pardir, "src")
+
+# Directorio con los casos de prueba.
+_CASOS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, "casos-de-prueba")
+
+sys.path.insert(0, _SRC_PATH)
+
+
+def valor_aleatorio(requisito, generador, faltan=0.0):
+    """
+    Devuelve un valor aleatorio para un requisito (algunos fuera de su rango
+    para que haya aprobados y rechazados), convertido desde su texto.
+    """
+    if (requisito.tipo == "Expresion" or generador.random() < faltan):
+        return None
+
+    if (requisito.tipo == "Booleano"):
+        texto = u"true" if generador.random() < 0.8 else u"false"
+    elif (requisito.tipo == "Enumerado"):
+        opciones = sorted(requisito.valores_permitidos) + [u"otro"]
+        texto = opciones[int(generador.random() * len(opciones))]
+    elif (requisito.tipo == "Fecha"):
+        minimo = requisito._dia(requisito.valor_minimo)
+        maximo = requisito._dia(requisito.valor_maximo)
+        texto = datetime.date.fromordinal(
+            minimo - 10 + int(generador.random() * (maximo - minimo + 20))
+        ).isoformat()
+    else:
+        minimo = requisito.valor_minimo
+        rango = requisito.valor_maximo - minimo
+        valor = minimo - rango / 4 + generador.random() * rango * 1.5
+        if (requisito.tipo == "Porcentaje"):
+            valor = min(1.0, max(0.0, valor))
+        if (requisito.tipo == "Entero"):
+            texto = str(int(round(valor)))
+        else:
+            texto = u"%.2f" % valor
+
+    return requisito.convertir_texto(texto)
+
+
+def lote_aleatorio(caso, n, faltan=0.0, semilla=0):
+    """
+    Devuelve una lista con los valores (preparados para caso.asignar_valores)
+    de n solicitantes aleatorios.
+    """
+    generador = random.Random(semilla)
+    return [[valor_aleatorio(requisito, generador, faltan)
+             for requisito in caso.requisitos] for _ in range(n)]
+
+
+@pytest.fixture
+def cargar_caso():
+    """
+    Devuelve una función que carga un caso de casos-de-prueba a partir del
+    nombre de su fichero (sin la extensión).
+    """
+    from valorador_model import Caso
+
+    def cargar(nombre):
+        caso = Caso()
+        caso.load_from_JSON_file(os.path.join(_CASOS_PATH, nombre + ".json"))
+        return caso
+
+    return cargar
+
+
+@pytest.fixture
+def generar_lote():
+    """
+    Devuelve la función lote_aleatorio.
+    """
+    return lote_aleatorio
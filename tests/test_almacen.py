@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas del almacén de valoraciones (SQLite).
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import os
+
+import pytest
+
+from valorador_almacen import AlmacenValoraciones
+
+
+CASO = "becas-colaboracion-grado-MECD"
+
+
+@pytest.fixture
+def almacen(tmpdir):
+    almacen = AlmacenValoraciones(str(tmpdir.join("valoraciones.db")))
+    yield almacen
+    almacen.cerrar()
+
+
+def _valorar(caso, solicitantes):
+    """
+    Devuelve la lista de resultados de cada solicitante valorado sin almacén.
+    """
+    resultados = []
+    for _, valores in solicitantes:
+        caso.asignar_valores(valores)
+        caso.valorar(explicar=False)
+        resultados.append(list(caso.resultados))
+    return resultados
+
+
+def test_registrar_caso(almacen, cargar_caso):
+    caso = cargar_caso(CASO)
+    file_path = os.path.join("casos-de-prueba", CASO + ".json")
+
+    caso_id = almacen.registrar_caso(caso, file_path)
+    assert almacen.registrar_caso(caso, file_path) == caso_id
+    assert [v[:2] for v in almacen.versiones_caso(caso.nombre)] == [
+        (caso_id, 1)]
+
+
+def test_veredictos(almacen, cargar_caso, generar_lote):
+    caso = cargar_caso(CASO)
+    caso_id = almacen.registrar_caso(
+        caso, os.path.join("casos-de-prueba", CASO + ".json"))
+    almacen.TAM_LOTE = 64
+    solicitantes = list(enumerate(generar_lote(caso, 500)))
+
+    assert almacen.guardar_valoraciones(caso_id, caso, solicitantes) == 500
+
+    resultados = _valorar(caso, solicitantes)
+    n_aprobados = sum(1 for r in resultados if (False not in r))
+    assert almacen.contar_veredictos(caso_id) == (500, n_aprobados)
+    assert almacen.contar_rechazos(caso_id) == [
+        sum(1 for r in resultados if (r[i] is False))
+        for i in range(len(caso.requisitos_raiz))]
+
+    for i, requisito in enumerate(caso.requisitos_raiz):
+        esperados = [str(identificador)
+                     for (identificador, _), r in zip(solicitantes, resultados)
+                     if (r[i] is False and r.count(False) == 1)]
+        assert sorted(almacen.rechazados_solo_por(
+            caso_id, requisito.nombre)) == sorted(esperados)
+
+    identificador, valores = solicitantes[7]
+    assert almacen.valores_solicitante(caso_id, identificador) == valores
+    assert almacen.valores_solicitante(caso_id, "no existe") is None
+
+    with pytest.raises(ValueError):
+        list(almacen.rechazados_solo_por(caso_id, "no existe"))
+
+
+def test_solicitantes_incorrectos(almacen, cargar_caso, generar_lote):
+    caso = cargar_caso(CASO)
+    caso_id = almacen.registrar_caso(
+        caso, os.path.join("casos-de-prueba", CASO + ".json"))
+    almacen.TAM_LOTE = 10
+    solicitantes = list(enumerate(generar_lote(caso, 50)))
+    # Una fila incorrecta después de varios lotes ya guardados
+    solicitantes[35][1][2] = "no es un porcentaje"
+    solicitantes[41][1][0] = None
+
+    errores = []
+    assert almacen.guardar_valoraciones(caso_id, caso, solicitantes,
+                                        errores) == 48
+    assert [e[0] for e in errores] == [35, 41]
+    assert almacen.contar_veredictos(caso_id)[0] == 48
+    assert almacen.valores_solicitante(caso_id, 35) is None
+    assert almacen.valores_solicitante(caso_id, 49) == solicitantes[49][1]
+
+
+def test_cargas_simultaneas(tmpdir, cargar_caso, generar_lote):
+    db_path = str(tmpdir.join("valoraciones.db"))
+    file_path = os.path.join("casos-de-prueba", CASO + ".json")
+    caso = cargar_caso(CASO)
+    otro_caso = cargar_caso(CASO)
+    almacen = AlmacenValoraciones(db_path)
+    otro_almacen = AlmacenValoraciones(db_path)
+    almacen.TAM_LOTE = otro_almacen.TAM_LOTE = 10
+    caso_id = almacen.registrar_caso(caso, file_path)
+
+    def solicitantes():
+        for i, valores in enumerate(generar_lote(caso, 40)):
+            # Otra conexión guarda solicitantes a mitad de la carga
+            if (i == 15):
+                otro_almacen.guardar_valoraciones(
+                    caso_id, otro_caso, [("otro-" + str(j), valores)
+                                         for j in range(25)])
+            yield i, valores
+
+    try:
+        assert almacen.guardar_valoraciones(caso_id, caso,
+                                            solicitantes()) == 40
+        assert almacen.contar_veredictos(caso_id)[0] == 65
+        # Ningún solicitante ha pisado a otro
+        for identificador, valores in enumerate(generar_lote(caso, 40)):
+            assert almacen.valores_solicitante(
+                caso_id, identificador) == valores
+    finally:
+        almacen.cerrar()
+        otro_almacen.cerrar()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de la caché de valoraciones de los lotes.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import io
+import random
+
+import pytest
+
+from valorador_lotes import CacheValoraciones, EscritorExplicaciones
+
+
+_CASOS = ("becas-colaboracion-grado-MECD", "expresiones", "grupos", "tipos")
+
+
+def _lote_repetido(caso, generar_lote):
+    """
+    Devuelve un lote con muchos solicitantes repetidos (y desordenados).
+    """
+    filas = generar_lote(caso, 60, faltan=0.05) * 4
+    random.Random(1).shuffle(filas)
+    return filas
+
+
+@pytest.mark.parametrize("nombre", _CASOS)
+@pytest.mark.parametrize("capacidad", [1, 16, 1000])
+def test_igual_que_sin_cache(cargar_caso, generar_lote, nombre, capacidad):
+    caso = cargar_caso(nombre)
+    referencia = cargar_caso(nombre)
+    cache = CacheValoraciones(caso, capacidad)
+    tiene_puntuacion = len(referencia.puntuacion) > 0
+
+    for i, valores in enumerate(_lote_repetido(caso, generar_lote)):
+        explicar = (i % 2 == 0)
+        referencia.asignar_valores(valores)
+        try:
+            result = referencia.valorar(explicar=explicar)
+        except RuntimeError:
+            # Falta un valor necesario: la caché tampoco lo puede valorar
+            with pytest.raises(RuntimeError):
+                cache.valorar(valores, explicar)
+            continue
+
+        puntuacion = None
+        if (result and tiene_puntuacion):
+            puntuacion = referencia.puntuar()
+
+        assert cache.valorar(valores, explicar) == (
+            result, tuple(referencia.resultados), referencia.explicacion,
+            puntuacion)
+
+    assert cache.n_entradas <= capacidad
+    if (capacidad == 1000):
+        assert cache.n_descartes == 0
+        assert cache.n_aciertos > cache.n_entradas
+
+
+@pytest.mark.parametrize("formato", ["completo", "rechazados", "compacto"])
+def test_salida_igual_que_sin_cache(cargar_caso, generar_lote, formato):
+    caso = cargar_caso("becas-colaboracion-grado-MECD")
+    filas = _lote_repetido(caso, generar_lote)
+    filas = [valores for valores in filas if (None not in valores)]
+
+    sin_cache = io.StringIO()
+    escritor = EscritorExplicaciones(sin_cache, formato)
+    for i, valores in enumerate(filas):
+        caso.asignar_valores(valores)
+        escritor.escribir(i, caso)
+
+    con_cache = io.StringIO()
+    escritor_cache = EscritorExplicaciones(con_cache, formato)
+    cache = CacheValoraciones(cargar_caso("becas-colaboracion-grado-MECD"),
+                              32)
+    for i, valores in enumerate(filas):
+        escritor_cache.escribir_cache(i, valores, cache)
+
+    assert con_cache.getvalue() == sin_cache.getvalue()
+    assert escritor_cache.n_aprobados == escritor.n_aprobados
+    assert escritor_cache.n_solicitantes == escritor.n_solicitantes
+
+
+def test_capacidad_no_valida(cargar_caso):
+    with pytest.raises(ValueError):
+        CacheValoraciones(cargar_caso("grupos"), 0)
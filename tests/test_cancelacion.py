@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de la cancelación de una valoración en curso.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import pytest
+
+
+
+def test_cancelar_detiene_la_valoracion(cargar_caso):
+    definicion = cargar_caso("grupos").definicion
+    solicitante = definicion.nuevo_solicitante(
+        [30.0, False, True, 5.0, True, True, False])
+    assert definicion.valorar(solicitante) is True
+
+    # Se cancela mientras se evalúa el primer requisito de un grupo: el
+    # siguiente ya no se evalúa
+    grupo = definicion.requisitos_raiz[1]
+    primero, segundo = grupo.requisitos[0], grupo.requisitos[1]
+    evaluados = []
+
+    def valorar(requisito):
+        def evaluar(solicitante=None):
+            evaluados.append(requisito.nombre)
+            if (requisito is primero):
+                solicitante.cancelar()
+            return False
+        return evaluar
+
+    primero.valorar = valorar(primero)
+    segundo.valorar = valorar(segundo)
+    try:
+        with pytest.raises(RuntimeError):
+            definicion.valorar(solicitante)
+    finally:
+        del primero.valorar
+        del segundo.valorar
+
+    assert evaluados == [primero.nombre]
+    assert solicitante.cancelado is True
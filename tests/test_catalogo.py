@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas del catálogo de casos.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import io
+import os
+import shutil
+
+import pytest
+
+from valorador_catalogo import CatalogoCasos, leer_metadatos_caso
+
+
+CASOS = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "casos-de-prueba")
+
+
+@pytest.fixture
+def directorio(tmpdir):
+    for fichero in os.listdir(CASOS):
+        shutil.copy(os.path.join(CASOS, fichero), str(tmpdir))
+    return str(tmpdir)
+
+
+def test_actualizar(directorio):
+    catalogo = CatalogoCasos(directorio)
+    n_casos = len(os.listdir(CASOS))
+
+    assert catalogo.actualizar() == n_casos
+    assert catalogo.error_indice is None
+    assert [e["fichero"] for e in catalogo.entradas if e["error"]] == []
+    for entrada in catalogo.entradas:
+        metadatos = leer_metadatos_caso(entrada["file_path"])
+        assert {clave: entrada[clave] for clave in metadatos} == metadatos
+
+    # Sin cambios no se vuelve a leer nada, tampoco desde el índice guardado
+    assert catalogo.actualizar() == 0
+    assert CatalogoCasos(directorio).actualizar() == 0
+
+    with io.open(os.path.join(directorio, "tipos.json"), "a",
+                 encoding="utf-8") as f:
+        f.write(u"roto")
+    os.remove(os.path.join(directorio, "grupos.json"))
+
+    assert catalogo.actualizar() == 1
+    entradas = dict((e["fichero"], e) for e in catalogo.entradas)
+    assert "grupos.json" not in entradas
+    assert entradas["tipos.json"]["error"] is not None
+    assert len(CatalogoCasos(directorio).entradas) == n_casos - 1
+
+
+def test_indice_no_se_puede_guardar(directorio, tmpdir):
+    index_path = str(tmpdir.join("no-existe", "catalogo.json"))
+    catalogo = CatalogoCasos(directorio, index_path)
+
+    assert catalogo.actualizar() == len(os.listdir(CASOS))
+    assert catalogo.error_indice is not None
+    assert len(catalogo.entradas) == len(os.listdir(CASOS))
+
+    # Se reintenta guardar aunque no haya cambios
+    tmpdir.join("no-existe").mkdir()
+    assert catalogo.actualizar() == 0
+    assert catalogo.error_indice is None
+    assert os.path.exists(index_path)
+    assert not os.path.exists(index_path + ".tmp")
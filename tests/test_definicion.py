@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de las definiciones inmutables de los casos y de los registros de
+valores de cada solicitante (valoración concurrente).
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import os
+from multiprocessing.pool import ThreadPool
+
+import pytest
+
+
+_CASOS = ("becas-colaboracion-grado-MECD", "expresiones", "grupos",
+          "intervalos", "tipos")
+
+
+def _valorar_en_serie(caso, solicitantes):
+    """
+    Devuelve la valoración de cada solicitante con la API del caso (que
+    guarda los valores en los requisitos).
+    """
+    valoraciones = []
+
+    for valores in solicitantes:
+        caso.asignar_valores(valores)
+        try:
+            result = caso.valorar()
+        except RuntimeError:
+            valoraciones.append(None)
+            continue
+
+        puntuacion = None
+        if (result and len(caso.puntuacion) > 0):
+            puntuacion = caso.puntuar()
+        valoraciones.append((result, caso.resultados, caso.explicacion,
+                             puntuacion))
+
+    return valoraciones
+
+
+def _valorar_con_definicion(definicion, valores):
+    """
+    Valora un solicitante con su propio registro de valores.
+    """
+    solicitante = definicion.nuevo_solicitante(valores)
+    try:
+        result = definicion.valorar(solicitante)
+    except RuntimeError:
+        return None
+
+    puntuacion = None
+    if (result and len(definicion.puntuacion) > 0):
+        puntuacion = definicion.puntuar(solicitante)
+
+    return (result, solicitante.resultados, solicitante.explicacion,
+            puntuacion)
+
+
+@pytest.mark.parametrize("nombre", _CASOS)
+def test_valoracion_concurrente(cargar_caso, generar_lote, nombre):
+    caso = cargar_caso(nombre)
+    solicitantes = generar_lote(caso, 400, faltan=0.02)
+    definicion = caso.definicion
+
+    pool = ThreadPool(8)
+    try:
+        concurrentes = pool.map(
+            lambda valores: _valorar_con_definicion(definicion, valores),
+            solicitantes, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+    assert concurrentes == _valorar_en_serie(cargar_caso(nombre),
+                                             solicitantes)
+    # La definición no guarda los valores de ningún solicitante
+    assert all(requisito.valor is None for requisito in caso.requisitos)
+
+
+def test_definicion_no_cambia_al_recargar(cargar_caso, generar_lote):
+    caso = cargar_caso("grupos")
+    solicitantes = generar_lote(caso, 50)
+    definicion = caso.definicion
+    antes = [_valorar_con_definicion(definicion, valores)
+             for valores in solicitantes]
+
+    assert caso.definicion is definicion
+    caso.load_from_JSON_file(os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "casos-de-prueba", "tipos.json"))
+
+    assert caso.definicion is not definicion
+    assert [_valorar_con_definicion(definicion, valores)
+            for valores in solicitantes] == antes
+
+
+def test_valores_no_validos(cargar_caso):
+    caso = cargar_caso("becas-colaboracion-grado-MECD")
+    solicitante = caso.definicion.nuevo_solicitante()
+    requisitos = caso.requisitos
+
+    with pytest.raises(TypeError):
+        solicitante.asignar_valor(requisitos[0], u"sí")
+    with pytest.raises(ValueError):
+        solicitante.asignar_valor(requisitos[2], 1.5)
+    with pytest.raises(RuntimeError):
+        caso.definicion.valorar(solicitante)
+
+    solicitante.asignar_valores([False, True, 0.9, 8.5])
+    assert caso.definicion.valorar(solicitante) is True
+    assert solicitante.valor(requisitos[3]) == 8.5
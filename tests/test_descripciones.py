@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de las descripciones diferidas (se leen del fichero del caso cuando
+se necesitan).
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import io
+import os
+import json
+
+import pytest
+
+from valorador_model import Caso, DescripcionDiferida
+
+
+_CASOS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, "casos-de-prueba")
+
+_CASOS = ("becas-colaboracion-grado-MECD", "expresiones", "grupos",
+          "intervalos", "tipos")
+
+# Descripción larga con caracteres no ASCII y secuencias de escape.
+_DESCRIPCION_LARGA = (u"Descripción \"larga\" con acentos (áéíóú, ñ), " +
+                      u"barras \\ y saltos\nde línea. " * 20)
+
+
+def _cargar(file_path, diferidas):
+    caso = Caso()
+    caso.load_from_JSON_file(file_path, diferidas)
+    return caso
+
+
+@pytest.fixture
+def caso_largo(tmpdir):
+    """
+    Devuelve la ruta de una copia del caso de las becas con descripciones
+    largas (y una corta).
+    """
+    with io.open(os.path.join(_CASOS_PATH,
+                              "becas-colaboracion-grado-MECD.json"),
+                 encoding="utf-8") as f:
+        definicion = json.load(f)
+
+    definicion["caso"]["descripcion"] = _DESCRIPCION_LARGA
+    definicion["caso"]["requisitos"][0]["descripcion"] = u"Corta"
+    for i, requisito in enumerate(definicion["caso"]["requisitos"][1:], 1):
+        requisito["descripcion"] = str(i) + _DESCRIPCION_LARGA
+
+    file_path = str(tmpdir.join("caso.json"))
+    with io.open(file_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(definicion, ensure_ascii=False, indent=2))
+
+    return file_path
+
+
+@pytest.mark.parametrize("nombre", _CASOS)
+def test_mismas_explicaciones(generar_lote, nombre):
+    file_path = os.path.join(_CASOS_PATH, nombre + ".json")
+    completo = _cargar(file_path, False)
+    diferido = _cargar(file_path, True)
+
+    assert diferido.descripcion == completo.descripcion
+    assert ([r.descripcion for r in diferido.requisitos] ==
+            [r.descripcion for r in completo.requisitos])
+
+    for valores in generar_lote(completo, 100):
+        completo.asignar_valores(valores)
+        diferido.asignar_valores(valores)
+        try:
+            completo.valorar()
+        except RuntimeError:
+            continue
+        diferido.valorar()
+        assert diferido.explicacion == completo.explicacion
+
+
+def test_descripciones_largas(caso_largo):
+    caso = _cargar(caso_largo, True)
+
+    # Solo se difieren las descripciones largas
+    assert isinstance(caso._descripcion, DescripcionDiferida)
+    assert not isinstance(caso.requisitos[0]._descripcion,
+                          DescripcionDiferida)
+    assert isinstance(caso.requisitos[1]._descripcion, DescripcionDiferida)
+
+    assert caso.descripcion == _DESCRIPCION_LARGA
+    assert [r.descripcion for r in caso.requisitos[1:]] == [
+        str(i) + _DESCRIPCION_LARGA for i in range(1, 4)]
+    assert ([r.descripcion for r in caso.requisitos] ==
+            [r.descripcion for r in _cargar(caso_largo, False).requisitos])
+
+
+def test_fichero_modificado(caso_largo):
+    caso = _cargar(caso_largo, True)
+
+    with io.open(caso_largo, encoding="utf-8") as f:
+        texto = f.read()
+    with io.open(caso_largo, "w", encoding="utf-8") as f:
+        f.write(texto.replace(u"acentos", u"ACENTOS"))
+
+    assert caso.descripcion == DescripcionDiferida.NO_DISPONIBLE
+    assert caso.requisitos[0].descripcion != DescripcionDiferida.NO_DISPONIBLE
+
+    os.remove(caso_largo)
+    assert caso.requisitos[2].descripcion == DescripcionDiferida.NO_DISPONIBLE
+
+
+def test_recargar_sin_cambios(caso_largo):
+    caso = _cargar(caso_largo, True)
+
+    # Las descripciones diferidas iguales no cuentan como cambios
+    assert caso.reload_from_JSON_file(caso_largo) == []
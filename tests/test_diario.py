@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas del diario de la sesión.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import io
+import os
+
+import pytest
+
+from valorador_diario import DiarioSesion
+
+
+@pytest.fixture
+def journal_path(tmpdir):
+    return str(tmpdir.join("sesion.journal"))
+
+
+def _lineas(journal_path):
+    with io.open(journal_path, encoding="utf-8") as f:
+        return f.readlines()
+
+
+def test_recuperar(journal_path):
+    diario = DiarioSesion(journal_path)
+    diario.iniciar(u"caso.json", {0: (u"Mayor de edad", True)})
+    diario.registrar_valor(2, u"Nota", 7.5)
+    diario.registrar_valor(3, u"Título", u"Grado en Física")
+    diario.registrar_valor(2, u"Nota", 8.25)
+    diario.cerrar()
+
+    assert DiarioSesion.recuperar(journal_path) == (u"caso.json", {
+        0: (u"Mayor de edad", True), 2: (u"Nota", 8.25),
+        3: (u"Título", u"Grado en Física")})
+
+    diario.cerrar(borrar=True)
+    assert not os.path.exists(journal_path)
+    assert DiarioSesion.recuperar(journal_path) is None
+
+
+def test_reset_e_iniciar(journal_path):
+    diario = DiarioSesion(journal_path)
+    diario.iniciar(u"caso.json")
+    diario.registrar_valor(0, u"A", 1)
+    diario.registrar_reset()
+    diario.registrar_valor(1, u"B", 2)
+    diario.cerrar()
+    assert DiarioSesion.recuperar(journal_path) == (u"caso.json",
+                                                    {1: (u"B", 2)})
+
+    # Un diario nuevo descarta el anterior
+    diario.iniciar(u"otro.json")
+    diario.registrar_valor(0, u"C", 3)
+    diario.cerrar()
+    assert DiarioSesion.recuperar(journal_path) == (u"otro.json",
+                                                    {0: (u"C", 3)})
+
+
+def test_recuperar_despues_de_compactar(journal_path):
+    diario = DiarioSesion(journal_path)
+    diario.MAX_REGISTROS = 10
+    diario.iniciar(u"caso.json")
+
+    for i in range(200):
+        diario.registrar_valor(i % 4, u"R" + str(i % 4), i)
+    diario.cerrar()
+
+    assert DiarioSesion.recuperar(journal_path) == (u"caso.json", {
+        0: (u"R0", 196), 1: (u"R1", 197), 2: (u"R2", 198),
+        3: (u"R3", 199)})
+    # La cabecera, el estado compacto y como mucho MAX_REGISTROS más
+    assert len(_lineas(journal_path)) <= 1 + 4 + diario.MAX_REGISTROS
+    assert not os.path.exists(journal_path + ".tmp")
+
+
+def test_ultima_linea_incompleta(journal_path):
+    diario = DiarioSesion(journal_path)
+    diario.iniciar(u"caso.json")
+    diario.registrar_valor(0, u"A", 1)
+    diario.registrar_valor(1, u"B", u"texto largo")
+    diario.cerrar()
+
+    # El programa se cierra mientras escribe el último registro
+    lineas = _lineas(journal_path)
+    with io.open(journal_path, "w", encoding="utf-8") as f:
+        f.write(u"".join(lineas[:-1]) + lineas[-1][:-8])
+
+    assert DiarioSesion.recuperar(journal_path) == (u"caso.json",
+                                                    {0: (u"A", 1)})
+
+
+def test_sin_cabecera(journal_path):
+    with io.open(journal_path, "w", encoding="utf-8") as f:
+        f.write(u"{\"caso\": \"caso.js")
+
+    assert DiarioSesion.recuperar(journal_path) is None
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas del compilador de expresiones y de los requisitos del tipo Expresion.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import pytest
+
+from valorador_expresiones import Expresion
+from valorador_model import RequisitoExpresion, RequisitoNumero
+
+
+def test_operaciones():
+    expresion = Expresion(u"nota / 10 + creditos * 2 - 1",
+                          ["nota", "creditos"])
+
+    assert expresion.variables == ("nota", "creditos")
+    assert expresion.evaluar([8.0, 0.5]) == pytest.approx(0.8)
+
+
+def test_comparaciones_logicas_y_funciones():
+    expresion = Expresion(u"0 <= a < b and not c or max(a, b) > 10",
+                          ["a", "b", "c"])
+
+    assert expresion.evaluar([1, 2, False]) is True
+    assert expresion.evaluar([1, 2, True]) is False
+    assert expresion.evaluar([3, 2, False]) is False
+    assert expresion.evaluar([3, 20, True]) is True
+    assert Expresion(u"round(abs(-x), 1)", ["x"]).evaluar([2.26]) == 2.3
+
+
+@pytest.mark.parametrize("texto", [
+    u"__import__('os')",
+    u"x.real",
+    u"x[0]",
+    u"'texto'",
+    u"[x, x]",
+    u"lambda: x",
+    u"x if x else 0",
+    u"x ** 2",
+    u"x // 2",
+    u"x in (1, 2)",
+    u"open('f')",
+    u"max(x, key=abs)",
+])
+def test_rechaza_elementos_no_permitidos(texto):
+    with pytest.raises(ValueError):
+        Expresion(texto, ["x"])
+
+
+def test_rechaza_variables_no_definidas_y_sintaxis():
+    with pytest.raises(ValueError):
+        Expresion(u"x + y", ["x"])
+    with pytest.raises(ValueError):
+        Expresion(u"x +", ["x"])
+
+
+def test_division_por_cero():
+    expresion = Expresion(u"a / b", ["a", "b"])
+
+    with pytest.raises(ZeroDivisionError):
+        expresion.evaluar([1.0, 0.0])
+
+
+def _requisito_division():
+    a = RequisitoNumero(u"A", u"Dividendo", 0.0, 100.0)
+    b = RequisitoNumero(u"B", u"Divisor", 0.0, 100.0)
+    requisito = RequisitoExpresion(u"Cociente", u"A entre B", u"a / b",
+                                   {"a": u"A", "b": u"B"}, 1.0, 2.0)
+    requisito.vincular({u"A": a, u"B": b})
+    return a, b, requisito
+
+
+def test_requisito_division_por_cero():
+    a, b, requisito = _requisito_division()
+
+    assert requisito.calcular([3.0, 2.0]) == 1.5
+    assert requisito.calcular([3.0, 0.0]) is None
+    assert requisito.calcular([3.0, None]) is None
+
+    a.valor = 3.0
+    b.valor = 0.0
+    assert requisito.valor is None
+    with pytest.raises(RuntimeError):
+        requisito.valorar()
+
+    b.valor = 2.0
+    assert requisito.valorar() is True
+
+
+def test_requisito_no_admite_valores():
+    _, _, requisito = _requisito_division()
+
+    with pytest.raises(TypeError):
+        requisito.valor = 1.0
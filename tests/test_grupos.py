@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de los grupos de requisitos (Y, O y AL_MENOS).
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import pytest
+
+from valorador_model import RequisitoBooleano, RequisitoGrupo
+
+
+def _booleanos(*valores):
+    requisitos = []
+    for i, valor in enumerate(valores):
+        requisito = RequisitoBooleano(u"R" + str(i), u"Requisito", True)
+        if (valor is not None):
+            requisito.valor = valor
+        requisitos.append(requisito)
+    return requisitos
+
+
+def _nombres_evaluados(grupo):
+    return [requisito.nombre for requisito, _ in grupo._evaluados]
+
+
+@pytest.mark.parametrize("valores, esperado", [
+    ((True, True, False), True),
+    ((True, False, True), True),
+    ((False, True, True), True),
+    ((True, False, False), False),
+    ((False, False, True), False),
+])
+def test_al_menos(valores, esperado):
+    grupo = RequisitoGrupo(u"G", u"Grupo", "AL_MENOS", _booleanos(*valores),
+                           minimo=2)
+
+    assert grupo.valorar() is esperado
+
+
+def test_al_menos_se_detiene_al_alcanzar_el_minimo():
+    requisitos = _booleanos(True, True, None)
+    grupo = RequisitoGrupo(u"G", u"Grupo", "AL_MENOS", requisitos, minimo=2)
+
+    # El tercero no tiene valor, pero no hace falta evaluarlo
+    assert grupo.valorar() is True
+    assert _nombres_evaluados(grupo) == [u"R0", u"R1"]
+    assert grupo.decisivo is requisitos[1]
+
+
+def test_al_menos_se_detiene_si_ya_no_se_puede_alcanzar():
+    requisitos = _booleanos(False, False, None)
+    grupo = RequisitoGrupo(u"G", u"Grupo", "AL_MENOS", requisitos, minimo=2)
+
+    assert grupo.valorar() is False
+    assert _nombres_evaluados(grupo) == [u"R0", u"R1"]
+    assert grupo.decisivo is requisitos[1]
+
+
+def test_y_y_o_se_detienen_en_el_primero_que_decide():
+    grupo_y = RequisitoGrupo(u"Y", u"Grupo", "Y", _booleanos(False, None))
+    grupo_o = RequisitoGrupo(u"O", u"Grupo", "O", _booleanos(True, None))
+
+    assert grupo_y.valorar() is False
+    assert _nombres_evaluados(grupo_y) == [u"R0"]
+    assert grupo_o.valorar() is True
+    assert _nombres_evaluados(grupo_o) == [u"R0"]
+
+
+def test_al_menos_requiere_evaluar_un_valor_que_falta():
+    grupo = RequisitoGrupo(u"G", u"Grupo", "AL_MENOS",
+                           _booleanos(True, None, True), minimo=2)
+
+    with pytest.raises(RuntimeError):
+        grupo.valorar()
+
+
+@pytest.mark.parametrize("minimo", [0, 4])
+def test_al_menos_minimo_no_valido(minimo):
+    with pytest.raises(ValueError):
+        RequisitoGrupo(u"G", u"Grupo", "AL_MENOS",
+                       _booleanos(True, True, True), minimo=minimo)
+
+
+def test_operador_no_valido():
+    with pytest.raises(ValueError):
+        RequisitoGrupo(u"G", u"Grupo", "NI", _booleanos(True))
+    with pytest.raises(ValueError):
+        RequisitoGrupo(u"G", u"Grupo", "Y", [])
+
+
+def test_grupos_anidados_en_un_caso(cargar_caso):
+    caso = cargar_caso("grupos")
+
+    # Sin título de grado, pero técnico superior con experiencia; dos idiomas
+    caso.asignar_valores([30.0, False, True, 5.0, True, False, True])
+    assert caso.valorar() is True
+    assert u"DECIDIDO POR" in caso.explicacion
+
+    # Técnico superior sin experiencia suficiente
+    caso.asignar_valores([30.0, False, True, 1.0, True, False, True])
+    assert caso.valorar() is False
+    assert caso.resultados == [True, False, True]
+
+    # Un solo idioma
+    caso.asignar_valores([30.0, True, None, None, False, False, True])
+    assert caso.valorar() is False
+    assert caso.resultados == [True, True, False]
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de la valoración con otros intérpretes de Python (Python 2 y PyPy):
+los mismos solicitantes deben dar la misma valoración, explicación y
+puntuación que con el intérprete que ejecuta las pruebas. Cada intérprete que
+no esté en el PATH se salta.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import io
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+from conftest import lote_aleatorio
+
+
+# Directorios con el código del valorador y con los casos de prueba.
+_SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         os.pardir, "src")
+_CASOS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, "casos-de-prueba")
+
+_CASOS = ("becas-colaboracion-grado-MECD", "expresiones", "grupos",
+          "intervalos", "tipos")
+
+# Programa que valora los solicitantes de un fichero JSON y escribe en la
+# salida estándar el resultado de cada uno.
+_PROGRAMA = u"""
+import io, sys, json
+sys.path.insert(0, sys.argv[1])
+from valorador_model import Caso
+
+def valorar(caso, solicitantes):
+    valoraciones = []
+    for valores in solicitantes:
+        caso.asignar_valores(valores)
+        try:
+            result = caso.valorar()
+        except RuntimeError as e:
+            valoraciones.append([None, e.args[0]])
+            continue
+        puntuacion = None
+        if (result and len(caso.puntuacion) > 0):
+            puntuacion = caso.puntuar()
+        valoraciones.append([result, caso.resultados, caso.explicacion,
+                             puntuacion])
+    return valoraciones
+
+if __name__ == "__main__":
+    caso = Caso()
+    caso.load_from_JSON_file(sys.argv[2])
+    with io.open(sys.argv[3], encoding="utf-8") as f:
+        solicitantes = json.load(f)
+    sys.stdout.write(json.dumps(valorar(caso, solicitantes)))
+"""
+
+
+def _interpretes():
+    """
+    Devuelve la lista de intérpretes del PATH (distintos del actual) que se
+    pueden ejecutar.
+    """
+    encontrados = []
+
+    for nombre in ("python2", "pypy", "pypy3"):
+        for directorio in os.environ.get("PATH", "").split(os.pathsep):
+            ruta = os.path.join(directorio, nombre)
+            if (os.path.isfile(ruta) and os.access(ruta, os.X_OK)):
+                break
+        else:
+            continue
+
+        try:
+            version = subprocess.check_output(
+                [ruta, "-c", "import sys; print(sys.version)"],
+                stderr=subprocess.STDOUT).decode("utf-8").strip()
+        except (OSError, subprocess.CalledProcessError):
+            continue
+
+        if (version != sys.version):
+            encontrados.append(nombre)
+
+    return encontrados
+
+
+@pytest.fixture(scope="module")
+def programa(tmp_path_factory):
+    file_path = tmp_path_factory.mktemp("interpretes") / "valorar.py"
+    file_path.write_text(_PROGRAMA, encoding="utf-8")
+    return str(file_path)
+
+
+@pytest.mark.parametrize("interprete", _interpretes() or [
+    pytest.param(None, marks=pytest.mark.skip(
+        reason="no hay otros intérpretes en el PATH"))])
+@pytest.mark.parametrize("nombre", _CASOS)
+def test_misma_valoracion(tmp_path, cargar_caso, programa, interprete,
+                          nombre):
+    caso_path = os.path.join(_CASOS_PATH, nombre + ".json")
+    caso = cargar_caso(nombre)
+    solicitantes = lote_aleatorio(caso, 300, faltan=0.02)
+    datos_path = str(tmp_path / "solicitantes.json")
+    with io.open(datos_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(solicitantes, ensure_ascii=False))
+
+    salida = subprocess.check_output(
+        [interprete, programa, _SRC_PATH, caso_path, datos_path])
+
+    # El mismo programa con este intérprete
+    espacio = {"__name__": "valorar"}
+    exec(compile(_PROGRAMA, programa, "exec"), espacio)
+    esperadas = json.loads(json.dumps(espacio["valorar"](caso,
+                                                         solicitantes)))
+
+    assert json.loads(salida.decode("utf-8")) == esperadas
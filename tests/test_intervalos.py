@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de los requisitos del tipo Intervalos.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import pytest
+
+from valorador_model import RequisitoIntervalos
+
+
+def test_intervalos_solapados_se_fusionan():
+    requisito = RequisitoIntervalos(u"I", u"Intervalos",
+                                    [(5.0, 8.0), (1.0, 3.0), (2.0, 4.0),
+                                     (6.0, 7.0)])
+
+    assert requisito.intervalos == ((1.0, 4.0), (5.0, 8.0))
+    assert requisito.valor_minimo == 1.0
+    assert requisito.valor_maximo == 8.0
+
+
+def test_intervalos_adyacentes_se_fusionan():
+    requisito = RequisitoIntervalos(u"I", u"Intervalos",
+                                    [(3.0, 5.0), (1.0, 3.0), (5.0, 5.0)])
+
+    assert requisito.intervalos == ((1.0, 5.0),)
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    (0.5, False), (1.0, True), (3.0, True), (4.0, True), (4.5, False),
+    (5.0, True), (7.5, True), (8.0, True), (8.5, False),
+])
+def test_intervalos_cumple(valor, esperado):
+    requisito = RequisitoIntervalos(u"I", u"Intervalos",
+                                    [(5.0, 8.0), (1.0, 3.0), (2.0, 4.0)])
+
+    assert requisito.cumple(valor) is esperado
+    assert requisito.cumple_lote([valor, None]) == [esperado, None]
+
+
+def test_intervalos_margen_relativo_al_intervalo_mas_cercano():
+    requisito = RequisitoIntervalos(u"I", u"Intervalos",
+                                    [(0.0, 2.0), (6.0, 10.0)])
+
+    # Anchura total de 0 a 10; fuera se mide al intervalo más cercano
+    assert requisito.margen_lote([1.0, 3.0, 5.0, 9.0, None]) == pytest.approx(
+        [0.1, -0.1, -0.1, 0.1, None])
+
+
+def test_intervalos_no_validos():
+    with pytest.raises(ValueError):
+        RequisitoIntervalos(u"I", u"Intervalos", [])
+    with pytest.raises(ValueError):
+        RequisitoIntervalos(u"I", u"Intervalos", [(3.0, 1.0)])
+    with pytest.raises(TypeError):
+        RequisitoIntervalos(u"I", u"Intervalos", [(1, 3)])
+
+
+def test_caso_con_intervalos(cargar_caso):
+    caso = cargar_caso("intervalos")
+    edad, examen = caso.requisitos
+
+    # Los intervalos del JSON se ordenan y se fusionan
+    assert edad.intervalos == ((18.0, 25.0), (60.0, 65.0))
+    assert examen.intervalos == ((5.0, 6.5), (7.0, 9.0))
+
+    caso.asignar_valores([62.0, 8.5])
+    assert caso.valorar() is True
+
+    caso.asignar_valores([40.0, 6.8])
+    assert caso.valorar() is False
+    assert caso.resultados == [False, False]
@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de la valoración por lotes desde ficheros CSV (valorador_lotes).
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import bz2
+import gzip
+import io
+import os
+
+import pytest
+
+import valorador_lotes
+
+# Directorio con los casos de prueba.
+_CASOS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, "casos-de-prueba")
+
+# Caso con el que se valoran los lotes.
+_CASO_PATH = os.path.join(_CASOS_PATH, "becas-colaboracion-grado-MECD.json")
+
+
+def _escribir_CSV(file_path, caso, filas, identificadores=None):
+    """
+    Escribe un fichero CSV de solicitantes con columna "id" (por defecto, la
+    posición de cada fila).
+    """
+    def texto(valor):
+        if (valor is None):
+            return u""
+        if (isinstance(valor, bool)):
+            return u"true" if valor else u"false"
+        return u"%s" % valor
+
+    with io.open(str(file_path), 'w', encoding='utf-8') as f:
+        f.write(u",".join([u"id"] + [u"\"" + requisito.nombre + u"\""
+                                     for requisito in caso.requisitos]) +
+                u"\n")
+        if (identificadores is None):
+            identificadores = range(len(filas))
+        for i, valores in zip(identificadores, filas):
+            f.write(u",".join([u"%d" % i] + [texto(valor)
+                                             for valor in valores]) + u"\n")
+
+
+def _leer(file_path):
+    """
+    Devuelve el texto de una salida, descomprimiéndola si hace falta.
+    """
+    file_path = str(file_path)
+    if (file_path.endswith(".gz")):
+        abrir = gzip.open
+    elif (file_path.endswith(".bz2")):
+        abrir = bz2.BZ2File
+    else:
+        abrir = io.open
+    with abrir(file_path, 'rb') as f:
+        return f.read().decode('utf-8')
+
+
+@pytest.fixture
+def solicitantes_CSV(tmp_path, cargar_caso, generar_lote):
+    caso = cargar_caso("becas-colaboracion-grado-MECD")
+    file_path = tmp_path / "solicitantes.csv"
+    _escribir_CSV(file_path, caso, generar_lote(caso, 300))
+    return str(file_path)
+
+
+@pytest.mark.parametrize("formato", ["completo", "rechazados", "compacto"])
+@pytest.mark.parametrize("extension", [".gz", ".bz2"])
+def test_salida_comprimida(tmp_path, solicitantes_CSV, formato, extension):
+    plano = tmp_path / "salida.txt"
+    comprimido = tmp_path / ("salida.txt" + extension)
+
+    valorador_lotes.main([_CASO_PATH, solicitantes_CSV, "-f", formato,
+                          "-o", str(plano)])
+    valorador_lotes.main([_CASO_PATH, solicitantes_CSV, "-f", formato,
+                          "-o", str(comprimido)])
+
+    assert len(_leer(plano)) > 0
+    assert _leer(comprimido) == _leer(plano)
+
+
+def _ejecutar(caso_path, solicitantes, checkpoint, salida):
+    ejecucion = valorador_lotes.EjecucionIncremental(caso_path, solicitantes,
+                                                     checkpoint)
+    return ejecucion.ejecutar(salida)
+
+
+def _referencia(tmp_path, solicitantes):
+    """
+    Devuelve la salida de una ejecución completa (sin punto de control
+    previo) sobre el fichero de solicitantes.
+    """
+    salida = str(tmp_path / "referencia.txt")
+    checkpoint = str(tmp_path / "referencia.json")
+    _ejecutar(_CASO_PATH, solicitantes, checkpoint, salida)
+    os.remove(checkpoint)
+    return _leer(salida)
+
+
+@pytest.fixture
+def lote_creciente(tmp_path, cargar_caso, generar_lote):
+    """
+    Devuelve una función que escribe en el fichero de solicitantes las
+    primeras n filas de un lote (para simular un fichero que crece).
+    """
+    caso = cargar_caso("becas-colaboracion-grado-MECD")
+    filas = generar_lote(caso, 200)
+    file_path = str(tmp_path / "solicitantes.csv")
+
+    def escribir(n):
+        _escribir_CSV(file_path, caso, filas[:n])
+        return file_path
+
+    return escribir
+
+
+@pytest.mark.parametrize("extension", ["", ".gz", ".bz2"])
+def test_checkpoint_fichero_que_crece(tmp_path, lote_creciente, extension):
+    salida = str(tmp_path / ("salida.txt" + extension))
+    checkpoint = str(tmp_path / "checkpoint.json")
+
+    solicitantes = lote_creciente(120)
+    assert _ejecutar(_CASO_PATH, solicitantes, checkpoint, salida)[::2] == \
+        (120, True)
+
+    solicitantes = lote_creciente(200)
+    assert _ejecutar(_CASO_PATH, solicitantes, checkpoint, salida)[::2] == \
+        (80, False)
+    assert _leer(salida) == _referencia(tmp_path, solicitantes)
+
+    # Sin filas nuevas no se valora nada
+    assert _ejecutar(_CASO_PATH, solicitantes, checkpoint, salida)[::2] == \
+        (0, False)
+    assert _leer(salida) == _referencia(tmp_path, solicitantes)
+
+
+def test_checkpoint_descarta_lo_escrito_tras_una_interrupcion(
+        tmp_path, lote_creciente, monkeypatch):
+    salida = str(tmp_path / "salida.txt")
+    checkpoint = str(tmp_path / "checkpoint.json")
+    solicitantes = lote_creciente(200)
+    monkeypatch.setattr(valorador_lotes.EjecucionIncremental,
+                        "INTERVALO_CHECKPOINT", 30)
+
+    # Se interrumpe al escribir el solicitante 100: el último punto de
+    # control es el del 90 y en la salida ya hay 99
+    escribir = valorador_lotes.EscritorExplicaciones.escribir
+
+    def escribir_e_interrumpir(self, identificador, caso):
+        if (self.n_solicitantes == 99):
+            raise KeyboardInterrupt
+        return escribir(self, identificador, caso)
+
+    monkeypatch.setattr(valorador_lotes.EscritorExplicaciones, "escribir",
+                        escribir_e_interrumpir)
+    with pytest.raises(KeyboardInterrupt):
+        _ejecutar(_CASO_PATH, solicitantes, checkpoint, salida)
+    monkeypatch.setattr(valorador_lotes.EscritorExplicaciones, "escribir",
+                        escribir)
+
+    assert _ejecutar(_CASO_PATH, solicitantes, checkpoint, salida)[::2] == \
+        (110, False)
+    assert _leer(salida) == _referencia(tmp_path, solicitantes)
+
+
+def test_checkpoint_salida_mas_corta(tmp_path, lote_creciente):
+    salida = str(tmp_path / "salida.txt")
+    checkpoint = str(tmp_path / "checkpoint.json")
+    solicitantes = lote_creciente(100)
+    _ejecutar(_CASO_PATH, solicitantes, checkpoint, salida)
+
+    with io.open(salida, 'r+b') as f:
+        f.truncate(10)
+
+    assert _ejecutar(_CASO_PATH, solicitantes, checkpoint, salida)[::2] == \
+        (100, True)
+    assert _leer(salida) == _referencia(tmp_path, solicitantes)
+
+
+def test_checkpoint_fichero_sustituido(tmp_path, lote_creciente,
+                                       cargar_caso, generar_lote):
+    salida = str(tmp_path / "salida.txt")
+    checkpoint = str(tmp_path / "checkpoint.json")
+    _ejecutar(_CASO_PATH, lote_creciente(50), checkpoint, salida)
+
+    # Otro fichero con la misma cabecera y más filas
+    caso = cargar_caso("becas-colaboracion-grado-MECD")
+    solicitantes = str(tmp_path / "solicitantes.csv")
+    _escribir_CSV(solicitantes, caso, generar_lote(caso, 80, semilla=5))
+
+    assert _ejecutar(_CASO_PATH, solicitantes, checkpoint, salida)[::2] == \
+        (80, True)
+    assert _leer(salida) == _referencia(tmp_path, solicitantes)
+
+
+def _estadisticas(caso):
+    return (list(caso._evaluaciones), list(caso._rechazos))
+
+
+def test_rechazados_cuenta_cada_solicitante_una_vez(cargar_caso,
+                                                    generar_lote):
+    caso = cargar_caso("becas-colaboracion-grado-MECD")
+    filas = generar_lote(caso, 300)
+    escritor = valorador_lotes.EscritorExplicaciones(io.StringIO(),
+                                                     "rechazados")
+    for i, valores in enumerate(filas):
+        caso.asignar_valores(valores)
+        escritor.escribir(i, caso)
+
+    # Las mismas estadísticas que solo con la valoración rápida
+    referencia = cargar_caso("becas-colaboracion-grado-MECD")
+    for valores in filas:
+        referencia.asignar_valores(valores)
+        referencia.valorar(rapido=True)
+
+    assert escritor.n_aprobados < escritor.n_solicitantes
+    assert _estadisticas(caso) == _estadisticas(referencia)
+
+
+def test_rechazados_con_cache_cuenta_cada_combinacion_una_vez(
+        cargar_caso, generar_lote):
+    caso = cargar_caso("becas-colaboracion-grado-MECD")
+    # Muchos solicitantes repetidos
+    filas = generar_lote(caso, 40) * 5
+    cache = valorador_lotes.CacheValoraciones(caso, 1000)
+    escritor = valorador_lotes.EscritorExplicaciones(io.StringIO(),
+                                                     "rechazados")
+    for i, valores in enumerate(filas):
+        escritor.escribir_cache(i, valores, cache)
+
+    # Cada combinación distinta se valora (en el modo completo) una sola vez
+    referencia = cargar_caso("becas-colaboracion-grado-MECD")
+    for valores in set(tuple(valores) for valores in filas):
+        referencia.asignar_valores(list(valores))
+        referencia.valorar(explicar=False)
+
+    assert _estadisticas(caso) == _estadisticas(referencia)
+
+
+def test_validar_errores(tmp_path, cargar_caso):
+    caso = cargar_caso("becas-colaboracion-grado-MECD")
+    file_path = tmp_path / "solicitantes.csv"
+    _escribir_CSV(file_path, caso, [
+        [False, True, 0.9, 8.5],
+        [False, True, 1.5, 8.5],
+        [False, True, 0.9, u"ocho"],
+        [u"quizá", True, 0.9, u"ocho"],
+        [False, True, 0.9],
+        [False, True, 0.9, None],
+        [False, True, u" 0.80 ", 9]])
+    nombres = [requisito.nombre for requisito in caso.requisitos]
+
+    informe = valorador_lotes.validar_solicitantes_CSV(str(file_path), caso)
+
+    assert informe.n_solicitantes == 7
+    assert [error[:3] for error in informe.errores] == [
+        (1, nombres[2], u"1.5"),
+        (2, nombres[3], u"ocho"),
+        (3, nombres[0], u"quizá"),
+        (3, nombres[3], u"ocho"),
+        (4, None, u""),
+        (5, nombres[3], u"")]
+    assert informe.errores[-1][3] == u"sin valor"
+    assert informe.posiciones_invalidas == set([1, 2, 3, 4, 5])
+    assert informe.n_errores_por_requisito == {
+        nombres[0]: 1, nombres[2]: 1, nombres[3]: 3, None: 1}
+    assert list(informe.validos()) == [(u"0", [False, True, 0.9, 8.5]),
+                                       (u"6", [False, True, 0.8, 9.0])]
+
+    cuarentena = io.StringIO()
+    informe.escribir_cuarentena(cuarentena)
+    lineas = cuarentena.getvalue().splitlines()
+    assert len(lineas) == 6
+    assert lineas[0].split(u"\t")[:3] == [u"1", nombres[2], u"1.5"]
+
+
+@pytest.mark.parametrize("nombre", ["becas-colaboracion-grado-MECD",
+                                    "expresiones", "grupos"])
+def test_cuarentena_igual_que_sin_validar(tmp_path, cargar_caso,
+                                          generar_lote, nombre):
+    caso_path = os.path.join(_CASOS_PATH, nombre + ".json")
+    caso = cargar_caso(nombre)
+    filas = generar_lote(caso, 300, faltan=0.2)
+
+    # Los solicitantes que se pueden valorar sin que falte ningún valor
+    validos = []
+    for i, valores in enumerate(filas):
+        caso.asignar_valores(valores)
+        try:
+            caso.valorar(explicar=False)
+            validos.append(i)
+        except RuntimeError:
+            pass
+    assert 0 < len(validos) < len(filas)
+
+    todos = tmp_path / "todos.csv"
+    _escribir_CSV(todos, caso, filas)
+    solo_validos = tmp_path / "validos.csv"
+    _escribir_CSV(solo_validos, caso, [filas[i] for i in validos], validos)
+
+    informe = valorador_lotes.validar_solicitantes_CSV(str(todos), caso)
+    assert informe.posiciones_invalidas == set(range(len(filas))) - set(
+        validos)
+
+    salida = tmp_path / "salida.txt"
+    referencia = tmp_path / "referencia.txt"
+    valorador_lotes.main([caso_path, str(todos), "-o", str(salida),
+                          "--cuarentena", str(tmp_path / "cuarentena.txt")])
+    valorador_lotes.main([caso_path, str(solo_validos), "-o",
+                          str(referencia)])
+
+    assert _leer(salida) == _leer(referencia)
+
+
+def test_lote_indexado(tmp_path, cargar_caso, generar_lote):
+    caso = cargar_caso("grupos")
+    filas = generar_lote(caso, 120, faltan=0.1)
+    file_path = str(tmp_path / "solicitantes.csv")
+    _escribir_CSV(file_path, caso, filas)
+    leidos = list(valorador_lotes.leer_solicitantes_CSV(file_path, caso))
+
+    lote = valorador_lotes.LoteIndexado(file_path, caso)
+    lote.TAM_CACHE_FILAS = 8
+    referencia = cargar_caso("grupos")
+
+    assert lote.n_solicitantes == 120
+    # En cualquier orden (las filas guardadas se van descartando)
+    for i in reversed(range(120)):
+        assert lote.solicitante(i) == leidos[i]
+        assert lote.identificador(i) == leidos[i][0]
+
+        referencia.asignar_valores(filas[i])
+        try:
+            result = referencia.valorar()
+        except RuntimeError as e:
+            assert lote.estado(i) == lote.ERROR
+            assert lote.resultados(i) == [None] * len(caso.requisitos_raiz)
+            assert lote.explicar(i) == e.args[0]
+            continue
+
+        assert lote.estado(i) == (lote.APROBADO if result else lote.RECHAZADO)
+        assert lote.resultados(i) == referencia.resultados
+        assert lote.explicar(i) == referencia.explicacion
+
+    assert lote.n_valorados == 120
+    # El caso no se modifica al valorar el lote
+    assert all(requisito.valor is None for requisito in caso.requisitos)
+    lote.cerrar()
+
+
+def test_lote_indexado_sin_id(tmp_path, cargar_caso):
+    caso = cargar_caso("becas-colaboracion-grado-MECD")
+    file_path = tmp_path / "solicitantes.csv"
+    file_path.write_bytes(u"\n".join([
+        u",".join(u"\"" + requisito.nombre + u"\""
+                  for requisito in caso.requisitos),
+        u"false,true,0.9,8.5",
+        u"",
+        u"false,true,0.9,diez",
+        u"false,true,0.9"]).encode("utf-8") + b"\n")
+
+    lote = valorador_lotes.LoteIndexado(str(file_path), caso)
+
+    # Las filas vacías no son solicitantes pero cuentan en el número de fila
+    assert lote.n_solicitantes == 3
+    assert [lote.identificador(i) for i in range(3)] == [1, 3, 4]
+    assert [lote.estado(i) for i in range(3)] == [
+        lote.APROBADO, lote.ERROR, lote.ERROR]
+    with pytest.raises(ValueError):
+        lote.solicitante(1)
+    with pytest.raises(IOError):
+        lote.solicitante(2)
+    lote.cerrar()
+
+
+def test_lote_indexado_vacio(tmp_path, cargar_caso):
+    file_path = tmp_path / "solicitantes.csv"
+    file_path.write_bytes(b"\n")
+
+    with pytest.raises(IOError):
+        valorador_lotes.LoteIndexado(str(file_path), cargar_caso("grupos"))
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de la estimación por muestreo de la valoración de un lote.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import pytest
+
+from valorador_muestreo import (cuantil_normal, estimar_valoracion,
+                                intervalo_wilson)
+
+
+CASO = "becas-colaboracion-grado-MECD"
+
+
+def _proporciones(caso, filas):
+    """
+    Devuelve la proporción exacta de aprobados y de rechazados por cada
+    requisito del primer nivel de los solicitantes que se pueden valorar.
+    """
+    n = 0
+    n_aprobados = 0
+    n_rechazos = [0] * len(caso.requisitos_raiz)
+
+    for valores in filas:
+        caso.asignar_valores(valores)
+        try:
+            n_aprobados += caso.valorar(explicar=False)
+        except RuntimeError:
+            continue
+        n += 1
+        for j, r in enumerate(caso.resultados):
+            n_rechazos[j] += (not r)
+
+    return (float(n_aprobados) / n, [float(r) / n for r in n_rechazos])
+
+
+def test_cuantil_normal():
+    assert cuantil_normal(0.95) == pytest.approx(1.959964, abs=1e-5)
+    assert cuantil_normal(0.99) == pytest.approx(2.575829, abs=1e-5)
+    for confianza in (0, 1, 1.5):
+        with pytest.raises(ValueError):
+            cuantil_normal(confianza)
+
+
+def test_intervalo_wilson():
+    proporcion, inferior, superior = intervalo_wilson(0.3, 100, 1.96)
+    assert proporcion == 0.3
+    assert inferior == pytest.approx(0.2189, abs=1e-4)
+    assert superior == pytest.approx(0.3958, abs=1e-4)
+    assert intervalo_wilson(0.0, 50, 1.96)[1] == 0.0
+    assert intervalo_wilson(0.5, 0, 1.96) == (0.5, 0.0, 1.0)
+
+
+@pytest.mark.parametrize("estrato", [None, lambda valores: valores[0]])
+def test_muestra_completa_es_exacta(cargar_caso, generar_lote, estrato):
+    caso = cargar_caso(CASO)
+    filas = generar_lote(caso, 300)
+    tasa_aprobados, tasas_rechazo = _proporciones(caso, filas)
+
+    estimacion = estimar_valoracion(
+        caso, [(i, valores) for i, valores in enumerate(filas)],
+        precision=1e-6, estrato=estrato, semilla=1)
+
+    assert estimacion.n_muestra == estimacion.n_poblacion == 300
+    assert estimacion.n_errores == 0
+    assert estimacion.precision_alcanzada
+    assert estimacion.tasa_aprobados == pytest.approx((tasa_aprobados,) * 3)
+    for (nombre, estimada), exacta, requisito in zip(
+            estimacion.tasas_rechazo, tasas_rechazo, caso.requisitos_raiz):
+        assert nombre == requisito.nombre
+        assert estimada == pytest.approx((exacta,) * 3)
+
+
+@pytest.mark.parametrize("estrato", [None, lambda valores: valores[1]])
+def test_muestra_parcial(cargar_caso, generar_lote, estrato):
+    caso = cargar_caso(CASO)
+    filas = generar_lote(caso, 20000)
+    tasa_aprobados, tasas_rechazo = _proporciones(caso, filas)
+    solicitantes = list(enumerate(filas))
+
+    estimacion = estimar_valoracion(caso, solicitantes, precision=0.03,
+                                    estrato=estrato, semilla=3)
+
+    assert estimacion.precision_alcanzada
+    assert 100 <= estimacion.n_muestra < 20000
+    _, inferior, superior = estimacion.tasa_aprobados
+    assert superior - inferior <= 0.06
+    assert inferior <= tasa_aprobados <= superior
+    for (_, (_, inferior, superior)), exacta in zip(
+            estimacion.tasas_rechazo, tasas_rechazo):
+        assert inferior <= exacta <= superior
+
+    # Con la misma semilla se repite la misma muestra
+    repetida = estimar_valoracion(caso, solicitantes, precision=0.03,
+                                  estrato=estrato, semilla=3)
+    assert repetida.n_muestra == estimacion.n_muestra
+    assert repetida.tasa_aprobados == estimacion.tasa_aprobados
+
+
+@pytest.mark.parametrize("estrato", [None,
+                                     lambda valores: valores[0] is True])
+def test_solicitantes_con_errores(cargar_caso, generar_lote, estrato):
+    caso = cargar_caso(CASO)
+    # Valores vacíos en algunos solicitantes
+    filas = generar_lote(caso, 400, faltan=0.05)
+    tasa_aprobados, _ = _proporciones(caso, filas[:17] + filas[18:])
+    n_validos = sum(1 for valores in filas if (None not in valores))
+
+    def acceso(indice):
+        # Una fila que no se puede leer (como las de un LoteIndexado)
+        if (indice == 17):
+            raise ValueError(u"Fila incorrecta!")
+        return (indice, filas[indice])
+
+    estimacion = estimar_valoracion(caso, (len(filas), acceso),
+                                    precision=1e-6, estrato=estrato,
+                                    semilla=0)
+    n_erroneos = len(filas) - n_validos + (None not in filas[17])
+
+    assert estimacion.n_errores == n_erroneos
+    assert estimacion.n_muestra == len(filas) - n_erroneos
+    assert estimacion.tasa_aprobados == pytest.approx((tasa_aprobados,) * 3)
+    assert u"con errores" in estimacion.__str__()
+
+
+def test_parametros_no_validos(cargar_caso):
+    caso = cargar_caso(CASO)
+
+    with pytest.raises(ValueError):
+        estimar_valoracion(caso, [])
+    with pytest.raises(ValueError):
+        estimar_valoracion(caso, [(0, [True, True, 0.8, 8.0])], precision=0)
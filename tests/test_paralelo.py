@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de la valoración en paralelo en memoria compartida.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import pytest
+
+from valorador_paralelo import LoteCompartido
+
+
+CASO = "becas-colaboracion-grado-MECD"
+
+
+@pytest.mark.parametrize("n_procesos,tam_tramo", [(1, None), (3, 37)])
+def test_igual_que_en_serie(cargar_caso, generar_lote, n_procesos,
+                            tam_tramo):
+    caso = cargar_caso(CASO)
+    filas = generar_lote(caso, 500)
+    lote = LoteCompartido(cargar_caso(CASO), enumerate(filas))
+
+    n_aprobados = lote.valorar(n_procesos, tam_tramo)
+
+    assert lote.n_solicitantes == 500
+    assert lote.identificadores == list(range(500))
+    assert lote.n_aprobados == n_aprobados
+
+    esperados = 0
+    for i, valores in enumerate(filas):
+        caso.asignar_valores(valores)
+        result = caso.valorar()
+        esperados += result
+
+        assert lote.aprobado(i) == result
+        assert lote.resultados(i) == caso.resultados
+        assert lote.valores(i) == valores
+        assert lote.explicar(i) == caso.explicacion
+
+    assert n_aprobados == esperados
+    assert 0 < n_aprobados < 500
+
+
+def test_tipo_no_soportado(cargar_caso, generar_lote):
+    caso = cargar_caso("tipos")
+
+    with pytest.raises(ValueError):
+        LoteCompartido(caso, enumerate(generar_lote(caso, 5)))
+
+
+def test_valor_vacio(cargar_caso, generar_lote):
+    caso = cargar_caso(CASO)
+    filas = generar_lote(caso, 5)
+    filas[3][1] = None
+
+    with pytest.raises(RuntimeError):
+        LoteCompartido(caso, enumerate(filas))
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de la puntuación de los casos y de la selección de los mejores
+solicitantes.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import random
+
+import pytest
+
+from valorador_lotes import (CacheValoraciones, SelectorMejores,
+                             mejores_solicitantes)
+
+
+def test_puntuar(cargar_caso):
+    caso = cargar_caso("becas-colaboracion-grado-MECD")
+
+    # Nota media (peso 0.8) entre 7.25 y 10 y carga lectiva (peso 0.2)
+    # entre su mínimo y 1
+    caso.asignar_valores([True, True, 1.0, 10.0])
+    assert caso.puntuar() == pytest.approx(1.0)
+
+    minimo = caso.requisitos[2].valor_minimo
+    caso.asignar_valores([True, True, minimo, 7.25])
+    assert caso.puntuar() == pytest.approx(0.0)
+
+    caso.asignar_valores([True, True, minimo, 8.625])
+    assert caso.puntuar() == pytest.approx(0.4)
+
+
+def test_puntuar_sin_puntuacion(cargar_caso):
+    caso = cargar_caso("grupos")
+
+    with pytest.raises(RuntimeError):
+        caso.puntuar()
+    with pytest.raises(RuntimeError):
+        mejores_solicitantes(caso, [], 3)
+
+
+@pytest.mark.parametrize("k", [1, 5, 50, 500])
+def test_selector_igual_que_ordenar(k):
+    generador = random.Random(k)
+    # Puntuaciones con muchos empates
+    puntuaciones = [generador.randint(0, 20) for _ in range(300)]
+
+    selector = SelectorMejores(k)
+    for i, puntuacion in enumerate(puntuaciones):
+        selector.insertar(puntuacion, i)
+
+    # A igual puntuación, primero los insertados antes
+    ordenados = sorted(enumerate(puntuaciones), key=lambda x: (-x[1], x[0]))
+    assert selector.mejores() == [(puntuacion, i) for i, puntuacion
+                                  in ordenados[:k]]
+    assert selector.n_insertados == len(puntuaciones)
+
+
+def test_selector_k_no_valido():
+    with pytest.raises(ValueError):
+        SelectorMejores(0)
+
+
+@pytest.mark.parametrize("con_cache", [False, True])
+def test_mejores_solicitantes(cargar_caso, generar_lote, con_cache):
+    caso = cargar_caso("becas-colaboracion-grado-MECD")
+    solicitantes = list(enumerate(generar_lote(caso, 400) * 2))
+
+    cache = CacheValoraciones(caso, 100) if con_cache else None
+    mejores = mejores_solicitantes(caso, solicitantes, 10, cache)
+
+    aprobados = []
+    for identificador, valores in solicitantes:
+        caso.asignar_valores(valores)
+        if (caso.valorar(explicar=False)):
+            aprobados.append((caso.puntuar(), identificador))
+    aprobados.sort(key=lambda x: (-x[0], x[1]))
+
+    assert mejores == aprobados[:10]
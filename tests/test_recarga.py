@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de la recarga en caliente del fichero del caso.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import io
+import os
+import json
+
+import pytest
+
+from valorador_model import Caso
+
+
+CASO_PATH = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "casos-de-prueba",
+    "becas-colaboracion-grado-MECD.json")
+
+
+def _escribir(file_path, definicion):
+    with io.open(file_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(definicion, ensure_ascii=False))
+
+
+@pytest.fixture
+def definicion():
+    with io.open(CASO_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def caso(tmpdir, definicion):
+    file_path = str(tmpdir.join("caso.json"))
+    _escribir(file_path, definicion)
+
+    caso = Caso()
+    caso.load_from_JSON_file(file_path)
+    caso.asignar_valores([False, True, 0.9, 8.5])
+    return caso
+
+
+def test_sin_cambios(tmpdir, caso):
+    assert caso.reload_from_JSON_file(str(tmpdir.join("caso.json"))) == []
+    assert [r.valor for r in caso.requisitos] == [False, True, 0.9, 8.5]
+
+
+def test_requisitos_modificados(tmpdir, caso, definicion):
+    requisitos = definicion["caso"]["requisitos"]
+    # Cambia el rango de la nota, intercambia los dos primeros y añade uno
+    requisitos[3]["valor_minimo"] = 8
+    requisitos[0], requisitos[1] = requisitos[1], requisitos[0]
+    requisitos.append({"nombre": u"Nuevo", "descripcion": u"",
+                       "tipo": "Booleano", "valor_deseado": True})
+    file_path = str(tmpdir.join("caso.json"))
+    _escribir(file_path, definicion)
+
+    assert caso.reload_from_JSON_file(file_path) == [0, 1, 3, 4]
+    # Los requisitos movidos conservan su valor; los cambiados no
+    assert [r.valor for r in caso.requisitos] == [True, False, 0.9, None,
+                                                  None]
+    assert caso.requisitos[3].valor_minimo == 8
+
+
+def test_requisito_eliminado(tmpdir, caso, definicion):
+    del definicion["caso"]["requisitos"][1]
+    file_path = str(tmpdir.join("caso.json"))
+    _escribir(file_path, definicion)
+
+    assert caso.reload_from_JSON_file(file_path) == [1, 2]
+    assert [r.valor for r in caso.requisitos] == [False, 0.9, 8.5]
+
+
+def test_fichero_incorrecto(tmpdir, caso):
+    file_path = str(tmpdir.join("caso.json"))
+    with io.open(file_path, "w", encoding="utf-8") as f:
+        f.write(u"{\"caso\": ")
+
+    with pytest.raises(IOError):
+        caso.reload_from_JSON_file(file_path)
+    assert [r.valor for r in caso.requisitos] == [False, True, 0.9, 8.5]
+    assert caso.valorar(explicar=False) is True
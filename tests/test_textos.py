@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de la reserva de textos compartidos de los casos.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import io
+import os
+import sys
+import json
+
+import pytest
+
+from valorador_model import Caso, ReservaTextos
+
+
+_CASOS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, "casos-de-prueba")
+
+# La reserva solo puede saber qué textos no se usan si el intérprete lleva la
+# cuenta de las referencias (CPython).
+pytestmark = pytest.mark.skipif(not hasattr(sys, "getrefcount"),
+                                reason="el intérprete no cuenta referencias")
+
+
+def _escribir(file_path, descripcion):
+    """
+    Escribe una copia del caso de las becas con otra descripción en el primer
+    requisito.
+    """
+    with io.open(os.path.join(_CASOS_PATH,
+                              "becas-colaboracion-grado-MECD.json"),
+                 encoding="utf-8") as f:
+        definicion = json.load(f)
+
+    definicion["caso"]["requisitos"][0]["descripcion"] = descripcion
+
+    with io.open(file_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(definicion, ensure_ascii=False))
+
+
+def _guardado(reserva, texto):
+    return texto in reserva._textos
+
+
+def test_textos_compartidos():
+    reserva = ReservaTextos()
+    casos = [Caso(reserva), Caso(reserva)]
+    for caso in casos:
+        caso.load_from_JSON_file(os.path.join(
+            _CASOS_PATH, "becas-colaboracion-grado-MECD.json"))
+
+    assert casos[0].requisitos[1].nombre is casos[1].requisitos[1].nombre
+    assert reserva.n_repetidos > 0 and reserva.bytes_ahorrados > 0
+
+
+def test_recargar_libera_los_textos(tmpdir):
+    reserva = ReservaTextos()
+    file_path = str(tmpdir.join("caso.json"))
+    _escribir(file_path, u"Primera descripción")
+    caso = Caso(reserva)
+    caso.load_from_JSON_file(file_path)
+    n_textos = reserva.n_textos
+
+    _escribir(file_path, u"Segunda descripción")
+    assert caso.reload_from_JSON_file(file_path) == [0]
+
+    assert not _guardado(reserva, u"Primera descripción")
+    assert _guardado(reserva, u"Segunda descripción")
+    assert reserva.n_textos == n_textos
+
+
+def test_cargar_otro_caso_libera_los_textos(tmpdir):
+    reserva = ReservaTextos()
+    file_path = str(tmpdir.join("caso.json"))
+    _escribir(file_path, u"Descripción única")
+    caso = Caso(reserva)
+    otro = Caso(reserva)
+    caso.load_from_JSON_file(file_path)
+    otro.load_from_JSON_file(file_path)
+
+    # Mientras otro caso los use, los textos se conservan
+    caso.load_from_JSON_file(os.path.join(_CASOS_PATH, "grupos.json"))
+    assert _guardado(reserva, u"Descripción única")
+
+    otro.load_from_JSON_file(os.path.join(_CASOS_PATH, "grupos.json"))
+    assert not _guardado(reserva, u"Descripción única")
+    assert not _guardado(reserva, u"Nota media de expediente")
+
+
+def test_definicion_anterior_conserva_los_textos(tmpdir):
+    reserva = ReservaTextos()
+    file_path = str(tmpdir.join("caso.json"))
+    _escribir(file_path, u"Primera descripción")
+    caso = Caso(reserva)
+    caso.load_from_JSON_file(file_path)
+    definicion = caso.definicion
+
+    _escribir(file_path, u"Segunda descripción")
+    caso.reload_from_JSON_file(file_path)
+
+    assert _guardado(reserva, u"Primera descripción")
+    assert definicion.requisitos[0].descripcion == u"Primera descripción"
+
+    del definicion
+    assert reserva.purgar() > 0
+    assert not _guardado(reserva, u"Primera descripción")
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de los tipos de requisito registrados: la puntuación, la validación
+de columnas y el almacenamiento como números se basan en las capacidades de
+cada clase, no en el nombre de su tipo.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import io
+import json
+
+import pytest
+
+from valorador_model import Caso
+from valorador_lotes import validar_columna
+from valorador_paralelo import LoteCompartido
+from valorador_veredictos import AlmacenVeredictos
+
+
+# Requisitos numéricos de cada tipo que se pueden reducir a un rango.
+_REQUISITOS = [
+    {"nombre": "Edad", "descripcion": "Edad.", "tipo": "Entero",
+     "valor_minimo": 18, "valor_maximo": 30},
+    {"nombre": "Nota", "descripcion": "Nota.", "tipo": "Intervalos",
+     "intervalos": [[5, 10]]},
+    {"nombre": "Becario", "descripcion": "Becario.", "tipo": "Booleano",
+     "valor_deseado": False},
+    {"nombre": "Asistencia", "descripcion": "Asistencia.",
+     "tipo": "Porcentaje", "valor_minimo": 0.8, "valor_maximo": 1},
+]
+
+
+def _cargar(tmpdir, requisitos, puntuacion=None):
+    definicion = {"nombre": u"Tipos", "descripcion": u"Tipos.",
+                  "requisitos": requisitos}
+    if (puntuacion is not None):
+        definicion["puntuacion"] = puntuacion
+
+    file_path = str(tmpdir.join("caso.json"))
+    with io.open(file_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"caso": definicion}, ensure_ascii=False))
+
+    caso = Caso()
+    caso.load_from_JSON_file(file_path)
+    return caso
+
+
+def test_puntuacion_con_entero_e_intervalos(tmpdir):
+    caso = _cargar(tmpdir, _REQUISITOS,
+                   [{"requisito": "Edad", "peso": 0.5, "invertir": True},
+                    {"requisito": "Nota", "peso": 0.5}])
+
+    caso.asignar_valores([18, 10.0, False, 0.9])
+    assert caso.puntuar() == pytest.approx(1.0)
+
+    caso.asignar_valores([24, 7.5, False, 0.9])
+    assert caso.puntuar() == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize("nombre", ["Becario", "Fecha"])
+def test_puntuacion_sin_rango_numerico(tmpdir, nombre):
+    requisitos = _REQUISITOS + [
+        {"nombre": "Fecha", "descripcion": "Fecha.", "tipo": "Fecha",
+         "valor_minimo": "2017-09-01", "valor_maximo": "2017-09-30"}]
+
+    # El error del criterio se notifica como un fichero con formato incorrecto
+    with pytest.raises(IOError):
+        _cargar(tmpdir, requisitos, [{"requisito": nombre, "peso": 1.0}])
+
+
+def test_validar_columna_por_tipo(cargar_caso):
+    edad = cargar_caso("tipos").requisitos[0]
+    valores, errores = validar_columna(edad, [u"18", u" 20 ", u"1.5", u"",
+                                              u"x"])
+    assert valores == [18, 20, None, None, None]
+    assert [error[0] for error in errores] == [2, 4]
+
+    # Camino rápido (toda la columna se convierte) y lento
+    porcentaje = cargar_caso("becas-colaboracion-grado-MECD").requisitos[2]
+    for textos in ([u"0.5", u"1.5", u"1"], [u"0.5", u"1.5", u"a"]):
+        valores, errores = validar_columna(porcentaje, textos)
+        assert valores[:2] == [0.5, None]
+        assert errores[0] == (1, u"1.5", u"no está entre 0 y 1")
+    assert errores[1] == (2, u"a", u"no es un número")
+
+    fecha = cargar_caso("tipos").requisitos[2]
+    valores, errores = validar_columna(fecha, [u"2017-9-1", u"ayer"])
+    assert valores == [u"2017-09-01", None]
+    assert errores == [(1, u"ayer", u"no es " + fecha.VALOR_ESPERADO)]
+
+    expresion = cargar_caso("expresiones").requisitos[2]
+    assert validar_columna(expresion, [u"1", u"x"]) == ([None, None], [])
+
+
+def test_rango_numerico(cargar_caso):
+    tipos = cargar_caso("tipos").requisitos
+    assert tipos[0].rango_numerico() == (18.0, 30.0)
+    assert tipos[1].rango_numerico() is None
+    assert tipos[2].rango_numerico() is None
+
+    # Con varios intervalos no basta con un mínimo y un máximo
+    assert cargar_caso("intervalos").requisitos[0].rango_numerico() is None
+    assert cargar_caso("expresiones").requisitos[2].rango_numerico() is None
+
+
+def test_lote_compartido_con_entero_e_intervalos(tmpdir, generar_lote):
+    caso = _cargar(tmpdir, _REQUISITOS)
+    filas = generar_lote(caso, 200)
+    lote = LoteCompartido(_cargar(tmpdir, _REQUISITOS), enumerate(filas))
+    lote.valorar(1)
+
+    for i, valores in enumerate(filas):
+        caso.asignar_valores(valores)
+        assert lote.aprobado(i) == caso.valorar()
+        assert lote.valores(i) == valores
+        assert type(lote.valores(i)[0]) is type(valores[0])
+
+
+def test_lote_compartido_sin_rango_numerico(cargar_caso):
+    with pytest.raises(ValueError):
+        LoteCompartido(cargar_caso("intervalos"), [])
+
+
+def test_almacen_veredictos_devuelve_valores_del_tipo(cargar_caso,
+                                                      generar_lote):
+    for nombre in ("tipos", "intervalos", "expresiones"):
+        caso = cargar_caso(nombre)
+        filas = generar_lote(caso, 50)
+        almacen = AlmacenVeredictos(caso)
+
+        for i, valores in enumerate(filas):
+            almacen.anadir_solicitante(i, valores)
+
+        for i, valores in enumerate(filas):
+            assert almacen.valores(i) == valores
+            assert ([type(valor) for valor in almacen.valores(i)] ==
+                    [type(valor) for valor in valores])
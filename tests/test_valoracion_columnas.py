@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de la valoración por columnas (DefinicionCaso.valorar_columnas) y de
+la búsqueda de casi aprobados, comparadas con la valoración de cada
+solicitante por separado.
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import pytest
+
+# Casos de casos-de-prueba con los que se comparan las dos valoraciones.
+_CASOS = ("becas-colaboracion-grado-MECD", "ejemplo", "expresiones",
+          "grupos", "intervalos", "tipos")
+
+
+def _valorar_uno_a_uno(definicion, filas):
+    """
+    Devuelve la lista de (resultado, resultados de los requisitos del primer
+    nivel) de cada fila, o None si no se puede valorar.
+    """
+    valoraciones = []
+    for valores in filas:
+        solicitante = definicion.nuevo_solicitante(valores)
+        try:
+            result = definicion.valorar(solicitante, explicar=False)
+        except RuntimeError:
+            valoraciones.append(None)
+        else:
+            valoraciones.append((result, list(solicitante.resultados)))
+    return valoraciones
+
+
+@pytest.mark.parametrize("nombre", _CASOS)
+def test_valorar_columnas_igual_que_valorar(cargar_caso, generar_lote, nombre):
+    definicion = cargar_caso(nombre).definicion
+    filas = generar_lote(definicion, 500)
+
+    aprobados, resultados = definicion.valorar_columnas(
+        [list(columna) for columna in zip(*filas)])
+
+    assert len(aprobados) == len(filas)
+    assert True in aprobados and False in aprobados
+
+    for i, valoracion in enumerate(_valorar_uno_a_uno(definicion, filas)):
+        assert valoracion is not None
+        assert aprobados[i] is valoracion[0]
+        assert [columna[i] for columna in resultados] == valoracion[1]
+
+
+@pytest.mark.parametrize("nombre", _CASOS)
+def test_valorar_columnas_con_valores_que_faltan(cargar_caso, generar_lote,
+                                                nombre):
+    definicion = cargar_caso(nombre).definicion
+    filas = generar_lote(definicion, 500, faltan=0.2, semilla=1)
+
+    aprobados, _ = definicion.valorar_columnas(
+        [list(columna) for columna in zip(*filas)])
+
+    # Donde valorar puede decidir, la valoración por columnas coincide
+    # (y solo queda indeterminado lo que valorar no puede decidir)
+    for i, valoracion in enumerate(_valorar_uno_a_uno(definicion, filas)):
+        if (valoracion is not None):
+            assert aprobados[i] is valoracion[0]
+        if (aprobados[i] is None):
+            assert valoracion is None
+
+
+def test_valorar_columnas_numero_de_columnas(cargar_caso):
+    definicion = cargar_caso("grupos").definicion
+
+    with pytest.raises(ValueError):
+        definicion.valorar_columnas([[1.0]])
+
+
+def _casi_aprobados_uno_a_uno(definicion, filas, tolerancia):
+    """
+    Busca los casi aprobados ensanchando el rango de cada requisito con
+    margen y valorando cada solicitante por separado.
+    """
+    casi = []
+    for i, valores in enumerate(filas):
+        resultado = _valorar_uno_a_uno(definicion, [valores])[0]
+        if (resultado is None or resultado[0]):
+            continue
+
+        tolerados = []
+        for requisito, valor in zip(definicion.requisitos, valores):
+            if (requisito.CALCULADO):
+                valor = requisito.calcular(
+                    [valores[definicion.indice(x)]
+                     for x in requisito.operandos])
+            tolerados.append(valor is not None and requisito.TIENE_MARGEN and
+                             requisito.margen(valor) >= -tolerancia)
+
+        if (_aprueba_con(definicion, valores, tolerados)):
+            casi.append(i)
+    return casi
+
+
+def _aprueba_con(definicion, valores, tolerados):
+    def valorar(requisito):
+        if (requisito.tipo == "Grupo"):
+            aprobados = sum(1 for x in requisito.requisitos if valorar(x))
+            return aprobados >= requisito.minimo
+        i = definicion.indice(requisito)
+        if (tolerados[i]):
+            return True
+        solicitante = definicion.nuevo_solicitante(valores)
+        return requisito.valorar(solicitante)
+
+    return all(valorar(requisito) for requisito in definicion.requisitos_raiz)
+
+
+@pytest.mark.parametrize("nombre", _CASOS)
+@pytest.mark.parametrize("tolerancia", [0.0, 0.05, 0.2])
+def test_casi_aprobados(cargar_caso, generar_lote, nombre, tolerancia):
+    definicion = cargar_caso(nombre).definicion
+    filas = generar_lote(definicion, 300, semilla=2)
+    columnas = [list(columna) for columna in zip(*filas)]
+
+    casi = definicion.casi_aprobados(columnas, tolerancia)
+    aprobados, _ = definicion.valorar_columnas(columnas)
+
+    assert all(aprobados[i] is False for i in casi)
+    assert casi == _casi_aprobados_uno_a_uno(definicion, filas, tolerancia)
+
+
+def test_casi_aprobados_crece_con_la_tolerancia(cargar_caso, generar_lote):
+    definicion = cargar_caso("becas-colaboracion-grado-MECD").definicion
+    filas = generar_lote(definicion, 500)
+    columnas = [list(columna) for columna in zip(*filas)]
+
+    anterior = set()
+    for tolerancia in (0.0, 0.01, 0.05, 0.1, 0.5):
+        casi = set(definicion.casi_aprobados(columnas, tolerancia))
+        assert anterior <= casi
+        anterior = casi
+    assert len(anterior) > 0
+
+
+def test_casi_aprobados_por_poco(cargar_caso):
+    # Nota media entre 5 y 10 y créditos entre 0.5 y 1; la expresión
+    # nota / 10 + creditos debe estar entre 1.4 y 2. Al primero le falta un
+    # 2% en la nota (y un 1.7% en la expresión), al segundo un 20% en la nota
+    # y al tercero un 10% en los créditos; el cuarto está aprobado.
+    definicion = cargar_caso("expresiones").definicion
+    columnas = [[4.9, 4.0, 9.0, 9.5], [0.9, 0.9, 0.45, 0.95],
+                [None, None, None, None]]
+
+    assert definicion.casi_aprobados(columnas, 0.0) == []
+    assert definicion.casi_aprobados(columnas, 0.05) == [0]
+    assert definicion.casi_aprobados(columnas, 0.1) == [0, 2]
+    assert definicion.casi_aprobados(columnas, 0.2) == [0, 1, 2]
+
+
+def test_casi_aprobados_tolerancia_negativa(cargar_caso):
+    definicion = cargar_caso("grupos").definicion
+
+    with pytest.raises(ValueError):
+        definicion.casi_aprobados([[] for _ in definicion.requisitos], -0.1)
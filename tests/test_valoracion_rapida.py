@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de la valoración rápida (se detiene en el primer requisito rechazado
+y ordena los requisitos según lo que suelen rechazar).
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+
+def test_mismo_resultado_que_la_valoracion_completa(cargar_caso,
+                                                    generar_lote):
+    caso = cargar_caso("becas-colaboracion-grado-MECD")
+    filas = generar_lote(caso, 500)
+
+    for valores in filas:
+        caso.asignar_valores(valores)
+        completo = caso.valorar()
+        assert caso.valorar(rapido=True) is completo
+        assert caso.explicacion == u""
+
+
+def test_se_detiene_en_el_primer_rechazado(cargar_caso):
+    caso = cargar_caso("ejemplo")
+    n_requisitos = len(caso.requisitos_raiz)
+
+    caso.asignar_valores([False] + [None] * (len(caso.requisitos) - 1))
+
+    # Los requisitos sin valor no llegan a evaluarse
+    assert caso.valorar(rapido=True) is False
+    assert caso.resultados == [False] + [None] * (n_requisitos - 1)
+
+
+def test_explicar_rechazados(cargar_caso, generar_lote):
+    caso = cargar_caso("becas-colaboracion-grado-MECD")
+    referencia = cargar_caso("becas-colaboracion-grado-MECD")
+
+    for valores in generar_lote(caso, 200):
+        caso.asignar_valores(valores)
+        referencia.asignar_valores(valores)
+        result = caso.valorar(rapido=True, explicar_rechazados=True)
+        referencia.valorar()
+
+        if (result):
+            assert caso.explicacion == u""
+        else:
+            assert caso.explicacion == referencia.explicacion
+            assert caso.resultados == referencia.resultados
+
+
+def test_evalua_primero_el_requisito_mas_selectivo(cargar_caso,
+                                                   generar_lote):
+    caso = cargar_caso("becas-colaboracion-grado-MECD")
+    nota = len(caso.requisitos) - 1
+
+    # Casi todos los solicitantes tienen una nota media insuficiente
+    filas = generar_lote(caso, 2 * caso._INTERVALO_REORDENACION)
+    for valores in filas:
+        valores[nota] = 1.0
+        caso.asignar_valores(valores)
+        caso.valorar(rapido=True)
+
+    assert caso._orden[0] == nota
+    tasas = caso.tasas_rechazo
+    assert tasas[nota] == max(tasas)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas del almacén de veredictos (guardar y cargar).
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import pytest
+
+from valorador_veredictos import AlmacenVeredictos
+
+
+def _almacen(caso, filas):
+    almacen = AlmacenVeredictos(caso)
+    almacen.anadir_lote((u"s" + str(i), valores)
+                        for i, valores in enumerate(filas))
+    return almacen
+
+
+@pytest.mark.parametrize("nombre", ["becas-colaboracion-grado-MECD",
+                                    "expresiones", "grupos", "tipos"])
+def test_guardar_y_cargar(cargar_caso, generar_lote, tmp_path, nombre):
+    caso = cargar_caso(nombre)
+    # Un número de solicitantes que no es múltiplo de 8
+    almacen = _almacen(caso, generar_lote(caso, 203))
+    file_path = str(tmp_path / "veredictos.bin")
+
+    almacen.guardar(file_path)
+    cargado = AlmacenVeredictos.cargar(file_path, caso)
+
+    assert cargado.n_solicitantes == almacen.n_solicitantes
+    assert list(cargado.identificadores) == list(almacen.identificadores)
+    assert cargado.aprobados() == almacen.aprobados()
+    for requisito in caso.requisitos_raiz:
+        assert (cargado.aprobados(requisito.nombre) ==
+                almacen.aprobados(requisito.nombre))
+
+    for i in range(almacen.n_solicitantes):
+        assert cargado.resultados(i) == almacen.resultados(i)
+        assert cargado.valores(i) == almacen.valores(i)
+        assert cargado.explicar(i) == almacen.explicar(i)
+
+
+def test_cargar_y_seguir_anadiendo(cargar_caso, generar_lote, tmp_path):
+    caso = cargar_caso("tipos")
+    file_path = str(tmp_path / "veredictos.bin")
+    _almacen(caso, generar_lote(caso, 50)).guardar(file_path)
+
+    # Los valores nuevos del tipo Enumerado reutilizan el diccionario cargado
+    cargado = AlmacenVeredictos.cargar(file_path, caso)
+    completo = _almacen(caso, generar_lote(caso, 50))
+    for i, valores in enumerate(generar_lote(caso, 30, semilla=1)):
+        cargado.anadir_solicitante(u"t" + str(i), valores)
+        completo.anadir_solicitante(u"t" + str(i), valores)
+
+    assert cargado.aprobados() == completo.aprobados()
+    for i in range(completo.n_solicitantes):
+        assert cargado.valores(i) == completo.valores(i)
+
+
+def test_cargar_con_otro_caso(cargar_caso, generar_lote, tmp_path):
+    caso = cargar_caso("grupos")
+    file_path = str(tmp_path / "veredictos.bin")
+    _almacen(caso, generar_lote(caso, 10)).guardar(file_path)
+
+    with pytest.raises(IOError):
+        AlmacenVeredictos.cargar(file_path, cargar_caso("tipos"))
+
+
+def test_cargar_fichero_no_valido(cargar_caso, tmp_path):
+    file_path = tmp_path / "veredictos.bin"
+    file_path.write_bytes(b"no es un almacen")
+
+    with pytest.raises(IOError):
+        AlmacenVeredictos.cargar(str(file_path), cargar_caso("grupos"))
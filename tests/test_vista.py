@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pruebas de la construcción diferida de la interfaz (necesitan PyQt4 y, en
+Linux, un servidor X).
+
+Autor: Andrés Salinas Lima <i52salia@uco.es>.
+"""
+
+import os
+import sys
+
+import pytest
+
+QtGui = pytest.importorskip("PyQt4.QtGui")
+
+pytestmark = pytest.mark.skipif(
+    sys.platform.startswith("linux") and not os.environ.get("DISPLAY"),
+    reason="Qt 4 necesita un servidor X")
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtGui.QApplication.instance() or QtGui.QApplication([sys.argv[0]])
+
+
+def test_vista_diferida(app):
+    from valorador_view import ValoradorView
+
+    view = ValoradorView(lazy=True)
+    assert view.main_window.centralWidget() is None
+
+    # El widget se construye y se coloca en la ventana en el primer uso
+    widget = view.main_widget
+    assert view.main_window.centralWidget() is widget
+    assert view.main_widget is widget
+
+
+def test_vista_completa(app):
+    from valorador_view import ValoradorView
+
+    view = ValoradorView()
+    assert view.main_window.centralWidget() is view.main_widget
+
+
+@pytest.mark.parametrize("lazy", [True, False])
+def test_montar(app, tmpdir, monkeypatch, lazy):
+    from valorador import Valorador
+
+    # Directorio personal vacío: sin sesión que recuperar
+    monkeypatch.setenv("HOME", str(tmpdir))
+    controller = Valorador.montar(app, lazy)
+    main_window = controller._view.main_window
+
+    assert main_window.centralWidget() is controller._view.main_widget
+    main_window.close()